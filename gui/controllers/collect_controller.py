@@ -9,6 +9,8 @@ from ..controllers.event_handlers.recording_handler import RecordingEventHandler
 from ..controllers.event_handlers.input_handler import InputEventHandler
 from ..controllers.event_handlers.chinese_input_handler import ChineseInputHandler
 from ..services.input.keyboard_listener import KeyboardListenerQt, KeyboardListenerPynputProcess
+from ..services.input.document_tracker import DocumentChangeTracker
+from ..services.storage.session_log import recover_incomplete_sessions
 from ..services.recording.screen_recorder import ScreenRecorder
 from ..services.recording.webcam_manager import WebcamManager
 from ..services.recording.webcam_recorder import WebcamVideoRecorder
@@ -21,6 +23,9 @@ class CollectController:
     def __init__(self, main_window, main_view=None):
         self.main_window = main_window
         
+        # 恢复上次异常退出时未提交的会话
+        recover_incomplete_sessions('data')
+        
         # 初始化模型
         self.data_model = DataCollectionModel()
         self.recording_model = RecordingModel(self.data_model)
@@ -28,6 +33,10 @@ class CollectController:
         # 初始化视图
         self.main_view = main_view if main_view is not None else CollectView(main_window)
         
+        # 输入框内容变更跟踪（按键记录只引用内容版本号）
+        self.content_tracker = DocumentChangeTracker(self.main_view.get_input_document())
+        self.data_model.set_content_tracker(self.content_tracker)
+        
         # 初始化事件处理器
         self._init_event_handlers()
         
@@ -152,6 +161,7 @@ class CollectController:
     def _start_collecting(self):
         """开始采集"""
         self.data_model.start_collecting()
+        self.content_tracker.reset()
         
         # 启动当前选择的底层键盘监听器
         self.current_keyboard_listener.start_listening()
@@ -312,10 +322,9 @@ class CollectController:
         self.main_view.set_input_recording_style(False)
         self.main_view.set_next_button_enabled(True)
     
-    def add_keystroke(self, key, text, input_content):
-        """添加按键记录"""
+    def add_keystroke(self, key, text, input_content=None):
+        """添加按键记录（input_content为空时记录当前内容版本）"""
         self.data_model.add_keystroke(key, text, input_content)
-        self.main_view.update_input_content(input_content)
     
     def add_raw_keystroke(self, raw_keystroke):
         """添加原始按键记录"""
@@ -10,7 +10,7 @@ class ChineseInputHandler(QObject):
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
-        self.last_content = ""
+        self.last_version = None
         self.pending_chars = []  # 待上屏的字符
         self.composition_text = ""  # 当前组合文本
         
@@ -22,14 +22,13 @@ class ChineseInputHandler(QObject):
                 # 记录所有按键，包括中文输入法的按键
                 key = event.key()
                 text = event.text()
-                current_content = self.controller.main_view.get_input_content()
                 
-                # 记录按键信息
-                self.controller.add_keystroke(key, text, current_content)
+                # 记录按键信息（内容以版本号引用，保存时再解析）
+                self.controller.add_keystroke(key, text)
                 
                 # 如果是中文输入法的候选键（数字键1-9）
                 if key >= 49 and key <= 57:  # 数字键1-9
-                    self.controller.add_keystroke(f'CANDIDATE_{text}', text, current_content)
+                    self.controller.add_keystroke(f'CANDIDATE_{text}', text)
                 
             elif event.type() == QEvent.InputMethod:
                 # 处理输入法事件
@@ -39,8 +38,7 @@ class ChineseInputHandler(QObject):
                 # 记录按键释放
                 key = event.key()
                 if key not in [16777216, 16777217, 16777218]:  # 排除特殊键
-                    current_content = self.controller.main_view.get_input_content()
-                    self.controller.add_keystroke(f'RELEASE_{key}', '', current_content)
+                    self.controller.add_keystroke(f'RELEASE_{key}', '')
                     
         return False
     
@@ -49,7 +47,7 @@ class ChineseInputHandler(QObject):
         if not isinstance(event, QInputMethodEvent):
             return
             
-        current_content = self.controller.main_view.get_input_content()
+        current_version = self.controller.content_tracker.version
         
         # 获取输入法事件信息
         preedit_text = event.preeditString()  # 预编辑文本（拼音）
@@ -58,13 +56,13 @@ class ChineseInputHandler(QObject):
         if preedit_text:
             # 有预编辑文本，说明正在输入拼音
             self.composition_text = preedit_text
-            self.controller.add_keystroke(f'COMPOSITION_{preedit_text}', preedit_text, current_content)
+            self.controller.add_keystroke(f'COMPOSITION_{preedit_text}', preedit_text)
             
         if commit_text:
             # 有提交文本，说明文字上屏
-            self.controller.add_keystroke(f'COMMIT_{commit_text}', commit_text, current_content)
+            self.controller.add_keystroke(f'COMMIT_{commit_text}', commit_text)
             
             # 检查内容变化
-            if current_content != self.last_content:
-                self.controller.add_keystroke('IME_CHANGE', '', current_content)
-                self.last_content = current_content 
\ No newline at end of file
+            if current_version != self.last_version:
+                self.controller.add_keystroke('IME_CHANGE', '')
+                self.last_version = current_version 
\ No newline at end of file
@@ -7,7 +7,7 @@ class InputEventHandler(QObject):
     def __init__(self, controller):
         super().__init__()
         self.controller = controller
-        self.last_content = ""  # 记录上次的内容，用于检测变化
+        self.last_version = None  # 记录上次的内容版本，用于检测变化
     
     def eventFilter(self, obj, event):
         if obj == self.controller.main_view.get_input_box() and self.controller.data_model.is_collecting():
@@ -15,25 +15,23 @@ class InputEventHandler(QObject):
                 # 记录物理按键
                 key = event.key()
                 text = event.text()
-                current_content = self.controller.main_view.get_input_content()
                 
-                # 记录按键信息
-                self.controller.add_keystroke(key, text, current_content)
+                # 记录按键信息（内容以版本号引用，保存时再解析）
+                self.controller.add_keystroke(key, text)
                 
             elif event.type() == QEvent.InputMethod:
                 # 记录中文输入法事件
-                current_content = self.controller.main_view.get_input_content()
+                current_version = self.controller.content_tracker.version
                 
                 # 如果内容有变化，记录输入法上屏
-                if current_content != self.last_content:
-                    self.controller.add_keystroke('IME', '', current_content)
-                    self.last_content = current_content
+                if current_version != self.last_version:
+                    self.controller.add_keystroke('IME', '')
+                    self.last_version = current_version
                     
             elif event.type() == QEvent.KeyRelease:
                 # 记录按键释放（可选，用于更精确的按键记录）
                 key = event.key()
                 if key not in [16777216, 16777217, 16777218]:  # 排除一些特殊键
-                    current_content = self.controller.main_view.get_input_content()
-                    self.controller.add_keystroke(f'RELEASE_{key}', '', current_content)
+                    self.controller.add_keystroke(f'RELEASE_{key}', '')
                     
         return False 
\ No newline at end of file
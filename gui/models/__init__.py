@@ -2,5 +2,7 @@
 
 from .data_collection_model import DataCollectionModel
 from .recording_model import RecordingModel
+from .event_log import EventLog, iter_record_events
+from .session_table_model import SessionTableModel
 
-__all__ = ['DataCollectionModel', 'RecordingModel']
+__all__ = ['DataCollectionModel', 'RecordingModel', 'EventLog', 'iter_record_events', 'SessionTableModel']
@@ -2,7 +2,14 @@ import time
 import json as pyjson
 import os
 import logging
+import threading
 from textlib import TextLib
+from .event_log import EventLog, SOURCE_INPUT, SOURCE_RAW
+from ..services.storage.session_log import (
+    SessionLogWriter, SESSION_LOG_SUFFIX, ENTRY_META, ENTRY_KEYSTROKE, ENTRY_RAW_KEYSTROKE
+)
+from ..services.storage.session_store import write_session_manifest
+from ..services.storage.session_catalog import open_catalog
 
 
 class DataCollectionModel:
@@ -10,11 +17,24 @@ class DataCollectionModel:
     
     def __init__(self, textlib_path='textlib/questions.json'):
         self.textlib = TextLib(textlib_path)
+        # 题库文件被修改时在后台重新加载，不影响正在进行的采集
+        self.textlib.start_watching()
+        # 设置参与者后按参与者不重复抽题
+        self.question_sampler = None
+        # 启用后按曝光次数加权、按难度和类型均衡出题
+        self.question_scheduler = None
         self.current_question = None
-        self.keystroke_records = []  # 原有的input_tool_keystrokes
-        self.raw_keystroke_records = []  # 新增的底层keystrokes
+        # 多来源事件日志，各来源缓冲区按时间有序
+        self.event_log = EventLog()
+        self.keystroke_records = self.event_log.buffer(SOURCE_INPUT)  # 原有的input_tool_keystrokes
+        self.raw_keystroke_records = self.event_log.buffer(SOURCE_RAW)  # 新增的底层keystrokes
+        # 输入框内容跟踪器，按键记录中只保存content_version，保存时再解析为文本
+        self.content_tracker = None
         self.collecting = False
         self.recording_start_time = None
+        # 会话预写日志，采集期间持续写盘
+        self.session_log = None
+        self.session_log_path = None
         
         # 录制相关
         self.video_path = None
@@ -25,17 +45,46 @@ class DataCollectionModel:
         """加载新题目"""
         self._reset_state()
         
-        question = self.textlib.get_random_question()
+        if self.question_sampler is not None:
+            question = self.question_sampler.draw()
+        elif self.question_scheduler is not None:
+            question = self.question_scheduler.draw()
+        else:
+            question = self.textlib.get_random_question()
         if not question:
             return None
             
         self.current_question = question
         return question
     
+    def set_participant(self, participant_id, state_dir='data/samplers', **filters):
+        """设置当前参与者：题目池抽完之前不重复出题，进度保存在state_dir下"""
+        if participant_id:
+            self.question_sampler = self.textlib.sampler(participant_id, state_dir, **filters)
+        else:
+            self.question_sampler = None
+    
+    def enable_question_scheduler(self, data_dir='data', **options):
+        """按曝光次数加权、分层均衡出题，曝光次数取自data_dir的会话目录索引
+
+        Args:
+            options: 传给TextLib.scheduler的参数（stratify_by、decay、qtype等）
+        """
+        try:
+            counts = open_catalog(data_dir).question_exposure_counts()
+        except Exception as e:
+            logging.error(f'读取题目曝光次数失败: {e}')
+            counts = {}
+        self.question_scheduler = self.textlib.scheduler(counts=counts, **options)
+
+    def disable_question_scheduler(self):
+        """恢复为随机出题"""
+        self.question_scheduler = None
+    
     def _reset_state(self):
-        """重置状态"""
-        self.keystroke_records = []
-        self.raw_keystroke_records = []
+        """重置状态（未提交的会话视为放弃）"""
+        self._abort_session_log('reset')
+        self.event_log.clear()
         self.collecting = False
         self.video_path = None
         self.webcam_video_path = None
@@ -45,8 +94,7 @@ class DataCollectionModel:
     def start_collecting(self):
         """开始采集"""
         self.collecting = True
-        self.keystroke_records = []
-        self.raw_keystroke_records = []
+        self.event_log.clear()
         # 录制开始时间将在实际开始录制时设置
         # self.recording_start_time = time.time()
         
@@ -55,17 +103,59 @@ class DataCollectionModel:
         timestamp = int(time.time())
         self.video_path = f"data/sample_{timestamp}.mp4"
         self.webcam_video_path = f"data/webcam_{timestamp}.mp4"
+        
+        # 打开会话日志，采集期间的按键记录成组追加写盘
+        self._abort_session_log('restart')
+        self.session_log_path = self.video_path.replace('.mp4', SESSION_LOG_SUFFIX)
+        self.session_log = SessionLogWriter(self.session_log_path, prepare=self._prepare_log_record)
+        self.session_log.open({
+            'question': self.current_question,
+            'screen_video_path': self.video_path,
+            'webcam_video_path': self.webcam_video_path,
+            'started_at': time.time()
+        })
+    
+    def _close_session_log(self, footer=None):
+        """关闭会话日志（footer为None表示未提交）"""
+        if self.session_log is not None:
+            self.session_log.close(footer)
+            self.session_log = None
+
+    def _abort_session_log(self, reason):
+        """放弃未提交的会话日志（标记为aborted，下次启动时不会被当作崩溃恢复）"""
+        if self.session_log is not None:
+            self.session_log.abort(reason)
+            self.session_log = None
+    
+    def _prepare_log_record(self, record):
+        """写日志前把content_version解析为input_content（在日志写入线程中调用）"""
+        record = dict(record)
+        version = record.pop('content_version', None)
+        if version is not None and 'input_content' not in record:
+            content = self.content_tracker.content_at(version) if self.content_tracker else None
+            record['input_content'] = content if content is not None else ''
+        return record
+    
+    def set_content_tracker(self, content_tracker):
+        """设置输入框内容跟踪器"""
+        self.content_tracker = content_tracker
+    
+    def current_content_version(self):
+        """当前输入框内容版本"""
+        return self.content_tracker.version if self.content_tracker else None
     
     def set_recording_start_time(self):
         """设置录制开始时间（在实际开始录制时调用）"""
         self.recording_start_time = time.time()
+        if self.session_log is not None:
+            self.session_log.append(ENTRY_META, {'recording_start_time': self.recording_start_time})
         logging.debug(f'Recording start time set to: {self.recording_start_time}')
     
     def stop_collecting(self):
         """停止采集"""
         self.collecting = False
     
-    def add_keystroke(self, key, text, input_content):
+    def add_keystroke(self, key, text, input_content=None):
         """添加按键记录（保留用于兼容性）"""
         if self.collecting:
             current_time = time.time()
@@ -79,14 +169,19 @@ class DataCollectionModel:
                 'text': text,
                 'timestamp': relative_timestamp,  # 相对时间（用于回放）
                 'absolute_timestamp': absolute_timestamp,  # 绝对时间（用于调试）
-                'input_content': input_content
             }
+            if input_content is None and self.content_tracker is not None:
+                keystroke_record['content_version'] = self.content_tracker.version
+            else:
+                keystroke_record['input_content'] = input_content
             # 补全字段
             if 'timestamp' not in keystroke_record:
                 keystroke_record['timestamp'] = relative_timestamp
             if 'absolute_timestamp' not in keystroke_record:
                 keystroke_record['absolute_timestamp'] = absolute_timestamp
-            self.keystroke_records.append(keystroke_record)
+            self.event_log.append(SOURCE_INPUT, keystroke_record)
+            if self.session_log is not None:
+                self.session_log.append(ENTRY_KEYSTROKE, keystroke_record)
             logging.debug(f'Keystroke added: {keystroke_record}')
             logging.debug(f'Total keystrokes: {len(self.keystroke_records)}')
         else:
@@ -104,29 +199,64 @@ class DataCollectionModel:
                     raw_keystroke['timestamp'] = raw_keystroke['absolute_timestamp'] - self.recording_start_time
                 else:
                     raw_keystroke['timestamp'] = raw_keystroke['absolute_timestamp']
-            self.raw_keystroke_records.append(raw_keystroke)
+            self.event_log.append(SOURCE_RAW, raw_keystroke)
+            if self.session_log is not None:
+                self.session_log.append(ENTRY_RAW_KEYSTROKE, raw_keystroke)
             logging.debug(f'Raw keystroke added: {raw_keystroke}')
             logging.debug(f'Total raw keystrokes: {len(self.raw_keystroke_records)}')
         else:
             logging.warning(f'Raw keystroke ignored: collecting={self.collecting}, keystroke={raw_keystroke}')
     
     def save_data(self, user_input, webcam_recording_path=None):
-        """保存数据"""
+        """保存数据
+
+        按键明细已在采集期间写入会话日志，这里只追加footer并写入小的清单JSON。
+        """
         data = {
             'question': self.current_question,
             'user_input': user_input,
-            'keystrokes': self.keystroke_records,  # 原有的input_tool_keystrokes
-            'raw_keystrokes': self.raw_keystroke_records,  # 新增的底层keystrokes
             'recording_start_time': self.recording_start_time,  # 保存录制开始时间
             'timestamp': time.time(),  # 保存数据保存时间
             'screen_video_path': self.video_path,
-            'webcam_video_path': webcam_recording_path
+            'webcam_video_path': webcam_recording_path,
+            'keystroke_count': len(self.keystroke_records),
+            'raw_keystroke_count': len(self.raw_keystroke_records)
         }
         filename = self.video_path.replace('.mp4', '.json')
-        with open(filename, 'w', encoding='utf-8') as f:
-            pyjson.dump(data, f, ensure_ascii=False, indent=2)
+        if self.session_log is not None:
+            self._close_session_log(footer=data)
+            data['session_log'] = self.session_log_path
+            write_session_manifest(filename, data)
+        else:
+            # 没有会话日志时退回到完整保存
+            data['keystrokes'] = [self._prepare_log_record(r) for r in self.keystroke_records]  # 原有的input_tool_keystrokes
+            data['raw_keystrokes'] = [self._prepare_log_record(r) for r in self.raw_keystroke_records]  # 新增的底层keystrokes
+            with open(filename, 'w', encoding='utf-8') as f:
+                pyjson.dump(data, f, ensure_ascii=False, indent=2)
+        self._update_catalog(filename)
+        if self.question_scheduler is not None and self.current_question:
+            self.question_scheduler.record_exposure(self.current_question.get('id'))
         return filename
     
+    def _update_catalog(self, filename):
+        """在后台线程把刚保存的记录增量写入会话目录索引
+
+        解析记录、探测视频（摄像头视频可能仍在收尾）和收集输入文本都较慢，不能阻塞界面线程。
+        后台线程完成前目录监视若先收到文件变化，也会自行补上索引。
+        """
+        threading.Thread(target=self._index_saved_record, args=(filename,), daemon=True).start()
+
+    @staticmethod
+    def _index_saved_record(filename):
+        try:
+            open_catalog(os.path.dirname(filename) or '.').update_path(filename)
+        except Exception as e:
+            logging.error(f'更新会话目录索引失败: {e}')
+    
+    def iter_events(self):
+        """按时间顺序遍历本次采集的全部按键事件（带source和seq）"""
+        return self.event_log.iter_events()
+    
     def get_question_content(self):
         """获取题目内容"""
         return self.current_question.get('content', '') if self.current_question else ''
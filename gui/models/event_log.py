@@ -0,0 +1,122 @@
+import heapq
+import threading
+from bisect import bisect_right, insort
+
+
+# 按键事件来源标签
+SOURCE_INPUT = 'keystrokes'  # 输入框事件过滤器（含输入法 COMPOSITION_/COMMIT_ 伪按键）
+SOURCE_RAW = 'raw_keystrokes'  # 底层监听（Qt全局过滤器或pynput）
+
+
+def event_time(event):
+    """事件排序用时间（优先使用绝对时间，兼容只有相对时间的旧记录）"""
+    ts = event.get('absolute_timestamp')
+    if ts is None:
+        ts = event.get('timestamp', 0.0)
+    return ts
+
+
+def merge_event_streams(streams, key=event_time):
+    """对多个按时间有序的事件流做流式k路归并
+
+    Args:
+        streams: [(source, iterable)]，每个iterable内部已按时间排序
+        key: 取事件时间的函数
+    Yields:
+        dict: 带 source 和全局序号 seq 的事件（浅拷贝，不修改原记录）
+    """
+    def tagged(rank, source, events):
+        for index, event in enumerate(events):
+            # (时间, 来源顺序, 来源内序号) 保证同一时间戳下顺序稳定，且不比较dict
+            yield key(event), rank, index, source, event
+
+    merged = heapq.merge(*(tagged(rank, source, events) for rank, (source, events) in enumerate(streams)))
+    for seq, (_, _, _, source, event) in enumerate(merged):
+        item = dict(event)
+        item['source'] = source
+        item['seq'] = seq
+        yield item
+
+
+def iter_record_events(record):
+    """按时间顺序遍历已保存记录中的所有按键事件"""
+    streams = []
+    for source in (SOURCE_INPUT, SOURCE_RAW):
+        events = record.get(source) or []
+        if not _is_sorted(events):
+            # 旧数据按到达顺序保存，这里做一次兜底排序
+            events = sorted(events, key=event_time)
+        streams.append((source, events))
+    return merge_event_streams(streams)
+
+
+def _is_sorted(events):
+    """检查事件是否已按时间排序"""
+    last = None
+    for event in events:
+        ts = event_time(event)
+        if last is not None and ts < last:
+            return False
+        last = ts
+    return True
+
+
+class EventLog:
+    """多来源按键事件日志
+
+    每个来源维护一个按时间排序的缓冲区：正常情况下事件按时间到达，直接追加；
+    个别跨线程晚到的事件用二分插入。遍历时对各缓冲区做k路归并，
+    得到统一的、带来源标签和全局序号的事件流，无需对整体重新排序。
+    """
+
+    def __init__(self, sources=(SOURCE_INPUT, SOURCE_RAW)):
+        self._lock = threading.Lock()
+        self._buffers = {source: [] for source in sources}
+        self._keys = {source: [] for source in sources}
+
+    def append(self, source, event):
+        """追加事件（可从任意线程调用）"""
+        ts = event_time(event)
+        with self._lock:
+            buffer = self._buffers[source]
+            keys = self._keys[source]
+            if not keys or ts >= keys[-1]:
+                keys.append(ts)
+                buffer.append(event)
+            else:
+                # 晚到事件：插入到同一时间戳的最后，保持稳定顺序
+                insort(keys, ts)
+                index = bisect_right(keys, ts) - 1
+                buffer.insert(index, event)
+
+    def buffer(self, source):
+        """获取某个来源的有序缓冲区（直接引用，不复制）"""
+        return self._buffers[source]
+
+    def clear(self):
+        """清空所有来源（原地清空，保持已有引用有效）"""
+        with self._lock:
+            for source in self._buffers:
+                self._buffers[source].clear()
+                self._keys[source].clear()
+
+    def count(self, source=None):
+        """事件数量"""
+        if source is not None:
+            return len(self._buffers[source])
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def __len__(self):
+        return self.count()
+
+    def iter_records(self):
+        """遍历所有原始记录（不归并、不复制，可就地修改）"""
+        for buffer in self._buffers.values():
+            yield from buffer
+
+    def iter_events(self):
+        """按时间顺序遍历所有来源的事件"""
+        with self._lock:
+            # 浅拷贝当前缓冲区，避免归并过程中其他线程插入导致错位
+            streams = [(source, list(buffer)) for source, buffer in self._buffers.items()]
+        return merge_event_streams(streams)
@@ -0,0 +1,239 @@
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+from ..services.storage.session_catalog import ORDER_BY_RELEVANCE
+
+# 取整行记录摘要的角色
+RecordRole = Qt.UserRole + 1
+
+
+def _format_time(record):
+    timestamp = record.get('timestamp')
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S') if timestamp else ''
+
+
+def _format_question(record):
+    content = record.get('question_content') or ''
+    return content[:50] + '...' if len(content) > 50 else content
+
+
+def _format_duration(record):
+    duration = record.get('screen_duration') or record.get('webcam_duration')
+    if not duration:
+        return ''
+    minutes, seconds = divmod(int(duration), 60)
+    return f'{minutes:02d}:{seconds:02d}'
+
+
+def _format_exists(field):
+    return lambda record: '✓' if record.get(field) else '✗'
+
+
+def _format_action(record):
+    # 有视频时显示回放按钮（由按钮委托绘制）
+    return '回放' if record.get('screen_exists') or record.get('webcam_exists') else ''
+
+
+# 列定义：键 -> (表头, 目录索引排序列, 显示函数)
+COLUMNS = {
+    'time': ('时间', 'timestamp', _format_time),
+    'file': ('文件', 'path', lambda record: os.path.basename(record.get('path', ''))),
+    'question': ('题目', 'question_content', _format_question),
+    'answer': ('答案', 'answer', lambda record: record.get('answer') or '无'),
+    'user_input': ('作答', 'user_input', lambda record: (record.get('user_input') or '')[:50]),
+    'keystrokes': ('按键数', 'keystroke_count', lambda record: str(record.get('keystroke_count') or 0)),
+    'duration': ('时长', 'screen_duration', _format_duration),
+    'screen': ('屏幕录制', 'screen_exists', _format_exists('screen_exists')),
+    'webcam': ('摄像头录制', 'webcam_exists', _format_exists('webcam_exists')),
+    'action': ('操作', None, _format_action),
+}
+
+# 居中显示的列
+_CENTERED_COLUMNS = {'screen', 'webcam', 'keystrokes', 'duration', 'action'}
+
+
+class SessionTableModel(QAbstractTableModel):
+    """会话记录表格模型
+
+    数据来自会话目录索引的分页查询：视图需要时通过canFetchMore/fetchMore逐页加载，
+    排序和筛选都转为目录索引的查询条件，模型中只保存已加载的行。
+    """
+
+    # 总记录数变化（重新查询后）
+    total_changed = pyqtSignal(int)
+
+    def __init__(self, catalog=None, columns=None, page_size=200, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.columns = list(columns or COLUMNS)
+        self.page_size = page_size
+        self.filters = {}
+        self.order_by = 'timestamp'
+        self.descending = True
+        self._rows = []
+        self._total = 0
+
+    # ---------- 查询条件 ----------
+
+    def set_catalog(self, catalog):
+        """设置目录索引并重新查询"""
+        self.catalog = catalog
+        self.refresh()
+
+    def set_filters(self, **filters):
+        """设置筛选条件（参数同SessionCatalog.query）并重新查询"""
+        self.filters = {k: v for k, v in filters.items() if v is not None}
+        self.refresh()
+
+    def set_order(self, order_by, descending=True):
+        """设置排序并重新查询"""
+        self.order_by = order_by
+        self.descending = descending
+        self.refresh()
+
+    def refresh(self):
+        """丢弃已加载的行，按当前条件重新查询总数并加载第一页（其余行由视图按需加载）"""
+        self.beginResetModel()
+        self._rows = []
+        self._total = self.catalog.count(**self.filters) if self.catalog else 0
+        self.endResetModel()
+        if self.canFetchMore():
+            self.fetchMore()
+        self.total_changed.emit(self._total)
+
+    @property
+    def total_count(self):
+        """符合条件的总记录数"""
+        return self._total
+
+    def column_key(self, column):
+        """列号 -> 列键"""
+        return self.columns[column]
+
+    def record(self, row):
+        """已加载的第row行记录摘要"""
+        return self._rows[row]
+
+    # ---------- 增量更新 ----------
+
+    def apply_changes(self, updated, removed):
+        """把目录索引的增量变化应用到已加载的行（逐行插入、更新、删除）
+
+        Args:
+            updated: 新增或更新的记录路径
+            removed: 删除的记录路径
+        """
+        if self.catalog is None or not (updated or removed):
+            return
+        if self.order_by == ORDER_BY_RELEVANCE:
+            # 相关度无法在本地比较，重新查询
+            self.refresh()
+            return
+        all_loaded = len(self._rows) >= self._total
+        for path in removed:
+            self._remove_path(path)
+        for path in updated:
+            self._remove_path(path)
+            if self.catalog.matches(path, **self.filters):
+                record = self.catalog.get(path)
+                if record is not None:
+                    self._insert_record(record, all_loaded)
+        # 未加载部分的变化只影响总数，分页偏移仍与索引一致
+        self._total = max(self.catalog.count(**self.filters), len(self._rows))
+        self.total_changed.emit(self._total)
+
+    def _remove_path(self, path):
+        for row, record in enumerate(self._rows):
+            if record['path'] == path:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self._rows[row]
+                self.endRemoveRows()
+                return
+
+    def _sort_key(self, record):
+        # 与SQLite的排序一致：升序时NULL在前，值相同按路径
+        value = record.get(self.order_by)
+        return (value is not None, value, record['path'])
+
+    def _insert_record(self, record, all_loaded):
+        keys = [self._sort_key(r) for r in self._rows]
+        key = self._sort_key(record)
+        if self.descending:
+            keys.reverse()
+            row = len(keys) - bisect_left(keys, key)
+        else:
+            row = bisect_right(keys, key)
+        if row == len(self._rows) and not all_loaded:
+            # 落在尚未加载的部分，之后fetchMore时再取
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, record)
+        self.endInsertRows()
+
+    # ---------- 分页加载 ----------
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return len(self._rows) < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.catalog is None:
+            return
+        rows = self.catalog.query(
+            offset=len(self._rows), limit=self.page_size,
+            order_by=self.order_by, descending=self.descending, **self.filters
+        )
+        if not rows:
+            # 索引在两次查询之间被修改，以实际能取到的行数为准
+            self._total = len(self._rows)
+            return
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._rows.extend(rows)
+        self.endInsertRows()
+
+    # ---------- QAbstractTableModel ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._rows):
+            return None
+        record = self._rows[index.row()]
+        key = self.columns[index.column()]
+        if role == Qt.DisplayRole:
+            return COLUMNS[key][2](record)
+        if role == Qt.ToolTipRole and key in ('question', 'user_input'):
+            return record.get('question_content') if key == 'question' else record.get('user_input')
+        if role == Qt.TextAlignmentRole and key in _CENTERED_COLUMNS:
+            return Qt.AlignCenter
+        if role == RecordRole:
+            return record
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[self.columns[section]][0]
+        return super().headerData(section, orientation, role)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """表头排序：转为目录索引的排序列"""
+        if not 0 <= column < len(self.columns):
+            return
+        sort_column = COLUMNS[self.columns[column]][1]
+        if sort_column is None:
+            return
+        self.set_order(sort_column, order == Qt.DescendingOrder)
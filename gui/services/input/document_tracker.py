@@ -0,0 +1,125 @@
+import logging
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtGui import QTextCursor
+
+# QTextDocument内部字符 -> toPlainText()中的字符（长度保持一致）
+_PLAIN_TEXT_TABLE = str.maketrans({
+    '\u2029': '\n',  # 段落分隔符
+    '\u2028': '\n',  # 行分隔符
+    '\ufdd0': '\n',  # 框架起始
+    '\ufdd1': '\n',  # 框架结束
+    '\u00a0': ' ',   # 不换行空格
+})
+
+
+class DocumentChangeTracker(QObject):
+    """输入框内容变更跟踪器
+
+    只订阅一次 QTextDocument.contentsChange，为每次修改分配递增的版本号并
+    记录增量 (位置, 删除长度, 插入文本)。按键监听器只需引用“内容版本N”，
+    不必每次都 toPlainText() 复制全文；需要真实文本时（保存/写日志）再由
+    content_at() 从检查点重放增量得到。
+    """
+
+    version_changed = pyqtSignal(int)  # 新版本号
+
+    def __init__(self, document, checkpoint_interval=256, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.checkpoint_interval = checkpoint_interval
+        self._version = 0
+        self._base_version = 0
+        self._deltas = []  # 第i个增量把版本 base+i 变为 base+i+1
+        self._checkpoints = {}  # 版本 -> 文本
+        self._length = 0
+        # 最近一次重放的位置，顺序解析时避免重复计算
+        self._cursor_version = 0
+        self._cursor_text = ''
+        # content_at可能在会话日志写入线程中调用
+        self._lock = threading.Lock()
+        self.reset()
+        document.contentsChange.connect(self._on_contents_change)
+
+    @property
+    def version(self):
+        """当前内容版本"""
+        return self._version
+
+    def reset(self):
+        """以当前内容为基准重新开始跟踪（开始采集时调用）"""
+        text = self.document.toPlainText()
+        with self._lock:
+            self._base_version = self._version
+            self._deltas = []
+            self._checkpoints = {self._version: text}
+            self._length = len(text)
+            self._cursor_version = self._version
+            self._cursor_text = text
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        """处理文档变更，只读取新增部分的文本"""
+        plain_length = self.document.characterCount() - 1
+        # setPlainText/clear时Qt会把末尾隐含的段落符计入删除和新增数量，这里截断
+        removed = max(0, min(chars_removed, self._length - position))
+        end = min(position + chars_added, plain_length)
+        added = ''
+        if end > position:
+            cursor = QTextCursor(self.document)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            added = cursor.selectedText().translate(_PLAIN_TEXT_TABLE)
+
+        if self._length - removed + len(added) != plain_length:
+            # 增量与文档长度不一致（极少见，如富文本粘贴），记录一次全量替换
+            logging.debug(f'DocumentChangeTracker增量不一致，记录全量内容: position={position}, '
+                          f'removed={chars_removed}, added={chars_added}')
+            removed = self._length
+            position = 0
+            added = self.document.toPlainText()
+
+        if removed == 0 and not added:
+            return
+        self._deltas.append((position, removed, added))
+        self._length = self._length - removed + len(added)
+        self._version += 1
+        self.version_changed.emit(self._version)
+
+    def content_at(self, version):
+        """获取指定版本的内容
+        Args:
+            version: 内容版本号
+        Returns:
+            str: 该版本的文本；版本早于当前跟踪起点时返回None
+        """
+        with self._lock:
+            return self._content_at(version)
+
+    def _content_at(self, version):
+        if version < self._base_version:
+            logging.warning(f'内容版本 {version} 早于跟踪起点 {self._base_version}')
+            return None
+        version = min(version, self._base_version + len(self._deltas))
+
+        if self._cursor_version <= version:
+            start_version, text = self._cursor_version, self._cursor_text
+        else:
+            # 回退到不晚于目标版本的最近检查点
+            start_version = self._base_version + (version - self._base_version) // self.checkpoint_interval * self.checkpoint_interval
+            while start_version not in self._checkpoints:
+                start_version -= self.checkpoint_interval
+            text = self._checkpoints[start_version]
+
+        for v in range(start_version, version):
+            position, removed, added = self._deltas[v - self._base_version]
+            text = text[:position] + added + text[position + removed:]
+            if (v + 1 - self._base_version) % self.checkpoint_interval == 0:
+                self._checkpoints[v + 1] = text
+
+        self._cursor_version = version
+        self._cursor_text = text
+        return text
+
+    def current_content(self):
+        """获取当前内容"""
+        return self.content_at(self._version)
@@ -12,6 +12,15 @@ try:
 except ImportError:
     HAS_PYNPUT = False
 
+def _attach_input_content(controller, raw_keystroke):
+    """为原始按键记录附加输入框内容（优先使用内容版本号，避免复制全文）"""
+    version = controller.data_model.current_content_version()
+    if version is not None:
+        raw_keystroke['content_version'] = version
+    else:
+        raw_keystroke['input_content'] = controller.main_view.get_input_content()
+
+
 class KeyboardListenerQt(QObject):
     """基于PyQt事件的底层键盘监听器"""
     
@@ -75,9 +84,6 @@ class KeyboardListenerQt(QObject):
             
         modifier_str = '+'.join(modifier_list) if modifier_list else ''
         
-        # 获取输入框内容
-        input_content = self.controller.main_view.get_input_content()
-        
         # 创建原始按键记录 - 统一字段名
         raw_keystroke = {
             'type': event_type,
@@ -86,8 +92,9 @@ class KeyboardListenerQt(QObject):
             'modifiers': modifier_str,
             'timestamp': current_time,
             'absolute_timestamp': current_time,
-            'input_content': input_content
         }
+        # 输入框内容只引用版本号，保存时再解析
+        _attach_input_content(self.controller, raw_keystroke)
         
         # 如果有录制开始时间，计算相对时间
         if self.controller.data_model.recording_start_time is not None:
@@ -181,8 +188,8 @@ class KeyboardListenerPynput:
             'modifiers': '+'.join(modifiers),
             'timestamp': current_time,
             'absolute_timestamp': current_time,
-            'input_content': self.controller.main_view.get_input_content()
         }
+        _attach_input_content(self.controller, raw_keystroke)
         if self.controller.data_model.recording_start_time is not None:
             raw_keystroke['timestamp'] = current_time - self.controller.data_model.recording_start_time
         self.raw_keystrokes.append(raw_keystroke)
@@ -241,7 +248,7 @@ class KeyboardListenerPynputProcess:
                     keystroke['key_text'] = keystroke.pop('text')
                 
                 # 添加输入框内容
-                keystroke['input_content'] = self.controller.main_view.get_input_content()
+                _attach_input_content(self.controller, keystroke)
                 
                 self.controller.add_raw_keystroke(keystroke)
         except Exception as e:
@@ -0,0 +1,232 @@
+import atexit
+import logging
+import weakref
+import threading
+from collections import OrderedDict
+
+import cv2
+
+from .frame_index import FrameSeeker
+
+# 每个视频解码帧缓存的默认上限（字节）
+DEFAULT_CACHE_BYTES = 192 * 1024 * 1024
+
+# 运行中的预取线程，退出时统一停止（解码中的线程在解释器退出时被强行结束会导致崩溃）
+_active_prefetchers = weakref.WeakSet()
+
+
+@atexit.register
+def _stop_prefetchers():
+    for prefetcher in list(_active_prefetchers):
+        prefetcher.stop()
+
+
+class FrameCache:
+    """已解码帧的LRU缓存（按字节数限制）
+
+    缓存的是已缩放到显示尺寸的QImage，命中时不需要解码和转换。显示尺寸改变后旧尺寸的帧
+    全部作废；尺寸与当前不符的帧不会被放入缓存。可被播放线程、预取线程和界面线程同时访问。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = None  # 缓存帧的显示尺寸
+        self._frames = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __contains__(self, frame):
+        return frame in self._frames
+
+    @property
+    def bytes_used(self):
+        return self._bytes
+
+    def set_size(self, size):
+        """设置显示尺寸，尺寸变化时清空缓存"""
+        with self._lock:
+            if size != self.size:
+                self.size = size
+                self._clear_locked()
+
+    def set_max_bytes(self, max_bytes):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict_locked()
+
+    def get(self, frame):
+        """取缓存的帧，未命中时返回None"""
+        with self._lock:
+            image = self._frames.get(frame)
+            if image is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(frame)
+            self.hits += 1
+            return image
+
+    def put(self, frame, image, size):
+        """放入一帧；size为转换时使用的显示尺寸，与当前尺寸不符时丢弃"""
+        with self._lock:
+            if size != self.size or image is None:
+                return
+            previous = self._frames.pop(frame, None)
+            if previous is not None:
+                self._bytes -= previous.sizeInBytes()
+            self._frames[frame] = image
+            self._bytes += image.sizeInBytes()
+            self._evict_locked()
+
+    def frame_capacity(self, frame_bytes):
+        """按单帧大小估算能容纳的帧数"""
+        return self.max_bytes // max(frame_bytes, 1)
+
+    def clear(self):
+        with self._lock:
+            self._clear_locked()
+
+    def _clear_locked(self):
+        self._frames.clear()
+        self._bytes = 0
+
+    def _evict_locked(self):
+        while self._bytes > self.max_bytes and self._frames:
+            _, image = self._frames.popitem(last=False)
+            self._bytes -= image.sizeInBytes()
+
+
+class FramePrefetcher:
+    """按播放或拖动方向在后台解码帧放入缓存
+
+    使用独立的VideoCapture，不与播放线程争用解码器。正向时解码播放头之后的一段；
+    反向时从播放头之前最近的关键帧开始逐个GOP向前解码（每个GOP只需从关键帧解码一次）；
+    方向为0（拖动停顿）时两侧都填充。新的请求会中断正在进行的填充。
+    后台线程为守护线程，在第一次请求时启动。
+    """
+
+    # 单侧最多预取的帧数
+    WINDOW = 90
+
+    def __init__(self, video_path, frame_index, cache):
+        self.video_path = video_path
+        self.frame_index = frame_index
+        self.cache = cache
+        self._condition = threading.Condition()
+        self._request = None  # 待处理的请求 (中心帧, 方向)
+        self._active = None  # 最近一次接受的请求
+        self._generation = 0
+        self._running = False
+        self._thread = None
+        self._buffer = None
+        self.decoded_frames = 0
+
+    def request(self, frame, direction):
+        """请求围绕frame按方向预取（direction: 1正向, -1反向, 0两侧）"""
+        with self._condition:
+            if self._covers(frame, direction):
+                return
+            self._request = (frame, direction)
+            self._active = (frame, direction)
+            self._generation += 1
+            self._condition.notify()
+            if self._thread is None:
+                self._running = True
+                self._thread = threading.Thread(target=self._run, name='FramePrefetcher', daemon=True)
+                self._thread.start()
+                _active_prefetchers.add(self)
+
+    def _covers(self, frame, direction):
+        """同方向、播放头只移动了一小段时沿用正在进行的预取，不打断"""
+        if self._active is None or self._active[1] != direction:
+            return False
+        moved = (frame - self._active[0]) * (direction or 1)
+        return 0 <= moved < (self._window() // 3 if direction else 1)
+
+    def cancel(self):
+        """放弃正在进行和尚未开始的预取（拖动中途的位置没有预取价值）"""
+        with self._condition:
+            self._request = None
+            self._active = None
+            self._generation += 1
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._generation += 1
+            self._condition.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        from .video_player_service import frame_to_image
+        cap = cv2.VideoCapture(self.video_path)
+        if not cap.isOpened():
+            logging.warning(f'预取线程无法打开视频: {self.video_path}')
+            return
+        seeker = FrameSeeker(cap, self.frame_index)
+        try:
+            while True:
+                with self._condition:
+                    while self._running and self._request is None:
+                        self._condition.wait()
+                    if not self._running:
+                        break
+                    (center, direction), generation = self._request, self._generation
+                    self._request = None
+                for start, end in self._ranges(center, direction):
+                    if not self._fill(seeker, start, end, generation, frame_to_image):
+                        break
+        finally:
+            cap.release()
+
+    def _window(self):
+        size = self.cache.size
+        if not size:
+            return self.WINDOW
+        # 两侧合计不超过缓存容量的一半，给播放头附近已缓存的帧留出空间
+        return max(1, min(self.WINDOW, self.cache.frame_capacity(size[0] * size[1] * 4) // 4))
+
+    def _ranges(self, center, direction):
+        """按优先级排列的解码区间 [start, end)"""
+        window = self._window()
+        total = self.frame_index.frame_count
+        ranges = []
+        if direction >= 0:
+            ranges.append((center, min(center + window, total)))
+        if direction <= 0:
+            # 从近到远逐个GOP
+            limit = max(center - window, 0)
+            end = center
+            while end > limit:
+                start = max(self.frame_index.keyframe_before(end - 1), limit)
+                ranges.append((start, end))
+                end = start
+        return ranges
+
+    def _fill(self, seeker, start, end, generation, frame_to_image):
+        """顺序解码[start, end)中未缓存的帧；被新请求打断时返回False"""
+        missing = [frame for frame in range(start, end) if frame not in self.cache]
+        if not missing:
+            return True
+        seeker.seek(missing[0])
+        for frame in range(missing[0], end):
+            if self._generation != generation:
+                return False
+            if frame in self.cache:
+                if not seeker.skip():
+                    return True
+                continue
+            ret, image = seeker.read()
+            if not ret:
+                return True
+            size = self.cache.size
+            image, self._buffer = frame_to_image(image, size, self._buffer)
+            self.cache.put(frame, image, size)
+            self.decoded_frames += 1
+        return True
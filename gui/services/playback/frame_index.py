@@ -0,0 +1,325 @@
+import os
+import struct
+import logging
+
+import numpy as np
+
+# 回放用缓存（帧索引、缩略图等）放在视频所在目录下的隐藏目录中
+CACHE_DIRNAME = '.playback_cache'
+FRAME_INDEX_SUFFIX = '.frames.npz'
+_INDEX_VERSION = 1
+
+
+def cache_path(video_path, suffix):
+    """某个视频的缓存文件路径（与视频同目录的.playback_cache下）"""
+    directory, name = os.path.split(os.path.abspath(video_path))
+    return os.path.join(directory, CACHE_DIRNAME, name + suffix)
+
+
+def video_signature(video_path):
+    """视频文件的 (大小, 修改时间ns)，用于判断缓存是否失效"""
+    stat_result = os.stat(video_path)
+    return stat_result.st_size, stat_result.st_mtime_ns
+
+
+def _iter_boxes(f, start, end):
+    """遍历[start, end)范围内的box，产出 (类型, 数据起点, 数据终点)"""
+    position = start
+    while position + 8 <= end:
+        f.seek(position)
+        size, box_type = struct.unpack('>I4s', f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack('>Q', f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - position
+        if size < header:
+            return
+        yield box_type, position + header, min(position + size, end)
+        position += size
+
+
+def _find_boxes(f, start, end, path):
+    """按路径查找box，如 (b'moov', b'trak')"""
+    for box_type, data_start, data_end in _iter_boxes(f, start, end):
+        if box_type != path[0]:
+            continue
+        if len(path) == 1:
+            yield data_start, data_end
+        else:
+            yield from _find_boxes(f, data_start, data_end, path[1:])
+
+
+def _read_full_box(f, start, end):
+    """读取full box的 (version, 数据)"""
+    f.seek(start)
+    data = f.read(end - start)
+    return data[0], data[4:]
+
+
+def _parse_video_track(f, trak_start, trak_end):
+    """解析视频轨道，返回 (各帧显示时间ms（解码顺序）, 关键帧的解码序号) ；不是视频轨道时返回None"""
+    handler = next(_find_boxes(f, trak_start, trak_end, (b'mdia', b'hdlr')), None)
+    if handler is None:
+        return None
+    _, data = _read_full_box(f, *handler)
+    if data[4:8] != b'vide':
+        return None
+
+    version, data = _read_full_box(f, *next(_find_boxes(f, trak_start, trak_end, (b'mdia', b'mdhd'))))
+    timescale = struct.unpack('>I', data[16:20] if version == 1 else data[8:12])[0]
+
+    stbl = next(_find_boxes(f, trak_start, trak_end, (b'mdia', b'minf', b'stbl')))
+    boxes = {box_type: (start, end) for box_type, start, end in _iter_boxes(f, *stbl)}
+
+    # stts: 解码时间增量（游程编码）
+    _, data = _read_full_box(f, *boxes[b'stts'])
+    count = struct.unpack('>I', data[:4])[0]
+    runs = np.frombuffer(data[4:4 + 8 * count], dtype='>u4').reshape(-1, 2).astype(np.int64)
+    deltas = np.repeat(runs[:, 1], runs[:, 0])
+    timestamps = np.concatenate(([0], np.cumsum(deltas)[:-1])) if len(deltas) else deltas
+
+    # ctts: 显示时间相对解码时间的偏移（有B帧时存在）
+    if b'ctts' in boxes:
+        ctts_version, data = _read_full_box(f, *boxes[b'ctts'])
+        count = struct.unpack('>I', data[:4])[0]
+        offset_dtype = '>i4' if ctts_version == 1 else '>u4'
+        runs = np.frombuffer(data[4:4 + 8 * count], dtype='>u4').reshape(-1, 2)
+        offsets = np.repeat(runs[:, 1].astype(offset_dtype).astype(np.int64), runs[:, 0].astype(np.int64))
+        timestamps = timestamps + offsets[:len(timestamps)]
+
+    # stss: 关键帧（从1开始的序号）；没有stss时每一帧都是关键帧
+    if b'stss' in boxes:
+        _, data = _read_full_box(f, *boxes[b'stss'])
+        count = struct.unpack('>I', data[:4])[0]
+        keyframes = np.frombuffer(data[4:4 + 4 * count], dtype='>u4').astype(np.int64) - 1
+    else:
+        keyframes = np.arange(len(timestamps), dtype=np.int64)
+    return timestamps * 1000.0 / timescale, keyframes
+
+
+def parse_mp4_frames(video_path):
+    """从MP4的moov中读取视频轨道的帧时间和关键帧，不解码
+
+    Returns:
+        (各帧显示时间ms, 关键帧帧号)，均按显示顺序（即CAP_PROP_POS_FRAMES的帧号）；
+        不是MP4或没有视频轨道时返回None
+    """
+    with open(video_path, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        for trak in _find_boxes(f, 0, file_size, (b'moov', b'trak')):
+            parsed = _parse_video_track(f, *trak)
+            if parsed is None:
+                continue
+            timestamps, keyframes = parsed
+            # 解码顺序 -> 显示顺序
+            order = np.argsort(timestamps, kind='stable')
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            keyframes = np.sort(rank[keyframes[keyframes < len(rank)]])
+            timestamps = timestamps[order]
+            if len(timestamps):
+                timestamps = timestamps - timestamps[0]
+            return timestamps, keyframes
+    return None
+
+
+def scan_frames(video_path):
+    """逐帧grab读取帧时间（不支持解析的格式使用）；关键帧未知，只记录第0帧
+
+    Returns:
+        (各帧显示时间ms, 关键帧帧号)
+    """
+    import cv2
+    cap = cv2.VideoCapture(video_path)
+    timestamps = []
+    try:
+        while cap.grab():
+            timestamps.append(cap.get(cv2.CAP_PROP_POS_MSEC))
+    finally:
+        cap.release()
+    return np.asarray(timestamps, dtype=np.float64), np.zeros(1 if timestamps else 0, dtype=np.int64)
+
+
+class FrameIndex:
+    """视频的帧索引：各帧显示时间和关键帧位置
+
+    每个视频只构建一次，缓存在.playback_cache下并以文件大小和修改时间判断是否失效。
+    MP4直接解析moov中的stts/ctts/stss（不解码）；其他格式逐帧grab得到帧时间，
+    关键帧未知（keyframes_known为False），定位时退回到后端自身的跳转。
+    """
+
+    def __init__(self, timestamps_ms, keyframes, keyframes_known=True):
+        self.timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+        self.keyframes = np.asarray(keyframes, dtype=np.int64)
+        self.keyframes_known = keyframes_known
+
+    @property
+    def frame_count(self):
+        return len(self.timestamps_ms)
+
+    def timestamp_ms(self, frame):
+        """帧的显示时间（毫秒）"""
+        return float(self.timestamps_ms[frame])
+
+    def keyframe_before(self, frame):
+        """不晚于frame的最近关键帧"""
+        i = int(np.searchsorted(self.keyframes, frame, side='right')) - 1
+        return int(self.keyframes[i]) if i >= 0 else 0
+
+    def frame_at(self, time_ms):
+        """time_ms时刻正在显示的帧"""
+        i = int(np.searchsorted(self.timestamps_ms, time_ms, side='right')) - 1
+        return min(max(i, 0), max(self.frame_count - 1, 0))
+
+    @classmethod
+    def build(cls, video_path, allow_scan=True):
+        """解析MP4构建索引，不支持解析时逐帧扫描（allow_scan为False时返回None）"""
+        try:
+            parsed = parse_mp4_frames(video_path)
+        except Exception as e:
+            logging.warning(f'解析MP4帧信息失败 {video_path}: {e}')
+            parsed = None
+        if parsed is not None:
+            return cls(*parsed)
+        if not allow_scan:
+            return None
+        return cls(*scan_frames(video_path), keyframes_known=False)
+
+    def save(self, path, signature):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, version=_INDEX_VERSION, signature=np.asarray(signature, dtype=np.int64),
+                     timestamps_ms=self.timestamps_ms, keyframes=self.keyframes,
+                     keyframes_known=self.keyframes_known)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, signature):
+        """读取缓存的索引；缓存不存在或已失效时返回None"""
+        try:
+            with np.load(path) as data:
+                if int(data['version']) != _INDEX_VERSION or tuple(data['signature']) != tuple(signature):
+                    return None
+                return cls(data['timestamps_ms'], data['keyframes'], bool(data['keyframes_known']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    @classmethod
+    def uniform(cls, frame_count, fps):
+        """按固定帧率推算的索引（关键帧未知）"""
+        return cls(np.arange(frame_count) * 1000.0 / (fps or 30.0), np.zeros(1, dtype=np.int64),
+                   keyframes_known=False)
+
+    @classmethod
+    def for_video(cls, video_path, use_cache=True, allow_scan=True):
+        """获取视频的帧索引（优先读取缓存，失效时重建并写入缓存）
+
+        Args:
+            allow_scan: 无法解析时是否逐帧扫描；为False时返回None
+        """
+        signature = video_signature(video_path)
+        path = cache_path(video_path, FRAME_INDEX_SUFFIX)
+        if use_cache:
+            index = cls.load(path, signature)
+            if index is not None:
+                return index
+        index = cls.build(video_path, allow_scan)
+        if index is None:
+            return None
+        if use_cache:
+            try:
+                index.save(path, signature)
+            except OSError as e:
+                logging.warning(f'保存帧索引失败 {path}: {e}')
+        return index
+
+
+class FrameSeeker:
+    """按帧索引在VideoCapture上精确定位
+
+    跳转时先定位到目标之前最近的关键帧，再向前grab到目标帧；目标就在当前位置之后
+    不远处时直接向前grab，不重新定位。读到的帧用CAP_PROP_POS_MSEC与索引中的时间核对，
+    不一致时从更早的关键帧重新定位。
+    """
+
+    # 允许的时间误差（帧间隔的比例）
+    TOLERANCE = 0.5
+
+    def __init__(self, cap, index):
+        import cv2
+        self._cv2 = cv2
+        self.cap = cap
+        self.index = index
+        self.position = 0  # 下一次read得到的帧号
+        self.mismatches = 0  # 校验失败的次数
+
+    def _frame_interval(self, frame):
+        timestamps = self.index.timestamps_ms
+        if len(timestamps) < 2:
+            return 1000.0 / 30
+        frame = min(max(frame, 1), len(timestamps) - 1)
+        return float(timestamps[frame] - timestamps[frame - 1]) or 1000.0 / 30
+
+    def _set(self, frame):
+        self.cap.set(self._cv2.CAP_PROP_POS_FRAMES, frame)
+        self.position = frame
+
+    def seek(self, frame):
+        """定位到frame，之后read()返回该帧"""
+        frame = min(max(int(frame), 0), max(self.index.frame_count - 1, 0))
+        if not self.index.keyframes_known:
+            self._set(frame)
+            return
+        keyframe = self.index.keyframe_before(frame)
+        if not (self.position <= frame and frame - self.position <= frame - keyframe):
+            self._set(keyframe)
+        while self.position < frame:
+            if not self.cap.grab():
+                break
+            self.position += 1
+
+    def skip(self):
+        """跳过一帧（只grab不解码输出）"""
+        ok = self.cap.grab()
+        if ok:
+            self.position += 1
+        return ok
+
+    def read(self):
+        """读取当前位置的帧并与索引核对
+
+        Returns:
+            (成功与否, 帧)
+        """
+        frame_number = self.position
+        ret, frame = self.cap.read()
+        if not ret:
+            return False, None
+        self.position += 1
+        if self.index.keyframes_known and frame_number < self.index.frame_count \
+                and not self._verify(frame_number):
+            self.mismatches += 1
+            logging.debug(f'帧定位与索引不一致，从更早的关键帧重新定位: 帧{frame_number}')
+            ret, frame = self._reseek_and_read(frame_number)
+        return ret, frame
+
+    def _verify(self, frame_number):
+        actual = self.cap.get(self._cv2.CAP_PROP_POS_MSEC)
+        expected = self.index.timestamp_ms(frame_number)
+        return abs(actual - expected) <= self._frame_interval(frame_number) * self.TOLERANCE
+
+    def _reseek_and_read(self, frame_number):
+        # 后端定位到关键帧不准确时，从再早一个关键帧（最差从头）解码
+        keyframe = self.index.keyframe_before(frame_number)
+        earlier = self.index.keyframe_before(keyframe - 1) if keyframe > 0 else 0
+        self._set(earlier)
+        while self.position < frame_number:
+            if not self.skip():
+                return False, None
+        ret, frame = self.cap.read()
+        if ret:
+            self.position += 1
+        return ret, frame
@@ -0,0 +1,194 @@
+import logging
+from bisect import bisect_right
+from collections import Counter
+
+from PyQt5.QtCore import Qt
+
+# 只有按下没有释放记录的按键（旧记录或丢失了RELEASE）视为按下的时长（秒）
+TAP_DURATION = 0.15
+# 同一按键两次PRESS之间不超过该间隔（秒）且中间没有RELEASE时视为按住不放的自动重复
+REPEAT_GAP = 0.6
+
+# Qt按键码到虚拟键盘按键名
+_QT_KEY_NAMES = {
+    Qt.Key_Escape: 'ESC',
+    Qt.Key_Tab: 'TAB',
+    Qt.Key_Backtab: 'TAB',
+    Qt.Key_Backspace: 'BACKSPACE',
+    Qt.Key_Return: 'ENTER',
+    Qt.Key_Enter: 'ENTER',
+    Qt.Key_Space: 'SPACE',
+    Qt.Key_Shift: 'SHIFT',
+    Qt.Key_Control: 'CTRL',
+    Qt.Key_Alt: 'ALT',
+    Qt.Key_AltGr: 'ALT',
+    Qt.Key_Meta: 'WIN',
+    Qt.Key_CapsLock: 'CAPS',
+    Qt.Key_Menu: 'MENU',
+}
+
+# pynput特殊键（str(key)）到按键名
+_PYNPUT_KEY_NAMES = {
+    'Key.esc': 'ESC',
+    'Key.tab': 'TAB',
+    'Key.backspace': 'BACKSPACE',
+    'Key.enter': 'ENTER',
+    'Key.space': 'SPACE',
+    'Key.shift': 'SHIFT',
+    'Key.shift_l': 'SHIFT',
+    'Key.shift_r': 'SHIFT',
+    'Key.ctrl': 'CTRL',
+    'Key.ctrl_l': 'CTRL',
+    'Key.ctrl_r': 'CTRL',
+    'Key.alt': 'ALT',
+    'Key.alt_l': 'ALT',
+    'Key.alt_r': 'ALT',
+    'Key.alt_gr': 'ALT',
+    'Key.cmd': 'WIN',
+    'Key.cmd_l': 'WIN',
+    'Key.cmd_r': 'WIN',
+    'Key.caps_lock': 'CAPS',
+    'Key.menu': 'MENU',
+}
+
+# 修饰键字段中的名称
+_MODIFIER_NAMES = {'SHIFT': 'SHIFT', 'CTRL': 'CTRL', 'ALT': 'ALT', 'META': 'WIN'}
+
+
+def key_name(keystroke):
+    """原始按键记录对应的按键名（与虚拟键盘的按键名一致，大写）
+
+    兼容Qt监听（key_code为Qt按键码）、pynput监听（key_text为'Key.xxx'）和旧字段名key/text。
+    """
+    code = keystroke.get('key_code', keystroke.get('key'))
+    text = keystroke.get('key_text', keystroke.get('text')) or ''
+    if isinstance(code, int) and code in _QT_KEY_NAMES:
+        return _QT_KEY_NAMES[code]
+    if text in _PYNPUT_KEY_NAMES:
+        return _PYNPUT_KEY_NAMES[text]
+    if isinstance(code, int) and (0x41 <= code <= 0x5a or 0x30 <= code <= 0x39):
+        # 字母和数字（Qt按键码与ASCII一致，不受Shift影响）
+        return chr(code)
+    if text.strip():
+        return text.upper()
+    if code is not None:
+        return f'KEY_{code}'
+    return None
+
+
+def modifier_names(keystroke):
+    """按键记录中同时按住的修饰键"""
+    modifiers = keystroke.get('modifiers') or ''
+    return [_MODIFIER_NAMES[m] for m in modifiers.upper().split('+') if m in _MODIFIER_NAMES]
+
+
+class KeystrokeTimeline:
+    """回放用的按键时间线
+
+    把PRESS/RELEASE配对成按住区间（自动重复的PRESS并入同一区间，没有RELEASE的按键按
+    TAP_DURATION计），按键记录中的修饰键作为组合键一并计入。然后把所有区间的起止时间排序，
+    预先算出每一段时间内按住的按键集合；查询某一时刻按住的按键只需一次二分查找，
+    与记录中的按键数量无关。
+    """
+
+    def __init__(self, intervals, press_counts=None):
+        # [(开始, 结束, 按键名)]，按开始时间排序
+        self.intervals = sorted(intervals)
+        # 各键的按下次数（自动重复和组合键中附带的修饰键不计）
+        self.press_counts = Counter(press_counts) if press_counts is not None \
+            else Counter(name for _, _, name in self.intervals)
+        self.boundaries = []  # 各段的起始时间
+        self.segments = []  # 各段内按住的按键集合
+        self._build_segments()
+
+    @classmethod
+    def from_keystrokes(cls, raw_keystrokes, legacy_keystrokes=None):
+        """由原始按键记录构建；没有原始记录时使用输入框按键记录（只有按下）"""
+        intervals = []
+        press_counts = None
+        if raw_keystrokes:
+            intervals, press_counts = cls._pair_events(raw_keystrokes)
+        elif legacy_keystrokes:
+            for k in legacy_keystrokes:
+                name = key_name(k)
+                if name and k.get('timestamp') is not None:
+                    intervals.append((k['timestamp'], k['timestamp'] + TAP_DURATION, name))
+        return cls(intervals, press_counts)
+
+    @classmethod
+    def from_record(cls, record):
+        return cls.from_keystrokes(record.get('raw_keystrokes') or [], record.get('keystrokes') or [])
+
+    @staticmethod
+    def _pair_events(raw_keystrokes):
+        intervals = []
+        press_counts = Counter()
+        held = {}  # 按键名 -> [按下时间, 组合的修饰键, 最近一次PRESS的时间]
+        events = sorted((k for k in raw_keystrokes if k.get('timestamp') is not None),
+                        key=lambda k: k['timestamp'])
+
+        def close(name, end):
+            start, modifiers, _ = held.pop(name)
+            end = max(end, start)
+            intervals.append((start, end, name))
+            for modifier in modifiers:
+                if modifier != name:
+                    intervals.append((start, end, modifier))
+
+        for k in events:
+            name = key_name(k)
+            if not name:
+                continue
+            t = k['timestamp']
+            if (k.get('type') or 'PRESS').upper() == 'RELEASE':
+                if name in held:
+                    close(name, t)
+                continue
+            if name in held:
+                last_press = held[name][2]
+                if t - last_press <= REPEAT_GAP:
+                    # 按住不放时的自动重复
+                    held[name][2] = t
+                    continue
+                # 上一次按下没有释放记录
+                close(name, last_press + TAP_DURATION)
+            held[name] = [t, modifier_names(k), t]
+            press_counts[name] += 1
+        for name in list(held):
+            close(name, held[name][2] + TAP_DURATION)
+        return intervals, press_counts
+
+    def _build_segments(self):
+        # 扫描所有起止点，维护当前按住的按键计数
+        points = []
+        for start, end, name in self.intervals:
+            if end > start:
+                points.append((start, 1, name))
+                points.append((end, -1, name))
+        points.sort(key=lambda p: (p[0], p[1]))
+        counts = {}
+        i = 0
+        while i < len(points):
+            t = points[i][0]
+            while i < len(points) and points[i][0] == t:
+                _, delta, name = points[i]
+                counts[name] = counts.get(name, 0) + delta
+                if counts[name] == 0:
+                    del counts[name]
+                i += 1
+            keys = frozenset(counts)
+            if self.segments and self.segments[-1] == keys:
+                continue
+            self.boundaries.append(t)
+            self.segments.append(keys)
+        logging.debug(f'按键时间线: {len(self.intervals)}个区间, {len(self.segments)}段')
+
+    def __len__(self):
+        return len(self.intervals)
+
+    def held_keys(self, t):
+        """t时刻（秒，相对录制开始）按住的按键集合"""
+        i = bisect_right(self.boundaries, t) - 1
+        if i < 0:
+            return frozenset()
+        return self.segments[i]
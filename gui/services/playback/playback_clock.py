@@ -0,0 +1,65 @@
+import time
+import threading
+
+
+class PlaybackClock:
+    """回放主时钟
+
+    以单调时钟推算当前的媒体时间（秒），可暂停、跳转和变速。
+    屏幕和摄像头两个播放线程共享同一个时钟，各自显示时间戳与时钟一致的帧，
+    因此两路视频不会相互漂移，解码慢时丢帧追赶而不是整体变慢。
+    """
+
+    def __init__(self, speed=1.0):
+        self._lock = threading.Lock()
+        self._speed = speed
+        self._running = False
+        self._anchor_media = 0.0  # 最近一次锚定时的媒体时间
+        self._anchor_wall = time.monotonic()  # 锚定时的墙上时间
+
+    def _now_locked(self):
+        if not self._running:
+            return self._anchor_media
+        return self._anchor_media + (time.monotonic() - self._anchor_wall) * self._speed
+
+    def _anchor(self, media_time):
+        self._anchor_media = max(0.0, media_time)
+        self._anchor_wall = time.monotonic()
+
+    def position(self):
+        """当前媒体时间（秒）"""
+        with self._lock:
+            return self._now_locked()
+
+    def start(self):
+        """开始或继续走时"""
+        with self._lock:
+            if not self._running:
+                self._anchor(self._anchor_media)
+                self._running = True
+
+    def pause(self):
+        """暂停走时"""
+        with self._lock:
+            if self._running:
+                self._anchor(self._now_locked())
+                self._running = False
+
+    def seek(self, media_time):
+        """跳转到指定媒体时间（秒），不改变走时状态"""
+        with self._lock:
+            self._anchor(media_time)
+
+    @property
+    def speed(self):
+        return self._speed
+
+    def set_speed(self, speed):
+        """设置播放速度，从当前时间开始按新速度走时"""
+        with self._lock:
+            self._anchor(self._now_locked())
+            self._speed = speed
+
+    @property
+    def is_running(self):
+        return self._running
@@ -0,0 +1,255 @@
+import os
+import json
+import logging
+import threading
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from .frame_index import cache_path, video_signature
+
+# 低分辨率帧的宽度（像素）和每秒保存的帧数
+SCRUB_STORE_WIDTH = 320
+SCRUB_STORE_FPS = 10
+# 缓存目录中低分辨率帧文件的总大小上限（字节）
+DEFAULT_SCRUB_STORE_BYTES = 4 * 1024 * 1024 * 1024
+FRAMES_SUFFIX = '.npy'
+INDEX_SUFFIX = '.npz'
+META_SUFFIX = '.json'
+_STORE_VERSION = 1
+
+
+def scrub_store_paths(video_path, width=SCRUB_STORE_WIDTH):
+    """低分辨率帧数组、帧号/时间戳数组和元数据的缓存路径"""
+    stem = cache_path(video_path, f'.scrub-{width}')
+    return stem + FRAMES_SUFFIX, stem + INDEX_SUFFIX, stem + META_SUFFIX
+
+
+def select_frames(timestamps_ms, max_fps=SCRUB_STORE_FPS):
+    """每1/max_fps秒取第一帧，返回要保存的帧号数组"""
+    if not len(timestamps_ms):
+        return np.zeros(0, dtype=np.int64)
+    slots = np.floor(np.asarray(timestamps_ms) * max_fps / 1000.0).astype(np.int64)
+    keep = np.concatenate(([True], slots[1:] != slots[:-1]))
+    return np.flatnonzero(keep)
+
+
+class ScrubStore:
+    """内存映射的低分辨率帧
+
+    每个视频顺序解码一遍，按SCRUB_STORE_FPS取帧缩小到SCRUB_STORE_WIDTH宽，写成uint8的.npy数组，
+    旁边保存各帧对应的原视频帧号和时间戳。读取时用np.load(mmap_mode='r')映射，任意帧都是
+    一次内存访问，不经过解码器，用于拖动预览和倒放。元数据最后写入，存在即表示数组完整；
+    视频被改写后失效。
+    """
+
+    def __init__(self, frames, source_frames, timestamps_ms):
+        self.frames = frames  # (n, 高, 宽, 3) BGR
+        self.source_frames = np.asarray(source_frames, dtype=np.int64)
+        self.timestamps_ms = np.asarray(timestamps_ms, dtype=np.float64)
+
+    @classmethod
+    def open(cls, video_path, width=SCRUB_STORE_WIDTH):
+        """映射已生成的低分辨率帧，不存在或已失效时返回None"""
+        frames_path, index_path, meta_path = scrub_store_paths(video_path, width)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != _STORE_VERSION \
+                    or tuple(meta['signature']) != tuple(video_signature(video_path)):
+                return None
+            frames = np.load(frames_path, mmap_mode='r')
+            with np.load(index_path) as index:
+                source_frames = index['source_frames']
+                timestamps_ms = index['timestamps_ms']
+        except (OSError, ValueError, KeyError):
+            return None
+        count = meta['frame_count']
+        if frames.shape[0] < count or len(source_frames) < count:
+            return None
+        # 更新访问时间，供淘汰时判断最近使用
+        try:
+            os.utime(meta_path)
+        except OSError:
+            pass
+        return cls(frames[:count], source_frames[:count], timestamps_ms[:count])
+
+    def __len__(self):
+        return len(self.source_frames)
+
+    @property
+    def frame_size(self):
+        """(宽, 高)"""
+        return self.frames.shape[2], self.frames.shape[1]
+
+    def slot_for_frame(self, frame_position):
+        """不晚于原视频第frame_position帧的最近一个保存帧的下标"""
+        i = int(np.searchsorted(self.source_frames, frame_position, side='right')) - 1
+        return min(max(i, 0), len(self.source_frames) - 1)
+
+    def frame(self, frame_position):
+        """原视频第frame_position帧附近的低分辨率BGR帧（映射内存的视图，不复制）"""
+        if not len(self):
+            return None
+        return self.frames[self.slot_for_frame(frame_position)]
+
+    def image(self, frame_position, target_size=None, buffer=None):
+        """低分辨率帧缩放到显示区域后的QImage
+
+        Returns:
+            (QImage, 缩放缓冲区)，没有帧时QImage为None
+        """
+        from .video_player_service import frame_to_image
+        frame = self.frame(frame_position)
+        if frame is None:
+            return None, buffer
+        return frame_to_image(np.ascontiguousarray(frame), target_size, buffer)
+
+
+def build_scrub_store(video_path, frame_index, width=SCRUB_STORE_WIDTH, max_fps=SCRUB_STORE_FPS,
+                      cancelled=None, progress=None, max_bytes=DEFAULT_SCRUB_STORE_BYTES):
+    """顺序解码一遍视频生成低分辨率帧，返回ScrubStore；取消或失败时返回None
+
+    不保存的帧只grab不解码。数组先写到临时文件，完整后再改名，最后写元数据。
+
+    Args:
+        cancelled: 可选的无参函数，返回True时停止
+        progress: 可选的函数 progress(已处理帧数, 总帧数)
+    """
+    frames_path, index_path, meta_path = scrub_store_paths(video_path, width)
+    selected = select_frames(frame_index.timestamps_ms, max_fps)
+    if not len(selected):
+        return None
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logging.warning(f'生成低分辨率帧时无法打开视频: {video_path}')
+        return None
+    tmp_tag = f'.{os.getpid()}-{threading.get_ident()}.tmp'
+    frames = None
+    count = 0
+    try:
+        os.makedirs(os.path.dirname(frames_path), exist_ok=True)
+        position = 0
+        for slot, frame_pos in enumerate(selected):
+            if cancelled and cancelled():
+                break
+            while position < frame_pos and cap.grab():
+                position += 1
+            ret, frame = cap.read()
+            if position != frame_pos or not ret:
+                break
+            position += 1
+            if frames is None:
+                h, w = frame.shape[:2]
+                height = max(int(round(h * width / w / 2)) * 2, 2)
+                frames = np.lib.format.open_memmap(frames_path + tmp_tag, mode='w+', dtype=np.uint8,
+                                                   shape=(len(selected), height, width, 3))
+            cv2.resize(frame, (width, frames.shape[1]), dst=frames[slot], interpolation=cv2.INTER_AREA)
+            count = slot + 1
+            if progress and count % 100 == 0:
+                progress(frame_pos, frame_index.frame_count)
+    except OSError as e:
+        logging.warning(f'生成低分辨率帧失败 {frames_path}: {e}')
+        count = 0
+    finally:
+        cap.release()
+
+    if frames is not None:
+        frames.flush()
+        del frames
+    if not count or (cancelled and cancelled()):
+        _remove(frames_path + tmp_tag)
+        return None
+    meta = {
+        'version': _STORE_VERSION,
+        'signature': list(video_signature(video_path)),
+        'width': width,
+        'max_fps': max_fps,
+        'frame_count': count,
+    }
+    try:
+        os.replace(frames_path + tmp_tag, frames_path)
+        # np.savez会给没有.npz后缀的文件名补后缀，临时文件名以.npz结尾
+        tmp_index_path = index_path + tmp_tag + INDEX_SUFFIX
+        np.savez(tmp_index_path, source_frames=selected[:count],
+                 timestamps_ms=frame_index.timestamps_ms[selected[:count]])
+        os.replace(tmp_index_path, index_path)
+        with open(meta_path + tmp_tag, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + tmp_tag, meta_path)
+    except OSError as e:
+        logging.warning(f'保存低分辨率帧失败 {frames_path}: {e}')
+        return None
+    if progress:
+        progress(frame_index.frame_count, frame_index.frame_count)
+    logging.debug(f'低分辨率帧: {video_path} {count}帧')
+    evict_scrub_stores(os.path.dirname(frames_path), max_bytes, keep=meta_path)
+    return ScrubStore.open(video_path, width)
+
+
+def evict_scrub_stores(cache_dir, max_bytes, keep=None):
+    """淘汰最久未使用的低分辨率帧，直到目录中这类文件的总大小不超过上限（keep不淘汰）"""
+    entries = []
+    total = 0
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+    for name in names:
+        if '.scrub-' not in name or not name.endswith(META_SUFFIX):
+            continue
+        meta_path = os.path.join(cache_dir, name)
+        stem = meta_path[:-len(META_SUFFIX)]
+        paths = (meta_path, stem + FRAMES_SUFFIX, stem + INDEX_SUFFIX)
+        try:
+            used = os.path.getmtime(meta_path)
+            size = sum(os.path.getsize(path) for path in paths)
+        except OSError:
+            continue
+        entries.append((used, size, meta_path, paths))
+        total += size
+    entries.sort()
+    for _, size, meta_path, paths in entries:
+        if total <= max_bytes:
+            break
+        if meta_path == keep:
+            continue
+        for path in paths:
+            _remove(path)
+        total -= size
+        logging.debug(f'淘汰低分辨率帧: {meta_path}')
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ScrubStoreWorker(QThread):
+    """在后台生成一个视频的低分辨率帧（可选，由用户触发）"""
+
+    progress = pyqtSignal(int, int)  # 已处理帧数, 总帧数
+    store_ready = pyqtSignal(object)  # ScrubStore，失败或取消时为None
+
+    def __init__(self, video_path, frame_index, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.frame_index = frame_index
+        self._cancelled = False
+
+    def cancel(self):
+        """取消生成并等待线程退出"""
+        self._cancelled = True
+        self.wait()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        store = build_scrub_store(self.video_path, self.frame_index,
+                                  cancelled=lambda: self._cancelled, progress=self.progress.emit)
+        self.store_ready.emit(store)
@@ -0,0 +1,118 @@
+import logging
+import threading
+
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from .frame_index import FrameSeeker
+
+
+class ScrubWorker(QThread):
+    """拖动时间轴时在后台解码画面
+
+    只保留最新的一个待处理目标，处理期间到达的中间位置直接丢弃。拖动过程中输出低分辨率预览：
+    目标帧已缓存时直接使用缓存，否则只解码目标之前最近的关键帧（定位后一次解码）；
+    拖动停下后请求完整画质（final），从关键帧解码到目标帧并放入帧缓存。
+    使用独立的VideoCapture，不占用播放线程的解码器。
+    """
+
+    # (图像, 帧号, 是否为完整画质)
+    frame_ready = pyqtSignal(QImage, int, bool)
+
+    # 预览相对显示尺寸的缩小倍数
+    PREVIEW_SCALE = 4
+    # 解码器就在目标之前不远时直接顺序解码到目标，而不是退回关键帧
+    SEQUENTIAL_LIMIT = 3
+
+    def __init__(self, video_path, frame_index, cache, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.frame_index = frame_index
+        self.cache = cache
+        self._condition = threading.Condition()
+        self._pending = None  # (帧号, 是否完整画质)
+        self._running = False
+        self._buffer = None
+        # 统计
+        self.requested = 0
+        self.processed = 0
+
+    def request(self, frame, final=False):
+        """请求显示frame（覆盖尚未处理的请求）"""
+        with self._condition:
+            self._pending = (frame, final)
+            self.requested += 1
+            self._condition.notify()
+            if not self._running:
+                # 上一次运行（如打不开视频）可能还在退出，等它结束后才能重新启动
+                self.wait()
+                self._running = True
+                self.start()
+
+    def discard_pending(self):
+        """丢弃尚未开始处理的请求"""
+        with self._condition:
+            self._pending = None
+
+    def stop(self):
+        with self._condition:
+            self._running = False
+            self._pending = None
+            self._condition.notify()
+        self.wait()
+
+    def run(self):
+        from .video_player_service import frame_to_image
+        cap = cv2.VideoCapture(self.video_path)
+        try:
+            if not cap.isOpened():
+                logging.warning(f'拖动预览无法打开视频: {self.video_path}')
+                return
+            seeker = FrameSeeker(cap, self.frame_index)
+            while True:
+                with self._condition:
+                    while self._running and self._pending is None:
+                        self._condition.wait()
+                    if not self._running:
+                        break
+                    (frame, final), self._pending = self._pending, None
+                image, full_quality = self._render(seeker, frame, final, frame_to_image)
+                self.processed += 1
+                if image is not None:
+                    self.frame_ready.emit(image, frame, full_quality)
+        finally:
+            cap.release()
+            # 无论因何退出都要复位，之后的请求才会重新启动线程
+            with self._condition:
+                self._running = False
+
+    def _render(self, seeker, frame, final, frame_to_image):
+        """返回 (图像, 是否完整画质)"""
+        cached = self.cache.get(frame)
+        if cached is not None:
+            return cached, True
+        size = self.cache.size
+        if final:
+            seeker.seek(frame)
+            ret, decoded = seeker.read()
+            if not ret:
+                return None, False
+            image, self._buffer = frame_to_image(decoded, size, self._buffer)
+            self.cache.put(frame, image, size)
+            return image, True
+
+        # 预览：顺序位置附近直接解码目标帧，否则只解码最近的关键帧
+        sequential = 0 <= frame - seeker.position <= self.SEQUENTIAL_LIMIT
+        if self.frame_index.keyframes_known and not sequential:
+            seeker.seek(self.frame_index.keyframe_before(frame))
+        else:
+            seeker.seek(frame)
+        ret, decoded = seeker.read()
+        if not ret:
+            return None, False
+        preview_size = None
+        if size is not None:
+            preview_size = (max(size[0] // self.PREVIEW_SCALE, 1), max(size[1] // self.PREVIEW_SCALE, 1))
+        image, _ = frame_to_image(decoded, preview_size)
+        return image, False
@@ -0,0 +1,93 @@
+import logging
+from bisect import bisect_right
+
+from ..text_diff import text_delta, apply_delta
+
+# 每隔多少个版本保存一份完整文本
+CHECKPOINT_INTERVAL = 64
+
+
+class TextReplay:
+    """由按键记录中的输入框内容快照重建任意时刻的答题框文本
+
+    相邻快照之间只保存一个增量 (位置, 删除长度, 插入文本)，每CHECKPOINT_INTERVAL个版本保存
+    一份完整文本。查询某一时刻时二分查找所在的版本，从最近的检查点重放增量；顺序播放时
+    从上一次查询的位置继续，每帧只需应用新增的增量。光标位置取该版本增量的插入末尾。
+    """
+
+    def __init__(self, snapshots, checkpoint_interval=CHECKPOINT_INTERVAL):
+        """
+        Args:
+            snapshots: [(时间, 文本)]，按时间排序
+        """
+        self.checkpoint_interval = checkpoint_interval
+        self.times = []  # 版本1..n的开始时间，版本0为空文本
+        self.carets = [0]  # 各版本的光标位置
+        self._deltas = []  # 第i个增量把版本i变为i+1
+        self._checkpoints = {0: ''}
+        # 是否都是基本多文种平面的字符（此时字符下标与QTextDocument中的位置一致）
+        self.bmp_only = True
+        text = ''
+        for t, new_text in snapshots:
+            if new_text == text:
+                continue
+            delta = text_delta(text, new_text)
+            self.times.append(t)
+            self._deltas.append(delta)
+            self.carets.append(delta[0] + len(delta[2]))
+            if self.bmp_only and delta[2] and max(delta[2]) > '\uffff':
+                self.bmp_only = False
+            text = new_text
+            if len(self._deltas) % checkpoint_interval == 0:
+                self._checkpoints[len(self._deltas)] = text
+        # 最近一次重放的位置
+        self._cursor_version = 0
+        self._cursor_text = ''
+        logging.debug(f'输入回放: {len(self._deltas)}个版本, {len(self._checkpoints)}个检查点')
+
+    @classmethod
+    def from_record(cls, record):
+        """由记录构建：优先使用输入框按键记录的内容快照（含输入法上屏），没有时用原始按键"""
+        for field in ('keystrokes', 'raw_keystrokes'):
+            events = [k for k in record.get(field) or []
+                      if k.get('timestamp') is not None and k.get('input_content') is not None]
+            if events:
+                events.sort(key=lambda k: k['timestamp'])
+                return cls([(k['timestamp'], k['input_content']) for k in events])
+        return cls([])
+
+    def __len__(self):
+        """版本数（不含初始的空文本）"""
+        return len(self._deltas)
+
+    @property
+    def duration(self):
+        """最后一次修改的时间（秒）"""
+        return self.times[-1] if self.times else 0.0
+
+    def version_at(self, t):
+        """t时刻（秒，相对录制开始）的内容版本"""
+        return bisect_right(self.times, t)
+
+    def delta(self, version):
+        """把版本version-1变为version的增量"""
+        return self._deltas[version - 1]
+
+    def text_at_version(self, version):
+        version = min(max(version, 0), len(self._deltas))
+        # 从不晚于目标版本的最近检查点或上一次重放的位置（取较近者）开始
+        start_version = version // self.checkpoint_interval * self.checkpoint_interval
+        if start_version <= self._cursor_version <= version:
+            start_version, text = self._cursor_version, self._cursor_text
+        else:
+            text = self._checkpoints[start_version]
+        for v in range(start_version, version):
+            text = apply_delta(text, self._deltas[v])
+        self._cursor_version = version
+        self._cursor_text = text
+        return text
+
+    def text_at(self, t):
+        """t时刻的 (文本, 光标位置)"""
+        version = self.version_at(t)
+        return self.text_at_version(version), self.carets[version]
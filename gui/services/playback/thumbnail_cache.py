@@ -0,0 +1,139 @@
+import os
+import json
+import logging
+import threading
+
+import cv2
+import numpy as np
+
+from .frame_index import cache_path, video_signature
+
+# 缓存目录中缩略图文件的总大小上限（字节）
+DEFAULT_THUMBNAIL_CACHE_BYTES = 256 * 1024 * 1024
+SPRITE_SUFFIX = '.jpg'
+SPRITE_INDEX_SUFFIX = '.json'
+_SPRITE_VERSION = 1
+# 拼图每行的缩略图数（避免超出图像的最大宽度）
+SPRITE_COLUMNS = 32
+
+
+def sprite_paths(video_path, interval, size):
+    """缩略图拼图及其索引的缓存路径，文件名包含缩略图间隔和尺寸"""
+    stem = cache_path(video_path, f'.thumbs-{interval}-{size[0]}x{size[1]}')
+    return stem + SPRITE_SUFFIX, stem + SPRITE_INDEX_SUFFIX
+
+
+class ThumbnailCache:
+    """时间轴缩略图的磁盘缓存
+
+    每个视频的缩略图拼成一张JPEG拼图，旁边的JSON记录视频大小、修改时间、间隔和各缩略图的帧号，
+    与帧索引一样存放在视频所在目录的.playback_cache下。视频被改写后缓存失效；
+    写入后按最近使用时间淘汰，使该目录中缩略图文件的总大小不超过上限。
+    """
+
+    def __init__(self, max_bytes=DEFAULT_THUMBNAIL_CACHE_BYTES):
+        self.max_bytes = max_bytes
+
+    def load(self, video_path, interval, size):
+        """读取缓存的缩略图
+
+        Returns:
+            [(帧号, BGR缩略图)]，缓存不存在或已失效时返回None
+        """
+        sprite_path, index_path = sprite_paths(video_path, interval, size)
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != _SPRITE_VERSION \
+                    or tuple(meta['signature']) != tuple(video_signature(video_path)):
+                return None
+            sprite = cv2.imread(sprite_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        if sprite is None:
+            return None
+        w, h = size
+        columns = meta['columns']
+        thumbnails = []
+        for i, frame_pos in enumerate(meta['frames']):
+            row, column = divmod(i, columns)
+            tile = sprite[row * h:(row + 1) * h, column * w:(column + 1) * w]
+            if tile.shape[:2] != (h, w):
+                return None
+            thumbnails.append((frame_pos, tile))
+        # 更新访问时间，供淘汰时判断最近使用
+        try:
+            os.utime(index_path)
+        except OSError:
+            pass
+        return thumbnails
+
+    def save(self, video_path, interval, size, thumbnails):
+        """把 [(帧号, BGR缩略图)] 写入缓存，随后按大小淘汰"""
+        if not thumbnails:
+            return
+        sprite_path, index_path = sprite_paths(video_path, interval, size)
+        w, h = size
+        rows = (len(thumbnails) + SPRITE_COLUMNS - 1) // SPRITE_COLUMNS
+        columns = min(len(thumbnails), SPRITE_COLUMNS)
+        sprite = np.zeros((rows * h, columns * w, 3), dtype=np.uint8)
+        for i, (_, tile) in enumerate(thumbnails):
+            row, column = divmod(i, SPRITE_COLUMNS)
+            sprite[row * h:(row + 1) * h, column * w:(column + 1) * w] = tile
+        meta = {
+            'version': _SPRITE_VERSION,
+            'signature': list(video_signature(video_path)),
+            'interval': interval,
+            'size': list(size),
+            'columns': SPRITE_COLUMNS,
+            'frames': [int(frame_pos) for frame_pos, _ in thumbnails],
+        }
+        try:
+            os.makedirs(os.path.dirname(sprite_path), exist_ok=True)
+            # 先写拼图再写索引，索引存在即表示拼图完整；临时文件名区分线程，
+            # 同一视频被两个时间轴同时生成时互不干扰
+            tmp_tag = f'.{os.getpid()}-{threading.get_ident()}.tmp'
+            tmp_path = sprite_path + tmp_tag + SPRITE_SUFFIX
+            if not cv2.imwrite(tmp_path, sprite, [cv2.IMWRITE_JPEG_QUALITY, 90]):
+                raise OSError(f'无法写入 {tmp_path}')
+            os.replace(tmp_path, sprite_path)
+            with open(index_path + tmp_tag, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+            os.replace(index_path + tmp_tag, index_path)
+        except OSError as e:
+            logging.warning(f'保存缩略图缓存失败 {sprite_path}: {e}')
+            return
+        self.evict(os.path.dirname(sprite_path))
+
+    def evict(self, cache_dir):
+        """淘汰最久未使用的缩略图，直到目录中缩略图文件的总大小不超过上限"""
+        entries = []
+        total = 0
+        try:
+            names = os.listdir(cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if '.thumbs-' not in name or not name.endswith(SPRITE_INDEX_SUFFIX):
+                continue
+            index_path = os.path.join(cache_dir, name)
+            sprite_path = index_path[:-len(SPRITE_INDEX_SUFFIX)] + SPRITE_SUFFIX
+            try:
+                used = os.path.getmtime(index_path)
+                size = os.path.getsize(index_path) + os.path.getsize(sprite_path)
+            except OSError:
+                continue
+            entries.append((used, size, index_path, sprite_path))
+            total += size
+        entries.sort()
+        for _, size, index_path, sprite_path in entries:
+            if total <= self.max_bytes:
+                break
+            for path in (index_path, sprite_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+            logging.debug(f'淘汰缩略图缓存: {sprite_path}')
+
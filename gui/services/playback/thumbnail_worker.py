@@ -0,0 +1,94 @@
+import logging
+
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from .frame_index import FrameSeeker
+
+# 时间轴缩略图的尺寸和间隔（秒）
+THUMBNAIL_SIZE = (100, 56)
+THUMBNAIL_SECONDS = 2
+
+
+def thumbnail_interval(fps):
+    """相邻缩略图之间的帧数"""
+    return max(int((fps or 30.0) * THUMBNAIL_SECONDS), 1)
+
+
+def iter_thumbnails(video_path, frame_index, frame_positions, size=THUMBNAIL_SIZE, cancelled=None):
+    """按顺序解码frame_positions中的帧，产出 (帧号, BGR缩略图)
+
+    缩略图位置单调递增，FrameSeeker在目标不远时直接向前grab，只有跨过整个GOP更快时才
+    定位到关键帧，因此整段视频只顺序解码一遍，不做随机跳转。
+
+    Args:
+        cancelled: 可选的无参函数，返回True时停止
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        logging.warning(f'生成缩略图时无法打开视频: {video_path}')
+        return
+    seeker = FrameSeeker(cap, frame_index)
+    try:
+        for frame_pos in frame_positions:
+            if cancelled and cancelled():
+                break
+            seeker.seek(frame_pos)
+            ret, frame = seeker.read()
+            if not ret:
+                break
+            yield frame_pos, cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    finally:
+        cap.release()
+
+
+def thumbnail_to_image(thumbnail):
+    """BGR缩略图转换为QImage（复制数据，可跨线程传递）"""
+    rgb_frame = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2RGB)
+    h, w, ch = rgb_frame.shape
+    return QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888).copy()
+
+
+class ThumbnailWorker(QThread):
+    """在后台按时间顺序生成时间轴缩略图
+
+    每生成一张就通过信号发出，由界面线程逐个加入时间轴；cancel()后在当前帧处理完即退出。
+    给定缩略图缓存时，完整生成后把整条缩略图写入缓存。
+    """
+
+    thumbnail_ready = pyqtSignal(int, QImage)  # 帧号, 缩略图
+
+    def __init__(self, video_path, frame_index, frame_positions, size=THUMBNAIL_SIZE, cache=None,
+                 interval=None, parent=None):
+        super().__init__(parent)
+        self.video_path = video_path
+        self.frame_index = frame_index
+        self.frame_positions = list(frame_positions)
+        self.size = size
+        self.cache = cache
+        self.interval = interval
+        self._cancelled = False
+        self.generated = 0
+
+    def cancel(self):
+        """取消生成并等待线程退出"""
+        self._cancelled = True
+        self.wait()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled
+
+    def run(self):
+        thumbnails = []
+        for frame_pos, thumbnail in iter_thumbnails(self.video_path, self.frame_index, self.frame_positions,
+                                                    self.size, lambda: self._cancelled):
+            image = thumbnail_to_image(thumbnail)
+            if self._cancelled:
+                return
+            thumbnails.append((frame_pos, thumbnail))
+            self.generated += 1
+            self.thumbnail_ready.emit(frame_pos, image)
+        if self.cache is not None and not self._cancelled and thumbnails:
+            self.cache.save(self.video_path, self.interval, self.size, thumbnails)
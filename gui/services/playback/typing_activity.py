@@ -0,0 +1,107 @@
+import logging
+from collections import OrderedDict
+
+import numpy as np
+
+from ..storage.session_container import is_ime_key
+
+# 相邻两次按键的间隔超过该值（秒）视为停顿
+PAUSE_THRESHOLD = 2.0
+# 每个会话缓存的分箱结果数（缩放、平移时复用）
+BIN_CACHE_SIZE = 32
+# 进程内缓存的会话数
+SESSION_CACHE_SIZE = 8
+
+
+class TypingActivity:
+    """按键活动密度
+
+    把按键时间戳排成有序的numpy数组，分箱时对箱子边界做一次searchsorted，相邻差值即为
+    每箱的按键数，耗时只与箱子数（即时间轴宽度）有关，与会话长度无关；缩放、平移后的
+    分箱结果按视图缓存。停顿为相邻按键间隔超过阈值的区间，输入法上屏取COMMIT_伪按键。
+    """
+
+    _sessions = OrderedDict()
+
+    def __init__(self, press_times, commit_times=(), pause_threshold=PAUSE_THRESHOLD):
+        self.press_times = np.sort(np.asarray(press_times, dtype=np.float64))
+        self.commit_times = np.sort(np.asarray(commit_times, dtype=np.float64))
+        self.pause_threshold = pause_threshold
+        gaps = np.diff(self.press_times)
+        long_gaps = np.flatnonzero(gaps > pause_threshold)
+        # 停顿区间 [开始, 结束)，按开始时间排序
+        self.pause_starts = self.press_times[long_gaps]
+        self.pause_ends = self.press_times[long_gaps + 1]
+        # 按秒统计的峰值速率，作为各缩放级别共同的纵轴刻度
+        if len(self.press_times):
+            per_second = np.bincount(np.floor(self.press_times - self.press_times[0]).astype(np.int64))
+            self.peak_rate = float(per_second.max())
+        else:
+            self.peak_rate = 0.0
+        self._bins = OrderedDict()
+
+    @classmethod
+    def from_record(cls, record):
+        """由记录构建：有原始按键时取其中的PRESS，否则取输入框按键记录（不含输入法事件）"""
+        keystrokes = record.get('keystrokes') or []
+        raw_keystrokes = record.get('raw_keystrokes') or []
+        if raw_keystrokes:
+            press_times = [k['timestamp'] for k in raw_keystrokes
+                           if k.get('timestamp') is not None
+                           and (k.get('type') or 'PRESS').upper() == 'PRESS']
+        else:
+            press_times = [k['timestamp'] for k in keystrokes
+                           if k.get('timestamp') is not None and not is_ime_key(k.get('key'))]
+        commit_times = [k['timestamp'] for k in keystrokes
+                        if k.get('timestamp') is not None and is_ime_key(k.get('key'))
+                        and k['key'].startswith('COMMIT_')]
+        return cls(press_times, commit_times)
+
+    @classmethod
+    def for_record(cls, record):
+        """按会话缓存的from_record，重新打开同一记录时复用已分好的箱"""
+        key = (record.get('id'), record.get('timestamp'),
+               len(record.get('keystrokes') or []), len(record.get('raw_keystrokes') or []))
+        activity = cls._sessions.get(key)
+        if activity is None:
+            activity = cls.from_record(record)
+            cls._sessions[key] = activity
+            while len(cls._sessions) > SESSION_CACHE_SIZE:
+                cls._sessions.popitem(last=False)
+            logging.debug(f'按键活动: {len(activity.press_times)}次按键, '
+                          f'{len(activity.pause_starts)}次停顿, {len(activity.commit_times)}次上屏')
+        else:
+            cls._sessions.move_to_end(key)
+        return activity
+
+    def __len__(self):
+        return len(self.press_times)
+
+    def rates(self, start, bin_seconds, n_bins):
+        """从start（秒）开始、每箱bin_seconds秒的n_bins个箱子内的按键速率（次/秒）"""
+        if n_bins <= 0 or bin_seconds <= 0:
+            return np.zeros(0)
+        key = (round(start, 6), round(bin_seconds, 9), n_bins)
+        rates = self._bins.get(key)
+        if rates is not None:
+            self._bins.move_to_end(key)
+            return rates
+        edges = start + np.arange(n_bins + 1) * bin_seconds
+        counts = np.diff(np.searchsorted(self.press_times, edges, side='left'))
+        rates = counts / bin_seconds
+        rates.flags.writeable = False
+        self._bins[key] = rates
+        while len(self._bins) > BIN_CACHE_SIZE:
+            self._bins.popitem(last=False)
+        return rates
+
+    def pauses_between(self, start, end):
+        """与[start, end)相交的停顿，返回 (开始数组, 结束数组)"""
+        first = np.searchsorted(self.pause_ends, start, side='right')
+        last = np.searchsorted(self.pause_starts, end, side='left')
+        return self.pause_starts[first:last], self.pause_ends[first:last]
+
+    def commits_between(self, start, end):
+        """[start, end)内的输入法上屏时间"""
+        first, last = np.searchsorted(self.commit_times, (start, end), side='left')
+        return self.commit_times[first:last]
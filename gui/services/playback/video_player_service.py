@@ -1,39 +1,129 @@
 import cv2
 import time
 import logging
+import threading
+import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QImage
+
+from .playback_clock import PlaybackClock
+from .frame_index import FrameIndex, FrameSeeker
+from .frame_cache import FrameCache, FramePrefetcher, DEFAULT_CACHE_BYTES
+from .scrub_worker import ScrubWorker
 
 logging.basicConfig(level=logging.DEBUG)
 
 
+def fit_size(width, height, target_width, target_height):
+    """按原比例放入目标区域后的尺寸；目标尺寸无效时返回原尺寸"""
+    if target_width <= 0 or target_height <= 0 or width <= 0 or height <= 0:
+        return width, height
+    scale = min(target_width / width, target_height / height)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+def frame_to_image(frame, target_size=None, buffer=None):
+    """把OpenCV的BGR帧缩放到目标区域内并转换为QImage
+
+    缩小用INTER_AREA、放大用INTER_LINEAR；结果直接写入新建的RGB32格式QImage，
+    绘制时不需要再做格式转换。QImage不与帧数据共享内存，可以跨线程传递。
+
+    Args:
+        frame: BGR帧
+        target_size: (宽, 高) 显示区域（设备像素），为空时保持原尺寸
+        buffer: 可复用的缩放缓冲区（尺寸不符时重新分配）
+    Returns:
+        (QImage, 缩放缓冲区)
+    """
+    h, w = frame.shape[:2]
+    out_w, out_h = fit_size(w, h, *(target_size or (0, 0)))
+    if (out_w, out_h) != (w, h):
+        if buffer is None or buffer.shape != (out_h, out_w, 3):
+            buffer = np.empty((out_h, out_w, 3), dtype=np.uint8)
+        interpolation = cv2.INTER_AREA if out_w < w else cv2.INTER_LINEAR
+        cv2.resize(frame, (out_w, out_h), dst=buffer, interpolation=interpolation)
+        frame = buffer
+    image = QImage(out_w, out_h, QImage.Format_RGB32)
+    bits = image.bits()
+    bits.setsize(image.sizeInBytes())
+    # RGB32在内存中按B、G、R、X排列，每行4*宽字节
+    pixels = np.frombuffer(bits, dtype=np.uint8).reshape(out_h, out_w, 4)
+    cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=pixels)
+    return image, buffer
+
+
 class VideoPlayerService(QThread):
-    """视频播放服务"""
-    frame_ready = pyqtSignal(QPixmap, int)  # 帧图像, 时间戳(毫秒)
+    """视频播放服务
+
+    解码、缩放和颜色转换都在播放线程中完成：帧按显示区域大小（set_display_size）缩放到
+    复用的缓冲区，再以QImage发出，界面线程每帧的开销与视频原始分辨率无关。
+
+    跳转通过帧索引（FrameIndex）完成：定位到最近的关键帧后向前解码，并按索引核对帧时间。
+    解码后的帧放入按字节数限制的LRU缓存（FrameCache），命中时不经过解码器；
+    预取线程（FramePrefetcher）沿播放或拖动方向提前填充缓存。
+
+    播放节奏由回放时钟（PlaybackClock）决定：下一帧的时间戳超前于时钟时保持当前帧等待，
+    落后超过一帧时跳过解码追赶（计入丢帧），落后太多时直接跳转。多个播放服务共享同一个
+    时钟即可保持同步；未传入时钟时使用自己的时钟。
+    """
+    frame_ready = pyqtSignal(QImage, int)  # 帧图像（已缩放到显示区域）, 时间戳(毫秒)
     video_finished = pyqtSignal()
+    scrub_frame_ready = pyqtSignal(QImage, int, bool)  # 拖动画面: 图像, 帧号, 是否完整画质
+
+    # 落后超过该时间（秒）时直接跳转，而不是逐帧追赶
+    MAX_CATCH_UP = 1.0
+    # 等待下一帧时的最长单次休眠（秒），保证及时响应暂停和跳转
+    MAX_WAIT = 0.02
     
-    def __init__(self, video_path):
+    def __init__(self, video_path, clock=None, cache_bytes=DEFAULT_CACHE_BYTES):
         super().__init__()
         self.video_path = video_path
         self.cap = None
+        self.frame_index = None
+        self.seeker = None
+        self.frame_cache = FrameCache(cache_bytes)
+        self.prefetcher = None
+        self.scrubber = None
+        # 可选的内存映射低分辨率帧（ScrubStore），有时拖动预览和倒放不经过解码
+        self.scrub_store = None
+        self._preview_buffer = None
+        self._last_read = None  # 上一次读取单帧的位置，用于判断拖动方向
+        # 播放线程与界面线程（读取单帧）共用同一个VideoCapture，读写时需加锁
+        self._cap_lock = threading.Lock()
         self.fps = 0
         self.total_frames = 0
         self.current_frame = 0
         self.is_playing = False
         self.is_paused = False
         self.seek_position = -1
-        self.start_time = 0  # 播放开始时间
         self.playback_speed = 1.0  # 新增，默认1.0倍速
+        self.display_size = None  # 显示区域（设备像素），为空时按原尺寸输出
+        self._scale_buffer = None  # 播放线程复用的缩放缓冲区
+        self.owns_clock = clock is None
+        self.clock = clock or PlaybackClock()
+        self.clock_offset = 0.0  # 本视频时间 = 时钟时间 + 偏移（非联动时各自跳转）
+        # 同步统计
+        self.presented_frames = 0
+        self.dropped_frames = 0
+        self.drift_ms = 0.0  # 最近一帧显示时与时钟的偏差（正数表示超前）
         
+    def media_time(self):
+        """本视频当前应显示的时间（秒）"""
+        return self.clock.position() + self.clock_offset
+
     def run(self):
         """运行播放线程"""
         if not self.video_path or not self.cap:
             return
-            
-        # 确保从第一帧开始播放
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-        self.current_frame = 0
-        self.start_time = time.time()
+
+        # 从时钟当前位置开始播放
+        if self.owns_clock:
+            self.clock.start()
+        start_frame = self.seek_position if self.seek_position >= 0 else self.frame_index.frame_at(
+            self.media_time() * 1000)
+        self.seek_position = -1
+        self._seek_to(min(max(start_frame, 0), max(self.total_frames - 1, 0)))
+        frame_duration = 1.0 / self.fps
         
         while self.is_playing:
             if self.is_paused:
@@ -42,61 +132,209 @@ class VideoPlayerService(QThread):
                 
             # 处理跳转
             if self.seek_position >= 0:
-                self.cap.set(cv2.CAP_PROP_POS_FRAMES, self.seek_position)
-                self.current_frame = self.seek_position
+                self._seek_to(self.seek_position)
                 self.seek_position = -1
-                self.start_time = time.time() - (self.current_frame / self.fps)
-            
-            ret, frame = self.cap.read()
-            if not ret:
-                self.is_playing = False
-                self.video_finished.emit()
+            if self.current_frame >= self.total_frames:
+                self._finish()
                 break
-                
-            # 转换帧格式
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            pixmap = QPixmap.fromImage(qt_image)
+
+            frame_time = self.frame_time(self.current_frame)
+            lag = self.media_time() - frame_time
+            if lag < -frame_duration / 2:
+                # 下一帧还没到显示时间，保持当前帧
+                time.sleep(min(-lag / max(self.clock.speed, 0.01), self.MAX_WAIT))
+                continue
+            if lag > self.MAX_CATCH_UP:
+                # 落后太多，直接跳到时钟位置
+                target = self.frame_index.frame_at(self.media_time() * 1000)
+                if target <= self.current_frame or self.current_frame >= self.total_frames:
+                    self._finish()
+                    break
+                self.dropped_frames += target - self.current_frame
+                self._seek_to(target)
+                continue
+            if lag > frame_duration:
+                # 落后超过一帧：只推进不解码（已缓存的帧连grab也不需要）
+                if self.current_frame not in self.frame_cache:
+                    with self._cap_lock:
+                        self._sync_decoder()
+                        skipped = self.seeker.skip()
+                    if not skipped:
+                        self._finish()
+                        break
+                self.current_frame += 1
+                self.dropped_frames += 1
+                continue
+            
+            image = self.frame_cache.get(self.current_frame)
+            if image is None:
+                with self._cap_lock:
+                    self._sync_decoder()
+                    ret, frame = self.seeker.read()
+                if not ret:
+                    self._finish()
+                    break
+                # 缩放到显示区域并转换帧格式
+                size = self.display_size
+                image, self._scale_buffer = frame_to_image(frame, size, self._scale_buffer)
+                self.frame_cache.put(self.current_frame, image, size)
+            self.prefetcher.request(self.current_frame + 1, 1)
             
             # 计算时间戳
-            timestamp_ms = int(self.current_frame / self.fps * 1000)
+            timestamp_ms = int(frame_time * 1000)
             
             # 发送帧
-            self.frame_ready.emit(pixmap, timestamp_ms)
+            self.drift_ms = (frame_time - self.media_time()) * 1000
+            self.presented_frames += 1
+            self.frame_ready.emit(image, timestamp_ms)
             self.current_frame += 1
-            
-            # 控制播放速度 - 每帧之间的延迟
-            frame_delay = 1.0 / self.fps
-            time.sleep(frame_delay / self.playback_speed)  # 按速度调整
+
+    def frame_time(self, frame_position):
+        """帧的显示时间（秒）"""
+        if frame_position < self.frame_index.frame_count:
+            return self.frame_index.timestamp_ms(frame_position) / 1000
+        return frame_position / self.fps
+
+    def _seek_to(self, frame_position):
+        # 解码器在缓存未命中时才真正定位（见_sync_decoder）
+        self.current_frame = min(max(frame_position, 0), self.total_frames)
+
+    def _sync_decoder(self):
+        """让解码器位置与当前帧一致（调用方需持有_cap_lock）"""
+        if self.seeker.position != self.current_frame:
+            self.seeker.seek(self.current_frame)
+
+    def _finish(self):
+        self.is_playing = False
+        self.video_finished.emit()
+
+    def sync_stats(self):
+        """同步统计：已显示帧数、丢帧数、最近一帧与时钟的偏差（毫秒）"""
+        return {
+            'presented': self.presented_frames,
+            'dropped': self.dropped_frames,
+            'drift_ms': self.drift_ms,
+        }
+
+    def reset_stats(self):
+        self.presented_frames = 0
+        self.dropped_frames = 0
+        self.drift_ms = 0.0
     
     def open_video(self):
         """打开视频"""
         self.cap = cv2.VideoCapture(self.video_path)
         if self.cap.isOpened():
-            self.fps = self.cap.get(cv2.CAP_PROP_FPS)
-            self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            # 确保从第一帧开始
-            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            # 部分文件读不到帧率，按30帧处理
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+            # 帧索引（MP4直接解析，不扫描其他格式以免阻塞界面）
+            self.frame_index = FrameIndex.for_video(self.video_path, allow_scan=False) or FrameIndex.uniform(
+                int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)), self.fps)
+            self.total_frames = self.frame_index.frame_count
+            self.seeker = FrameSeeker(self.cap, self.frame_index)
+            self.prefetcher = FramePrefetcher(self.video_path, self.frame_index, self.frame_cache)
+            self.scrubber = ScrubWorker(self.video_path, self.frame_index, self.frame_cache)
+            self.scrubber.frame_ready.connect(self.scrub_frame_ready)
             self.current_frame = 0
             return True
         return False
     
+    def set_display_size(self, width, height):
+        """设置显示区域大小（设备像素），之后的帧按此大小输出"""
+        self.display_size = (width, height) if width > 0 and height > 0 else None
+        self.frame_cache.set_size(self.display_size)
+
+    def set_cache_limit(self, max_bytes):
+        """设置解码帧缓存的上限（字节）"""
+        self.frame_cache.set_max_bytes(max_bytes)
+
+    def read_frame(self, frame_position):
+        """读取指定帧并按显示区域转换（供暂停、拖动时在界面线程显示单帧）
+
+        Returns:
+            QImage，读取失败时为None
+        """
+        if not self.cap:
+            return None
+        image = self.frame_cache.get(frame_position)
+        if image is None:
+            with self._cap_lock:
+                self.seeker.seek(frame_position)
+                ret, frame = self.seeker.read()
+            if not ret:
+                return None
+            # 不使用播放线程的缓冲区，避免与正在播放的线程冲突
+            size = self.display_size
+            image, _ = frame_to_image(frame, size)
+            self.frame_cache.put(frame_position, image, size)
+        # 沿拖动方向预取
+        last, self._last_read = self._last_read, frame_position
+        direction = 0 if last is None or last == frame_position else (1 if frame_position > last else -1)
+        self.prefetcher.request(frame_position, direction)
+        return image
+    
+    def set_scrub_store(self, store):
+        """设置低分辨率帧（ScrubStore），为None时拖动预览恢复为解码关键帧"""
+        self.scrub_store = store
+
+    def preview_frame(self, frame_position):
+        """从低分辨率帧取画面并缩放到显示区域（界面线程调用）
+
+        Returns:
+            QImage，没有低分辨率帧时为None
+        """
+        if self.scrub_store is None:
+            return None
+        image, self._preview_buffer = self.scrub_store.image(frame_position, self.display_size,
+                                                             self._preview_buffer)
+        return image
+
+    def scrub(self, frame_position, final=False):
+        """拖动时请求画面，结果通过scrub_frame_ready发出
+
+        有低分辨率帧时预览直接从映射内存取出并同步发出，否则由拖动线程异步解码。
+
+        Args:
+            final: 拖动已停下，需要完整画质的目标帧
+        """
+        if not self.scrubber:
+            return
+        if not final:
+            image = self.preview_frame(frame_position)
+            if image is not None:
+                self.scrubber.discard_pending()
+                self.prefetcher.cancel()
+                self.scrub_frame_ready.emit(image, frame_position, False)
+                return
+        self.scrubber.request(frame_position, final)
+        if final:
+            # 停下后预取两侧，便于逐帧查看
+            self._last_read = frame_position
+            self.prefetcher.request(frame_position, 0)
+        else:
+            # 拖动中把解码资源让给预览
+            self.prefetcher.cancel()
+
     def play(self):
         """开始播放"""
         self.is_playing = True
         self.is_paused = False
+        if self.owns_clock:
+            self.clock.start()
         if not self.isRunning():
             self.start()
     
     def pause(self):
         """暂停播放"""
         self.is_paused = True
+        if self.owns_clock:
+            self.clock.pause()
     
     def resume(self):
         """恢复播放"""
         self.is_paused = False
+        if self.owns_clock:
+            self.clock.start()
         if not self.isRunning():
             self.start()
     
@@ -104,14 +342,23 @@ class VideoPlayerService(QThread):
         """停止播放"""
         self.is_playing = False
         self.wait()
+        if self.owns_clock:
+            self.clock.pause()
+            self.clock.seek(0)
     
     def seek(self, frame_position):
-        """跳转到指定帧"""
+        """跳转到指定帧（共享时钟时由时钟的所有者同时跳转时钟）"""
         self.seek_position = frame_position
+        if self.owns_clock and self.fps:
+            self.clock.seek(self.frame_time(frame_position))
     
     def close(self):
         """关闭视频"""
         self.stop()
+        if self.prefetcher:
+            self.prefetcher.stop()
+        if self.scrubber:
+            self.scrubber.stop()
         if self.cap:
             self.cap.release()
     
@@ -129,4 +376,6 @@ class VideoPlayerService(QThread):
 
     def set_playback_speed(self, speed):
         """设置播放速度"""
-        self.playback_speed = speed 
\ No newline at end of file
+        self.playback_speed = speed
+        if self.owns_clock:
+            self.clock.set_speed(speed) 
\ No newline at end of file
@@ -0,0 +1 @@
+# 存储服务包
@@ -0,0 +1,189 @@
+import os
+import logging
+import threading
+
+from PyQt5.QtCore import QObject, QThread, QFileSystemWatcher, QTimer, QCoreApplication, pyqtSignal
+
+from .session_store import is_session_record_file
+from .session_catalog import CATALOG_FILENAME
+
+# 需要跟踪写入过程的文件后缀（录制中的视频、会话记录）
+_TRACKED_SUFFIXES = ('.mp4', '.avi')
+
+
+class CatalogWorker(QThread):
+    """在后台线程中执行目录索引的全量扫描和增量更新
+
+    扫描和更新会解析记录、用cv2探测视频、切分输入文本，不能放在界面线程。
+    请求按顺序处理，尚未处理的增量变化合并为一批；全量扫描已覆盖之前的增量变化。
+    没有待处理的请求时线程退出，下次请求时重新启动。
+    """
+
+    # (新增或更新的记录路径列表, 删除的记录路径列表, 是否为全量扫描)
+    batch_done = pyqtSignal(list, list, bool)
+
+    def __init__(self, catalog, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self._condition = threading.Condition()
+        self._scan = False
+        self._changed = set()
+        self._snapshot = None
+        self._running = False
+        self._stopping = False
+
+    def request_scan(self):
+        """请求一次全量扫描"""
+        with self._condition:
+            self._stopping = False
+            self._scan = True
+            self._wake()
+
+    def request_update(self, names, snapshot):
+        """请求按变化的文件增量更新（snapshot为变化后数据目录的stat结果）"""
+        with self._condition:
+            self._stopping = False
+            self._changed.update(names)
+            self._snapshot = snapshot
+            self._wake()
+
+    def _wake(self):
+        if not self._running:
+            # 上一次运行可能还在退出，等它结束后才能重新启动
+            self.wait()
+            self._running = True
+            self.start()
+
+    def stop(self):
+        """丢弃未处理的请求，中断正在进行的扫描并等待线程退出"""
+        with self._condition:
+            self._stopping = True
+            self._scan = False
+            self._changed = set()
+        self.wait()
+
+    def run(self):
+        try:
+            while True:
+                with self._condition:
+                    if not self._scan and not self._changed:
+                        self._running = False
+                        return
+                    scan, self._scan = self._scan, False
+                    changed, self._changed = self._changed, set()
+                    snapshot = self._snapshot
+                try:
+                    if scan:
+                        updated, removed = self.catalog.scan(cancelled=lambda: self._stopping)
+                    else:
+                        updated, removed = self.catalog.update_files(sorted(changed), snapshot)
+                except Exception as e:
+                    logging.error(f'更新会话目录索引失败: {e}')
+                    continue
+                self.batch_done.emit(updated, removed, scan)
+        finally:
+            with self._condition:
+                self._running = False
+
+
+class DataDirectoryWatcher(QObject):
+    """数据目录监视器
+
+    通过QFileSystemWatcher监视数据目录，文件新增、删除、改名时触发；
+    新出现的视频和记录文件额外加入文件监视，以便捕获录制过程中的写入。
+    一段时间内的多次变化合并为一次处理：与上次的目录快照比较得到变化的文件，
+    只对这些文件在后台线程中增量更新目录索引，完成后在界面线程通过sessions_changed通知视图逐行更新。
+    全量扫描（scan）也在同一个后台线程中进行，完成后通过scan_finished通知视图重新查询。
+    """
+
+    # (新增或更新的记录路径列表, 删除的记录路径列表)
+    sessions_changed = pyqtSignal(list, list)
+    # 全量扫描完成：(新增或更新的记录路径列表, 删除的记录路径列表)
+    scan_finished = pyqtSignal(list, list)
+
+    def __init__(self, catalog, debounce_ms=300, max_watched_files=256, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog
+        self.data_dir = catalog.data_dir
+        self.max_watched_files = max_watched_files
+        self._snapshot = catalog.list_directory()
+        self._watched_files = []
+        self.worker = CatalogWorker(catalog, self)
+        self.worker.batch_done.connect(self._on_batch_done)
+        app = QCoreApplication.instance()
+        if app is not None:
+            # 退出程序时中断后台扫描，避免线程仍在运行时被销毁
+            app.aboutToQuit.connect(self.stop)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._apply_changes)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._schedule)
+        self._watcher.fileChanged.connect(self._schedule)
+        if os.path.isdir(self.data_dir):
+            self._watcher.addPath(self.data_dir)
+        else:
+            logging.warning(f'数据目录不存在，暂不监视: {self.data_dir}')
+
+    def scan(self):
+        """在后台线程中全量同步目录索引，完成后发出scan_finished"""
+        self.worker.request_scan()
+
+    def stop(self):
+        """停止监视"""
+        self._timer.stop()
+        self.worker.stop()
+        paths = self._watcher.directories() + self._watcher.files()
+        if paths:
+            self._watcher.removePaths(paths)
+        self._watched_files = []
+
+    def _schedule(self, path=None):
+        """收到变化后重新计时，突发的连续变化只处理一次"""
+        self._timer.start()
+
+    def _watch_file(self, name):
+        """跟踪新文件的写入（超过上限时放弃最早的）"""
+        path = os.path.join(self.data_dir, name)
+        if path in self._watched_files:
+            return
+        if len(self._watched_files) >= self.max_watched_files:
+            self._watcher.removePath(self._watched_files.pop(0))
+        if self._watcher.addPath(path):
+            self._watched_files.append(path)
+
+    def _apply_changes(self):
+        """与上次快照比较，增量更新目录索引并通知视图"""
+        if not self._watcher.directories() and os.path.isdir(self.data_dir):
+            self._watcher.addPath(self.data_dir)
+        snapshot = self.catalog.list_directory()
+        changed = []
+        for name, stat_result in snapshot.items():
+            previous = self._snapshot.get(name)
+            if previous is None:
+                changed.append(name)
+                if name.endswith(_TRACKED_SUFFIXES) or is_session_record_file(name):
+                    self._watch_file(name)
+            elif previous.st_mtime_ns != stat_result.st_mtime_ns or previous.st_size != stat_result.st_size:
+                changed.append(name)
+        changed.extend(name for name in self._snapshot if name not in snapshot)
+        # 忽略目录索引自身的数据库文件
+        changed = [name for name in changed if not name.startswith(CATALOG_FILENAME)]
+        self._watched_files = [p for p in self._watched_files if os.path.basename(p) in snapshot]
+        self._snapshot = snapshot
+
+        if not changed:
+            return
+        # 更新索引会解析记录、探测视频（录制中的视频每个计时周期都会变化），放到后台线程
+        self.worker.request_update(changed, snapshot)
+
+    def _on_batch_done(self, updated, removed, scan):
+        """后台处理完成（在界面线程中调用）"""
+        if scan:
+            self.scan_finished.emit(updated, removed)
+        elif updated or removed:
+            logging.debug(f'数据目录变化: 更新 {len(updated)} 条, 删除 {len(removed)} 条')
+            self.sessions_changed.emit(updated, removed)
@@ -0,0 +1,480 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+from .session_container import CONTAINER_SUFFIX
+from .session_store import load_session_summary, is_session_record_file
+from .session_search import SessionSearchIndex, collect_typed_texts
+
+# 目录索引文件名（位于数据目录下）
+CATALOG_FILENAME = 'catalog.sqlite3'
+
+# 允许排序的列
+SORTABLE_COLUMNS = (
+    'timestamp', 'recording_start_time', 'question_id', 'question_type', 'question_language',
+    'question_content', 'answer', 'user_input', 'keystroke_count', 'raw_keystroke_count',
+    'screen_exists', 'webcam_exists', 'screen_duration', 'webcam_duration', 'path'
+)
+# 按关键词相关度排序（需要同时传入keyword）
+ORDER_BY_RELEVANCE = 'relevance'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT PRIMARY KEY,
+    file_mtime REAL NOT NULL,
+    file_size INTEGER NOT NULL,
+    timestamp REAL,
+    recording_start_time REAL,
+    question_id INTEGER,
+    question_type TEXT,
+    question_language TEXT,
+    question_content TEXT,
+    answer TEXT,
+    question_json TEXT,
+    user_input TEXT,
+    keystroke_count INTEGER,
+    raw_keystroke_count INTEGER,
+    screen_video_path TEXT,
+    screen_exists INTEGER NOT NULL DEFAULT 0,
+    screen_signature TEXT,
+    screen_duration REAL,
+    screen_frame_count INTEGER,
+    webcam_video_path TEXT,
+    webcam_exists INTEGER NOT NULL DEFAULT 0,
+    webcam_signature TEXT,
+    webcam_duration REAL,
+    webcam_frame_count INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_timestamp ON sessions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_sessions_question ON sessions(question_id);
+"""
+
+
+def _file_signature(stat_result):
+    """文件签名（大小+修改时间），用于判断视频是否变化"""
+    return f'{stat_result.st_size}:{stat_result.st_mtime_ns}'
+
+
+def probe_video(path):
+    """读取视频时长和帧数（只读容器元数据，不解码）
+
+    Returns:
+        tuple: (duration, frame_count)，读取失败时为 (None, None)
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            return None, None
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        duration = frame_count / fps if fps and fps > 0 else None
+        return duration, frame_count
+    finally:
+        cap.release()
+
+
+class SessionCatalog:
+    """会话目录索引（SQLite）
+
+    保存每条会话记录的摘要字段、视频是否存在、视频时长和帧数，供列表页分页排序查询。
+    保存会话时调用update_path增量更新；scan按文件修改时间和大小增量同步数据目录，
+    只重新解析有变化的记录文件，只重新探测签名变化的视频。
+    """
+
+    def __init__(self, data_dir='data', db_path=None):
+        self.data_dir = data_dir
+        self.db_path = db_path or os.path.join(data_dir, CATALOG_FILENAME)
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(_SCHEMA)
+        # 全文检索索引与目录索引共用数据库和锁
+        self.search_index = SessionSearchIndex(self._conn, self._lock)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    # ---------- 写入 ----------
+
+    def update_path(self, path, stat_result=None, dir_stats=None):
+        """解析一条会话记录并写入索引
+        Args:
+            path: 记录文件路径
+            stat_result: 记录文件的stat结果（扫描时传入，避免重复stat）
+            dir_stats: 数据目录下各文件的stat结果 {文件名: stat}，用于判断视频是否存在
+        """
+        stat_result = stat_result or os.stat(path)
+        summary = load_session_summary(path)
+        question = summary.get('question') or {}
+        previous = self._get_row(path)
+
+        row = {
+            'path': path,
+            'file_mtime': stat_result.st_mtime,
+            'file_size': stat_result.st_size,
+            'timestamp': summary.get('timestamp'),
+            'recording_start_time': summary.get('recording_start_time'),
+            'question_id': question.get('id'),
+            'question_type': question.get('type'),
+            'question_language': question.get('language'),
+            'question_content': question.get('content', ''),
+            'answer': question.get('answer'),
+            'question_json': json.dumps(question, ensure_ascii=False),
+            'user_input': summary.get('user_input', ''),
+            'keystroke_count': summary.get('keystroke_count'),
+            'raw_keystroke_count': summary.get('raw_keystroke_count'),
+        }
+        for prefix in ('screen', 'webcam'):
+            video_path = summary.get(f'{prefix}_video_path')
+            row[f'{prefix}_video_path'] = video_path
+            row.update(self._video_columns(prefix, video_path, previous, dir_stats))
+
+        columns = ', '.join(row)
+        placeholders = ', '.join('?' for _ in row)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO sessions ({columns}) VALUES ({placeholders})',
+                tuple(row.values())
+            )
+        self._update_search_text(path, row)
+        return row
+
+    def _update_search_text(self, path, row):
+        """更新全文检索索引（失败不影响目录索引）"""
+        if not self.search_index.available:
+            return
+        try:
+            self.search_index.update(path, row['question_content'], row['user_input'], collect_typed_texts(path))
+        except Exception as e:
+            logging.error(f'更新全文检索索引失败 {path}: {e}')
+
+    def remove_path(self, path):
+        """从索引中删除一条记录"""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM sessions WHERE path = ?', (path,))
+        self.search_index.remove([path])
+
+    def _get_row(self, path):
+        with self._lock:
+            cur = self._conn.execute('SELECT * FROM sessions WHERE path = ?', (path,))
+            row = cur.fetchone()
+        return dict(row) if row else None
+
+    def _video_stat(self, video_path, dir_stats):
+        """视频文件的stat；位于数据目录下时直接使用扫描结果"""
+        if not video_path:
+            return None
+        if dir_stats is not None and os.path.dirname(os.path.normpath(video_path)) == os.path.normpath(self.data_dir):
+            return dir_stats.get(os.path.basename(video_path))
+        try:
+            return os.stat(video_path)
+        except OSError:
+            return None
+
+    def _video_columns(self, prefix, video_path, previous, dir_stats):
+        """计算视频相关列；签名未变化时沿用上次探测的时长和帧数"""
+        stat_result = self._video_stat(video_path, dir_stats)
+        if stat_result is None:
+            return {f'{prefix}_exists': 0, f'{prefix}_signature': None,
+                    f'{prefix}_duration': None, f'{prefix}_frame_count': None}
+        signature = _file_signature(stat_result)
+        if previous and previous.get(f'{prefix}_signature') == signature:
+            duration = previous.get(f'{prefix}_duration')
+            frame_count = previous.get(f'{prefix}_frame_count')
+        else:
+            duration, frame_count = probe_video(video_path)
+        return {f'{prefix}_exists': 1, f'{prefix}_signature': signature,
+                f'{prefix}_duration': duration, f'{prefix}_frame_count': frame_count}
+
+    def scan(self, cancelled=None):
+        """按修改时间和大小增量同步数据目录
+
+        同一会话同时存在清单JSON和二进制容器时只索引容器。
+
+        Args:
+            cancelled: 可选的无参函数，返回True时停止（已索引的记录保留，下次扫描继续）
+        Returns:
+            tuple: (新增或更新的路径列表, 删除的路径列表)
+        """
+        if not os.path.isdir(self.data_dir):
+            return [], []
+
+        dir_stats = self.list_directory()
+        record_names = {name for name in dir_stats if is_session_record_file(name)}
+        containers = {os.path.splitext(name)[0] for name in record_names if name.endswith(CONTAINER_SUFFIX)}
+        record_names = {
+            name for name in record_names
+            if name.endswith(CONTAINER_SUFFIX) or os.path.splitext(name)[0] not in containers
+        }
+
+        with self._lock:
+            known = {
+                row['path']: row for row in self._conn.execute(
+                    'SELECT path, file_mtime, file_size, screen_video_path, screen_signature, '
+                    'webcam_video_path, webcam_signature FROM sessions'
+                )
+            }
+
+        updated = []
+        current_paths = set()
+        for name in record_names:
+            if cancelled and cancelled():
+                return updated, []
+            path = os.path.join(self.data_dir, name)
+            current_paths.add(path)
+            stat_result = dir_stats[name]
+            row = known.get(path)
+            if row is not None and row['file_mtime'] == stat_result.st_mtime \
+                    and row['file_size'] == stat_result.st_size \
+                    and not self._videos_changed(row, dir_stats):
+                continue
+            try:
+                self.update_path(path, stat_result, dir_stats)
+                updated.append(path)
+            except Exception as e:
+                logging.error(f'索引会话记录失败 {path}: {e}')
+
+        removed = [path for path in known if path not in current_paths
+                   and os.path.dirname(path) == self.data_dir.rstrip(os.sep)]
+        if removed:
+            with self._lock, self._conn:
+                self._conn.executemany('DELETE FROM sessions WHERE path = ?', [(p,) for p in removed])
+            self.search_index.remove(removed)
+        updated.extend(self._backfill_search_index(set(updated), cancelled))
+        if updated or removed:
+            logging.info(f'会话目录索引已更新: 更新 {len(updated)} 条, 删除 {len(removed)} 条')
+        return updated, removed
+
+    def list_directory(self):
+        """数据目录下各文件的stat结果 {文件名: stat}（一次scandir）"""
+        dir_stats = {}
+        if not os.path.isdir(self.data_dir):
+            return dir_stats
+        with os.scandir(self.data_dir) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    dir_stats[entry.name] = entry.stat()
+        return dir_stats
+
+    def update_files(self, names, dir_stats):
+        """按已知发生变化的文件增量更新索引（供目录监视使用，不遍历其他记录）
+
+        Args:
+            names: 数据目录下新增、修改或删除的文件名
+            dir_stats: 变化后数据目录下各文件的stat结果
+        Returns:
+            tuple: (新增或更新的路径列表, 删除的路径列表)
+        """
+        updated, removed = [], []
+
+        def index(path):
+            try:
+                self.update_path(path, dir_stats[os.path.basename(path)], dir_stats)
+                updated.append(path)
+            except Exception as e:
+                logging.error(f'索引会话记录失败 {path}: {e}')
+
+        def unindex(path):
+            if self._get_row(path) is not None:
+                self.remove_path(path)
+                removed.append(path)
+
+        for name in names:
+            path = os.path.join(self.data_dir, name)
+            if is_session_record_file(name):
+                stem = os.path.splitext(name)[0]
+                container_name = stem + CONTAINER_SUFFIX
+                json_path = os.path.join(self.data_dir, stem + '.json')
+                if name not in dir_stats:
+                    unindex(path)
+                    # 容器被删除时退回到同名的清单JSON
+                    if name == container_name and stem + '.json' in dir_stats:
+                        index(json_path)
+                elif name != container_name and container_name in dir_stats:
+                    # 已有容器的会话不索引清单JSON
+                    unindex(path)
+                else:
+                    if name == container_name:
+                        unindex(json_path)
+                    row = self._get_row(path)
+                    stat_result = dir_stats[name]
+                    if row is not None and row['file_mtime'] == stat_result.st_mtime \
+                            and row['file_size'] == stat_result.st_size \
+                            and not self._videos_changed(row, dir_stats):
+                        # 已由保存流程写入索引，只需通知视图
+                        updated.append(path)
+                    else:
+                        index(path)
+            else:
+                # 视频等其他文件：更新引用它的记录
+                for record_path in self.paths_for_video(path):
+                    if os.path.basename(record_path) in dir_stats and record_path not in updated:
+                        index(record_path)
+        return updated, removed
+
+    def paths_for_video(self, video_path):
+        """引用某个视频文件的记录路径"""
+        candidates = list({video_path, os.path.normpath(video_path)})
+        placeholders = ', '.join('?' for _ in candidates)
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT path FROM sessions WHERE screen_video_path IN ({placeholders}) '
+                f'OR webcam_video_path IN ({placeholders})', candidates + candidates
+            ).fetchall()
+        return [row['path'] for row in rows]
+
+    def _backfill_search_index(self, skip, cancelled=None):
+        """为尚未建立全文检索的记录（如升级前建立的目录索引）补建索引"""
+        if not self.search_index.available:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT * FROM sessions WHERE path NOT IN (SELECT path FROM session_text)'
+            ).fetchall()
+        backfilled = []
+        for row in rows:
+            if cancelled and cancelled():
+                break
+            if row['path'] in skip or not os.path.exists(row['path']):
+                continue
+            self._update_search_text(row['path'], dict(row))
+            backfilled.append(row['path'])
+        if backfilled:
+            logging.info(f'已补建全文检索索引: {len(backfilled)} 条')
+        return backfilled
+
+    def _videos_changed(self, row, dir_stats):
+        """视频是否被新增、删除或改写"""
+        for prefix in ('screen', 'webcam'):
+            stat_result = self._video_stat(row[f'{prefix}_video_path'], dir_stats)
+            signature = _file_signature(stat_result) if stat_result is not None else None
+            if signature != row[f'{prefix}_signature']:
+                return True
+        return False
+
+    # ---------- 查询 ----------
+
+    def _where(self, start_time=None, end_time=None, keyword=None, has_video=None):
+        clauses, params = [], []
+        if start_time is not None:
+            clauses.append('timestamp >= ?')
+            params.append(start_time)
+        if end_time is not None:
+            clauses.append('timestamp <= ?')
+            params.append(end_time)
+        if keyword:
+            if self.search_index.available:
+                clause, clause_params = self.search_index.match_clause(keyword)
+            else:
+                clause = "(instr(lower(question_content), ?) > 0 OR instr(lower(coalesce(user_input, '')), ?) > 0)"
+                clause_params = [keyword.lower(), keyword.lower()]
+            if clause is None:
+                # 关键词中没有可检索的内容，不返回任何记录
+                clause = '0'
+            clauses.append(clause)
+            params.extend(clause_params)
+        if has_video:
+            clauses.append('(screen_exists = 1 OR webcam_exists = 1)')
+        where = (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+        return where, params
+
+    def count(self, **filters):
+        """符合条件的记录数（筛选参数同query）"""
+        where, params = self._where(**filters)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM sessions{where}', params).fetchone()[0]
+
+    def query(self, offset=0, limit=100, order_by='timestamp', descending=True, **filters):
+        """分页查询记录摘要
+
+        Args:
+            offset, limit: 分页参数
+            order_by: 排序列（见SORTABLE_COLUMNS）；传入keyword时可用ORDER_BY_RELEVANCE按相关度排序
+            descending: 是否倒序
+            start_time, end_time: 保存时间范围（时间戳）
+            keyword: 检索关键词（匹配题目内容、最终输入和采集过程中的输入）
+            has_video: 只返回有视频的记录
+        Returns:
+            list: dict列表，question字段为完整题目信息
+        """
+        if order_by == ORDER_BY_RELEVANCE:
+            return self._query_by_relevance(offset, limit, **filters)
+        if order_by not in SORTABLE_COLUMNS:
+            raise ValueError(f'不支持的排序列: {order_by}')
+        where, params = self._where(**filters)
+        direction = 'DESC' if descending else 'ASC'
+        sql = (f'SELECT * FROM sessions{where} ORDER BY {order_by} {direction}, path {direction} '
+               f'LIMIT ? OFFSET ?')
+        with self._lock:
+            rows = self._conn.execute(sql, params + [limit, offset]).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def _query_by_relevance(self, offset, limit, keyword=None, **filters):
+        """按bm25相关度排序的查询，相关度相同时新记录优先"""
+        source, source_params = self.search_index.rank_source(keyword) if (
+            keyword and self.search_index.available) else (None, [])
+        if source is None:
+            return self.query(offset, limit, 'timestamp', True, keyword=keyword, **filters)
+        where, params = self._where(**filters)
+        sql = (f'SELECT sessions.* FROM sessions JOIN {source} AS ranked ON ranked.path = sessions.path'
+               f'{where} ORDER BY ranked.score ASC, timestamp DESC LIMIT ? OFFSET ?')
+        with self._lock:
+            rows = self._conn.execute(sql, source_params + params + [limit, offset]).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def search(self, keyword, offset=0, limit=100, **filters):
+        """全文检索，按相关度返回记录摘要"""
+        return self.query(offset, limit, ORDER_BY_RELEVANCE, keyword=keyword, **filters)
+
+    def question_exposure_counts(self):
+        """各题目已采集的记录数 {question_id: 次数}"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT question_id, COUNT(*) FROM sessions WHERE question_id IS NOT NULL GROUP BY question_id'
+            ).fetchall()
+        return {question_id: count for question_id, count in rows}
+
+    def matches(self, path, **filters):
+        """记录是否符合筛选条件（参数同query）"""
+        where, params = self._where(**filters)
+        where = (where + ' AND path = ?') if where else ' WHERE path = ?'
+        with self._lock:
+            return self._conn.execute(f'SELECT 1 FROM sessions{where}', params + [path]).fetchone() is not None
+
+    def get(self, path):
+        """按路径获取一条记录摘要"""
+        row = self._get_row(path)
+        return self._row_to_dict(row) if row else None
+
+    @staticmethod
+    def _row_to_dict(row):
+        record = dict(row)
+        question_json = record.pop('question_json', None)
+        record['question'] = json.loads(question_json) if question_json else {}
+        record['screen_exists'] = bool(record['screen_exists'])
+        record['webcam_exists'] = bool(record['webcam_exists'])
+        return record
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def open_catalog(data_dir='data'):
+    """获取数据目录对应的会话目录索引（同一目录共享一个实例）"""
+    key = os.path.abspath(data_dir)
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = SessionCatalog(data_dir)
+            _catalogs[key] = catalog
+        return catalog
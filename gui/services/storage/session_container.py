@@ -0,0 +1,371 @@
+import os
+import json
+import zlib
+import struct
+import logging
+
+import numpy as np
+
+# 二进制会话容器文件后缀：data/sample_<ts>.ersc
+CONTAINER_SUFFIX = '.ersc'
+
+MAGIC = b'ERSC'
+FORMAT_VERSION = 1
+
+# 固定头部：魔数、版本、保留、题目ID、录制开始时间、保存时间、各类计数、两个视频路径
+_HEADER = struct.Struct('<4sHHqddIIII256s256s')
+# 段表项：名称、偏移、存储长度、原始长度、编码、类型
+_SECTION = struct.Struct('<16sQQQBB6x')
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+
+KIND_JSON = 0
+KIND_ARRAY = 1
+
+# 段名称
+SECTION_QUESTION = 'question'
+SECTION_SUMMARY = 'summary'
+SECTION_STRINGS = 'strings'
+SECTION_CONTENTS = 'contents'
+SECTION_KEYSTROKES = 'keystrokes'
+SECTION_IME_EVENTS = 'ime_events'
+SECTION_RAW_KEYSTROKES = 'raw_keystrokes'
+
+# 输入框按键（物理按键、释放）与输入法事件共用的结构
+# seq为在原keystrokes列表中的位置，用于把两个段还原为原顺序
+KEYSTROKE_DTYPE = np.dtype([
+    ('seq', '<u4'),
+    ('key_name', '<i4'),  # 字符串键名在strings中的下标，数字键码时为-1
+    ('key_code', '<i8'),  # 数字键码，字符串键名时为-1
+    ('timestamp', '<f8'),
+    ('absolute_timestamp', '<f8'),
+    ('text', '<i4'),  # strings下标
+    ('content', '<i4'),  # contents下标，无内容时为-1
+])
+
+RAW_KEYSTROKE_DTYPE = np.dtype([
+    ('type', '<i4'),  # strings下标（PRESS/RELEASE）
+    ('modifiers', '<i4'),  # strings下标
+    ('key_code', '<i8'),  # 无键码时为-1
+    ('timestamp', '<f8'),
+    ('absolute_timestamp', '<f8'),
+    ('key_text', '<i4'),  # strings下标
+    ('content', '<i4'),  # contents下标，无内容时为-1
+])
+
+_ARRAY_DTYPES = {
+    SECTION_KEYSTROKES: KEYSTROKE_DTYPE,
+    SECTION_IME_EVENTS: KEYSTROKE_DTYPE,
+    SECTION_RAW_KEYSTROKES: RAW_KEYSTROKE_DTYPE,
+}
+
+# 输入法相关的伪按键前缀
+IME_KEY_PREFIXES = ('COMPOSITION_', 'COMMIT_', 'CANDIDATE_', 'IME')
+
+_HEADER_FIELDS = ('question', 'recording_start_time', 'timestamp', 'screen_video_path',
+                  'webcam_video_path', 'keystrokes', 'raw_keystrokes')
+
+
+def is_ime_key(key):
+    """是否为输入法事件（COMPOSITION_/COMMIT_等伪按键）"""
+    return isinstance(key, str) and key.startswith(IME_KEY_PREFIXES)
+
+
+class _StringTable:
+    """去重字符串表"""
+
+    def __init__(self):
+        self.items = []
+        self._index = {}
+
+    def add(self, value):
+        if value is None:
+            return -1
+        value = str(value)
+        index = self._index.get(value)
+        if index is None:
+            index = len(self.items)
+            self._index[value] = index
+            self.items.append(value)
+        return index
+
+
+def _encode_path(path):
+    data = (path or '').encode('utf-8')
+    if len(data) > 256:
+        logging.warning(f'路径过长，头部中将被截断（完整路径保存在summary段）: {path}')
+    return data[:256]
+
+
+def _decode_path(data):
+    return data.rstrip(b'\0').decode('utf-8', errors='ignore') or None
+
+
+def _int_or(value, default=-1):
+    return value if isinstance(value, int) and not isinstance(value, bool) else default
+
+
+def _float_or_nan(value):
+    return float(value) if value is not None else float('nan')
+
+
+def write_session_container(path, record, compress=True):
+    """把会话记录写成二进制容器
+
+    Args:
+        path: 输出路径
+        record: 与JSON记录格式相同的会话数据（需包含keystrokes/raw_keystrokes）
+        compress: 是否压缩JSON和文本段（数值段始终不压缩，以便内存映射）
+    """
+    strings = _StringTable()
+    contents = _StringTable()
+    keystrokes = record.get('keystrokes') or []
+    raw_keystrokes = record.get('raw_keystrokes') or []
+
+    ime_rows, key_rows = [], []
+    for seq, k in enumerate(keystrokes):
+        key = k.get('key')
+        row = (
+            seq,
+            strings.add(key) if isinstance(key, str) else -1,
+            _int_or(key),
+            _float_or_nan(k.get('timestamp')),
+            _float_or_nan(k.get('absolute_timestamp')),
+            strings.add(k.get('text', '')),
+            contents.add(k.get('input_content')),
+        )
+        (ime_rows if is_ime_key(key) else key_rows).append(row)
+
+    raw_rows = [(
+        strings.add(k.get('type', '')),
+        strings.add(k.get('modifiers', '')),
+        _int_or(k.get('key_code')),
+        _float_or_nan(k.get('timestamp')),
+        _float_or_nan(k.get('absolute_timestamp')),
+        strings.add(k.get('key_text', '')),
+        contents.add(k.get('input_content')),
+    ) for k in raw_keystrokes]
+
+    question = record.get('question') or {}
+    summary = {k: v for k, v in record.items() if k not in _HEADER_FIELDS}
+    summary['screen_video_path'] = record.get('screen_video_path')
+    summary['webcam_video_path'] = record.get('webcam_video_path')
+
+    text_codec = CODEC_ZLIB if compress else CODEC_NONE
+    sections = [
+        (SECTION_QUESTION, KIND_JSON, text_codec, _json_bytes(question)),
+        (SECTION_SUMMARY, KIND_JSON, text_codec, _json_bytes(summary)),
+        (SECTION_STRINGS, KIND_JSON, text_codec, _json_bytes(strings.items)),
+        (SECTION_CONTENTS, KIND_JSON, text_codec, _json_bytes(contents.items)),
+        (SECTION_KEYSTROKES, KIND_ARRAY, CODEC_NONE, np.array(key_rows, dtype=KEYSTROKE_DTYPE).tobytes()),
+        (SECTION_IME_EVENTS, KIND_ARRAY, CODEC_NONE, np.array(ime_rows, dtype=KEYSTROKE_DTYPE).tobytes()),
+        (SECTION_RAW_KEYSTROKES, KIND_ARRAY, CODEC_NONE, np.array(raw_rows, dtype=RAW_KEYSTROKE_DTYPE).tobytes()),
+    ]
+
+    question_id = question.get('id') if isinstance(question, dict) else None
+    header = _HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0,
+        _int_or(question_id),
+        _float_or_nan(record.get('recording_start_time')),
+        _float_or_nan(record.get('timestamp')),
+        len(key_rows), len(ime_rows), len(raw_rows), len(sections),
+        _encode_path(record.get('screen_video_path')),
+        _encode_path(record.get('webcam_video_path')),
+    )
+
+    offset = _align(_HEADER.size + _SECTION.size * len(sections))
+    table, payloads = [], []
+    for name, kind, codec, raw in sections:
+        stored = zlib.compress(raw) if codec == CODEC_ZLIB else raw
+        table.append(_SECTION.pack(name.encode('ascii'), offset, len(stored), len(raw), codec, kind))
+        payloads.append((offset, stored))
+        offset = _align(offset + len(stored))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(b''.join(table))
+        for section_offset, stored in payloads:
+            f.seek(section_offset)
+            f.write(stored)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _json_bytes(value):
+    return json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+
+def _align(offset, alignment=8):
+    """数值段按8字节对齐，便于内存映射后直接按结构访问"""
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class SessionContainer:
+    """二进制会话容器读取器
+
+    打开时只读取固定头部和段表；各段按需读取，数值段通过np.memmap映射，
+    不压缩时不会把整段读入内存。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                raise ValueError(f'会话容器头部不完整: {path}')
+            fields = _HEADER.unpack(header)
+            if fields[0] != MAGIC:
+                raise ValueError(f'不是会话容器文件: {path}')
+            if fields[1] > FORMAT_VERSION:
+                raise ValueError(f'不支持的会话容器版本 {fields[1]}: {path}')
+            section_count = fields[9]
+            table = f.read(_SECTION.size * section_count)
+
+        self.header = {
+            'version': fields[1],
+            'question_id': fields[3] if fields[3] >= 0 else None,
+            'recording_start_time': None if np.isnan(fields[4]) else fields[4],
+            'timestamp': None if np.isnan(fields[5]) else fields[5],
+            'keystroke_count': fields[6],
+            'ime_event_count': fields[7],
+            'raw_keystroke_count': fields[8],
+            'screen_video_path': _decode_path(fields[10]),
+            'webcam_video_path': _decode_path(fields[11]),
+        }
+        self.sections = {}
+        for i in range(section_count):
+            name, offset, stored_length, raw_length, codec, kind = _SECTION.unpack_from(table, i * _SECTION.size)
+            self.sections[name.rstrip(b'\0').decode('ascii')] = (offset, stored_length, raw_length, codec, kind)
+        self._cache = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """释放已加载的段"""
+        self._cache.clear()
+
+    def section_names(self):
+        """容器中的段名称"""
+        return list(self.sections)
+
+    def _read_bytes(self, name):
+        offset, stored_length, raw_length, codec, kind = self.sections[name]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(stored_length)
+        if codec == CODEC_ZLIB:
+            data = zlib.decompress(data)
+        return data
+
+    def read_json(self, name):
+        """读取JSON段（结果缓存）"""
+        if name not in self._cache:
+            self._cache[name] = json.loads(self._read_bytes(name).decode('utf-8'))
+        return self._cache[name]
+
+    def array(self, name):
+        """读取数值段，未压缩时返回只读内存映射"""
+        if name in self._cache:
+            return self._cache[name]
+        dtype = _ARRAY_DTYPES[name]
+        offset, stored_length, raw_length, codec, kind = self.sections[name]
+        count = raw_length // dtype.itemsize
+        if count == 0:
+            arr = np.zeros(0, dtype=dtype)
+        elif codec == CODEC_NONE:
+            arr = np.memmap(self.path, dtype=dtype, mode='r', offset=offset, shape=(count,))
+        else:
+            arr = np.frombuffer(self._read_bytes(name), dtype=dtype)
+        self._cache[name] = arr
+        return arr
+
+    def question(self):
+        """题目信息"""
+        return self.read_json(SECTION_QUESTION)
+
+    def summary(self):
+        """会话摘要（不读取任何按键段）"""
+        summary = dict(self.read_json(SECTION_SUMMARY))
+        summary.update({
+            'recording_start_time': self.header['recording_start_time'],
+            'timestamp': self.header['timestamp'],
+            'keystroke_count': self.header['keystroke_count'] + self.header['ime_event_count'],
+            'raw_keystroke_count': self.header['raw_keystroke_count'],
+        })
+        summary.setdefault('screen_video_path', self.header['screen_video_path'])
+        summary.setdefault('webcam_video_path', self.header['webcam_video_path'])
+        return summary
+
+    def keystrokes(self, include_ime=True):
+        """还原输入框按键记录（dict列表，与JSON格式一致）"""
+        strings = self.read_json(SECTION_STRINGS)
+        contents = self.read_json(SECTION_CONTENTS)
+        arrays = [self.array(SECTION_KEYSTROKES)]
+        if include_ime:
+            arrays.append(self.array(SECTION_IME_EVENTS))
+        rows = np.concatenate(arrays) if len(arrays) > 1 else arrays[0]
+        rows = rows[np.argsort(rows['seq'], kind='stable')]
+        result = []
+        for row in rows:
+            key = strings[row['key_name']] if row['key_name'] >= 0 else int(row['key_code'])
+            result.append({
+                'key': key,
+                'text': strings[row['text']] if row['text'] >= 0 else '',
+                'timestamp': _nan_to_none(row['timestamp']),
+                'absolute_timestamp': _nan_to_none(row['absolute_timestamp']),
+                'input_content': contents[row['content']] if row['content'] >= 0 else None,
+            })
+        return result
+
+    def raw_keystrokes(self):
+        """还原底层按键记录"""
+        strings = self.read_json(SECTION_STRINGS)
+        contents = self.read_json(SECTION_CONTENTS)
+        result = []
+        for row in self.array(SECTION_RAW_KEYSTROKES):
+            result.append({
+                'type': strings[row['type']] if row['type'] >= 0 else '',
+                'key_code': int(row['key_code']) if row['key_code'] >= 0 else None,
+                'key_text': strings[row['key_text']] if row['key_text'] >= 0 else '',
+                'modifiers': strings[row['modifiers']] if row['modifiers'] >= 0 else '',
+                'timestamp': _nan_to_none(row['timestamp']),
+                'absolute_timestamp': _nan_to_none(row['absolute_timestamp']),
+                'input_content': contents[row['content']] if row['content'] >= 0 else None,
+            })
+        return result
+
+    def to_record(self, sections=None):
+        """还原为会话记录
+        Args:
+            sections: 需要的按键段，如 ['keystrokes']；为None时读取全部
+        """
+        record = self.summary()
+        record['question'] = self.question()
+        if sections is None or SECTION_KEYSTROKES in sections:
+            record['keystrokes'] = self.keystrokes()
+        if sections is None or SECTION_RAW_KEYSTROKES in sections:
+            record['raw_keystrokes'] = self.raw_keystrokes()
+        return record
+
+
+def _nan_to_none(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def convert_json_to_container(json_path, output_path=None, compress=True):
+    """把现有的JSON会话记录（含清单+会话日志格式）转换为二进制容器"""
+    from .session_store import load_session_record
+
+    record = load_session_record(json_path)
+    if output_path is None:
+        output_path = os.path.splitext(json_path)[0] + CONTAINER_SUFFIX
+    write_session_container(output_path, record, compress=compress)
+    logging.info(f'已转换会话记录: {json_path} -> {output_path}')
+    return output_path
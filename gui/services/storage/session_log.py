@@ -0,0 +1,232 @@
+import os
+import json
+import logging
+import threading
+import time
+
+# 会话日志文件后缀：data/sample_<ts>.session.jsonl
+SESSION_LOG_SUFFIX = '.session.jsonl'
+
+# 日志条目类型
+ENTRY_HEADER = 'header'
+ENTRY_META = 'meta'
+ENTRY_KEYSTROKE = 'keystroke'
+ENTRY_RAW_KEYSTROKE = 'raw_keystroke'
+ENTRY_FOOTER = 'footer'
+# 用户主动放弃（换题、退出）的会话，恢复时跳过
+ENTRY_ABORTED = 'aborted'
+
+# 按键条目类型 -> 记录中的字段名
+_ENTRY_SOURCES = {
+    ENTRY_KEYSTROKE: 'keystrokes',
+    ENTRY_RAW_KEYSTROKE: 'raw_keystrokes',
+}
+
+
+class SessionLogWriter:
+    """会话预写日志（追加写入的JSON Lines）
+
+    采集开始时打开，按键记录先放入内存队列，由后台线程每隔flush_interval秒
+    成组写入并落盘。程序崩溃时最多丢失最后一个写入周期的数据；
+    提交时只需追加一条footer。
+
+    每行格式: {"entry": 条目类型, "data": 内容}
+    """
+
+    def __init__(self, path, prepare=None, flush_interval=0.3, sync=True):
+        """
+        Args:
+            path: 日志文件路径
+            prepare: 序列化前对记录做处理的回调（在写入线程中调用，返回新dict）
+            flush_interval: 成组写入间隔（秒）
+            sync: 每组写入后是否fsync
+        """
+        self.path = path
+        self.prepare = prepare
+        self.flush_interval = flush_interval
+        self.sync = sync
+        self._file = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def open(self, header):
+        """创建日志文件并写入header"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self.append(ENTRY_HEADER, header)
+        self.flush()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logging.debug(f'会话日志已打开: {self.path}')
+
+    def is_open(self):
+        """日志是否处于打开状态"""
+        return self._file is not None
+
+    def append(self, entry_type, data):
+        """追加条目（只入队，不做IO，可从任意线程调用）"""
+        with self._lock:
+            self._pending.append((entry_type, data))
+
+    def flush(self):
+        """把队列中的条目成组写入磁盘"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        with self._write_lock:
+            if self._file is None:
+                return
+            lines = []
+            for entry_type, data in pending:
+                if self.prepare is not None and entry_type in _ENTRY_SOURCES:
+                    data = self.prepare(data)
+                lines.append(json.dumps({'entry': entry_type, 'data': data}, ensure_ascii=False))
+            self._file.write('\n'.join(lines) + '\n')
+            self._file.flush()
+            if self.sync:
+                os.fsync(self._file.fileno())
+
+    def close(self, footer=None):
+        """关闭日志
+        Args:
+            footer: 提交时的尾部信息；为None表示日志保持未完成状态（与崩溃相同，下次启动时会被恢复）
+        """
+        self._close(ENTRY_FOOTER, footer)
+
+    def abort(self, reason=None):
+        """放弃本次会话：追加aborted条目后关闭，恢复时不会为它补写清单"""
+        self._close(ENTRY_ABORTED, {'reason': reason, 'aborted_at': time.time()})
+
+    def _close(self, entry_type, data):
+        if self._file is None:
+            return
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if data is not None:
+            self.append(entry_type, data)
+        self.flush()
+        with self._write_lock:
+            self._file.close()
+            self._file = None
+        logging.debug(f'会话日志已关闭: {self.path}, 结束条目={entry_type if data is not None else None}')
+
+    def _run(self):
+        """后台写入线程"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error(f'会话日志写入失败: {e}')
+
+
+def iter_session_log(path):
+    """逐条读取会话日志，跳过崩溃时写了一半的行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                logging.warning(f'会话日志第{line_no}行损坏，已跳过: {path}')
+                continue
+            yield item.get('entry'), item.get('data')
+
+
+def recover_session(path):
+    """从（可能不完整的）会话日志重建完整的会话记录
+
+    Returns:
+        dict: 与原JSON记录格式相同的会话数据；日志缺少footer时 recovered=True，
+        被放弃的会话 aborted=True
+    """
+    # 模型层依赖本模块，这里延迟导入避免循环引用
+    from ...models.event_log import EventLog, SOURCE_INPUT, SOURCE_RAW
+
+    record = {}
+    event_log = EventLog()
+    footer = None
+    aborted = False
+    for entry_type, data in iter_session_log(path):
+        if entry_type in (ENTRY_HEADER, ENTRY_META):
+            record.update(data or {})
+        elif entry_type in _ENTRY_SOURCES:
+            event_log.append(_ENTRY_SOURCES[entry_type], data)
+        elif entry_type == ENTRY_FOOTER:
+            footer = data or {}
+        elif entry_type == ENTRY_ABORTED:
+            aborted = True
+
+    record['keystrokes'] = list(event_log.buffer(SOURCE_INPUT))
+    record['raw_keystrokes'] = list(event_log.buffer(SOURCE_RAW))
+    if footer is not None:
+        record.update(footer)
+        record['recovered'] = False
+    else:
+        # 未提交的会话：用最后一个事件的输入内容作为用户输入
+        last_content = ''
+        for event in event_log.iter_events():
+            if event.get('input_content') is not None:
+                last_content = event['input_content']
+        record.setdefault('user_input', last_content)
+        record.setdefault('timestamp', os.path.getmtime(path))
+        record['recovered'] = True
+    if aborted:
+        record['aborted'] = True
+    record['session_log'] = path
+    return record
+
+
+def manifest_path_for(log_path):
+    """会话日志对应的清单JSON路径"""
+    if log_path.endswith(SESSION_LOG_SUFFIX):
+        return log_path[:-len(SESSION_LOG_SUFFIX)] + '.json'
+    return os.path.splitext(log_path)[0] + '.json'
+
+
+def is_aborted_session(path):
+    """会话日志是否以aborted条目结束（用户主动放弃的会话）"""
+    last_entry = None
+    for entry_type, _ in iter_session_log(path):
+        last_entry = entry_type
+    return last_entry == ENTRY_ABORTED
+
+
+def recover_incomplete_sessions(data_dir='data'):
+    """为没有清单的会话日志（上次崩溃遗留）补写清单，使其可以被回放
+
+    被放弃的会话（以aborted条目结束）不是崩溃，跳过。
+
+    Returns:
+        list: 已恢复的清单路径
+    """
+    from .session_store import write_session_manifest
+
+    recovered = []
+    if not os.path.isdir(data_dir):
+        return recovered
+    for fname in os.listdir(data_dir):
+        if not fname.endswith(SESSION_LOG_SUFFIX):
+            continue
+        log_path = os.path.join(data_dir, fname)
+        manifest_path = manifest_path_for(log_path)
+        if os.path.exists(manifest_path):
+            continue
+        try:
+            if is_aborted_session(log_path):
+                continue
+            record = recover_session(log_path)
+            write_session_manifest(manifest_path, record)
+            recovered.append(manifest_path)
+            logging.info(f'已从会话日志恢复记录: {manifest_path}')
+        except Exception as e:
+            logging.error(f'恢复会话日志失败 {log_path}: {e}')
+    return recovered
@@ -0,0 +1,175 @@
+import re
+import sqlite3
+import logging
+
+from .session_container import CONTAINER_SUFFIX, SessionContainer, SECTION_CONTENTS
+from .session_store import load_session_record
+from ..text_diff import text_delta
+
+# 中日韩字符（按字二元组切分）
+_CJK_RANGES = '぀-ヿ㐀-䶿一-鿿가-힯豈-﫿'
+# CJK连续片段，或其他文字/数字组成的单词
+_TOKEN_PATTERN = re.compile(f'[{_CJK_RANGES}]+|[^\\W_{_CJK_RANGES}]+')
+_CJK_PATTERN = re.compile(f'[{_CJK_RANGES}]')
+# 能出现在词元中的字符；词元不会跨越其他字符
+_TOKEN_CHAR_PATTERN = re.compile(f'[{_CJK_RANGES}]|[^\\W_]')
+
+_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS session_text USING fts5(
+    path UNINDEXED,
+    question,
+    user_input,
+    typed_text,
+    tokenize = 'unicode61'
+)
+"""
+
+# 各列的bm25权重：题目、最终输入、中间输入
+_COLUMN_WEIGHTS = (2.0, 3.0, 1.0)
+
+
+def tokenize(text):
+    """切分检索词元
+
+    中文（及日文、韩文）连续片段切为字二元组，并把片段最后一个字作为单字词元，
+    这样每个字的位置都是某个词元的开头，单字查询可用前缀匹配；
+    其他文字按单词切分并转为小写。
+    """
+    tokens = []
+    for match in _TOKEN_PATTERN.finditer((text or '').lower()):
+        run = match.group()
+        if _CJK_PATTERN.match(run):
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+            tokens.append(run[-1])
+        else:
+            tokens.append(run)
+    return tokens
+
+
+def _document(texts):
+    """把多段文本切分为去重后的词元串（保留首次出现的顺序）"""
+    seen = {}
+    for text in texts:
+        for token in tokenize(text):
+            seen.setdefault(token, None)
+    return ' '.join(seen)
+
+
+def build_match_query(text):
+    """把用户输入的关键词转为FTS5查询（各词元取交集）
+
+    中文按二元组精确匹配（单字用前缀匹配），英文单词用前缀匹配。
+    Returns:
+        str: 查询表达式；关键词中没有可检索的内容时为None
+    """
+    terms = []
+    for match in _TOKEN_PATTERN.finditer((text or '').lower()):
+        run = match.group()
+        if _CJK_PATTERN.match(run):
+            if len(run) == 1:
+                terms.append(f'"{run}"*')
+            else:
+                terms.extend(f'"{run[i:i + 2]}"' for i in range(len(run) - 1))
+        else:
+            terms.append(f'"{run}"*')
+    return ' '.join(dict.fromkeys(terms)) or None
+
+
+def changed_fragments(texts):
+    """依次比较相邻的输入框内容，返回每次修改涉及的片段
+
+    片段是修改位置向两侧扩展到非词元字符为止的文本，包含了所有因这次修改而新出现的词元；
+    没有变化的部分已在之前的内容中出现过。这样每个快照只切分修改附近的几个字，
+    而不是整段重新切词。
+    """
+    fragments = []
+    previous = ''
+    for text in texts:
+        if text == previous:
+            continue
+        position, _, added = text_delta(previous, text)
+        start, end = position, position + len(added)
+        # 插入文本两端是分隔符时，相邻的词元没有变化，不必扩展
+        if not added or _TOKEN_CHAR_PATTERN.match(added[0]):
+            while start > 0 and _TOKEN_CHAR_PATTERN.match(text[start - 1]):
+                start -= 1
+        if not added or _TOKEN_CHAR_PATTERN.match(added[-1]):
+            while end < len(text) and _TOKEN_CHAR_PATTERN.match(text[end]):
+                end += 1
+        if start < end:
+            fragments.append(text[start:end])
+        previous = text
+    return fragments
+
+
+def collect_typed_texts(path):
+    """收集一条会话记录中输入过的文本片段（含被删除的中间输入，见changed_fragments）"""
+    if path.endswith(CONTAINER_SUFFIX):
+        with SessionContainer(path) as container:
+            return changed_fragments(container.read_json(SECTION_CONTENTS))
+    record = load_session_record(path)
+    contents = []
+    for field in ('keystrokes', 'raw_keystrokes'):
+        for event in record.get(field) or []:
+            content = event.get('input_content')
+            if content is not None:
+                contents.append(content)
+    return changed_fragments(contents)
+
+
+class SessionSearchIndex:
+    """会话全文检索索引（SQLite FTS5倒排索引，与目录索引存放在同一数据库中）
+
+    索引题目内容、最终用户输入和采集过程中出现过的输入内容，按bm25排序。
+    切词在Python中完成（见tokenize），FTS5只按空白切分预先生成的词元。
+    """
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+        self.available = True
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(_SCHEMA)
+        except sqlite3.OperationalError as e:
+            # 部分SQLite构建没有FTS5，此时退回到目录索引的子串匹配
+            logging.warning(f'SQLite不支持FTS5，全文检索不可用: {e}')
+            self.available = False
+
+    def update(self, path, question_content, user_input, typed_texts):
+        """写入（或替换）一条记录的检索文本"""
+        if not self.available:
+            return
+        row = (path, _document([question_content]), _document([user_input]), _document(typed_texts))
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM session_text WHERE path = ?', (path,))
+            self._conn.execute(
+                'INSERT INTO session_text (path, question, user_input, typed_text) VALUES (?, ?, ?, ?)', row
+            )
+
+    def remove(self, paths):
+        """删除记录的检索文本"""
+        if not self.available:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany('DELETE FROM session_text WHERE path = ?', [(p,) for p in paths])
+
+    def match_clause(self, keyword):
+        """生成筛选子句（供目录索引查询拼接）
+
+        Returns:
+            tuple: (SQL条件, 参数列表)；关键词无可检索内容时为 (None, [])
+        """
+        query = build_match_query(keyword)
+        if query is None:
+            return None, []
+        return 'path IN (SELECT path FROM session_text WHERE session_text MATCH ?)', [query]
+
+    def rank_source(self, keyword):
+        """生成带相关度的子查询（score越小越相关）"""
+        query = build_match_query(keyword)
+        if query is None:
+            return None, []
+        weights = ', '.join(str(w) for w in _COLUMN_WEIGHTS)
+        return (f'(SELECT path, bm25(session_text, 0.0, {weights}) AS score '
+                f'FROM session_text WHERE session_text MATCH ?)'), [query]
@@ -0,0 +1,67 @@
+import os
+import json
+import logging
+
+from .session_log import recover_session
+from .session_container import CONTAINER_SUFFIX, SessionContainer
+
+# 可作为会话记录打开的文件后缀
+SESSION_RECORD_SUFFIXES = ('.json', CONTAINER_SUFFIX)
+
+
+def is_session_record_file(fname):
+    """文件名是否为会话记录（清单JSON或二进制容器）"""
+    return fname.endswith(SESSION_RECORD_SUFFIXES) and not fname.endswith('.tmp')
+
+
+def write_session_manifest(path, record):
+    """写入会话清单（不含按键明细的小JSON，按键明细保存在会话日志中）"""
+    manifest = {k: v for k, v in record.items() if k not in ('keystrokes', 'raw_keystrokes')}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_session_record(path):
+    """加载会话记录
+
+    兼容三种格式：
+    - 旧格式：JSON中直接包含 keystrokes / raw_keystrokes
+    - 清单格式：JSON只包含摘要，按键明细从 session_log 指向的会话日志读取
+    - 二进制容器（.ersc）
+    """
+    if path.endswith(CONTAINER_SUFFIX):
+        with SessionContainer(path) as container:
+            return container.to_record()
+    with open(path, 'r', encoding='utf-8') as f:
+        record = json.load(f)
+    log_path = record.get('session_log')
+    if log_path and 'keystrokes' not in record:
+        if os.path.exists(log_path):
+            events = recover_session(log_path)
+            record['keystrokes'] = events.get('keystrokes', [])
+            record['raw_keystrokes'] = events.get('raw_keystrokes', [])
+        else:
+            logging.warning(f'会话日志不存在: {log_path}')
+            record['keystrokes'] = []
+            record['raw_keystrokes'] = []
+    return record
+
+
+def load_session_summary(path):
+    """只加载会话摘要（题目、用户输入、时间、视频路径），不读取按键明细
+
+    二进制容器只读取头部和题目/摘要段；清单格式本身就是摘要。
+    """
+    if path.endswith(CONTAINER_SUFFIX):
+        with SessionContainer(path) as container:
+            summary = container.summary()
+            summary['question'] = container.question()
+            return summary
+    with open(path, 'r', encoding='utf-8') as f:
+        record = json.load(f)
+    record.pop('keystrokes', None)
+    record.pop('raw_keystrokes', None)
+    return record
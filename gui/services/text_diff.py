@@ -0,0 +1,31 @@
+# 文本增量（存储层的全文检索切词和回放层的答题框回放共用）
+
+
+def text_delta(old, new):
+    """把old变为new的单个增量 (位置, 删除长度, 插入文本)
+
+    公共前缀用切片比较二分查找，比逐字符比较快得多；公共后缀不与前缀重叠。
+    """
+    limit = min(len(old), len(new))
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[:mid] == new[:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    prefix = lo
+    lo, hi = 0, limit - prefix
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old[len(old) - mid:] == new[len(new) - mid:]:
+            lo = mid
+        else:
+            hi = mid - 1
+    suffix = lo
+    return prefix, len(old) - prefix - suffix, new[prefix:len(new) - suffix]
+
+
+def apply_delta(text, delta):
+    position, removed, added = delta
+    return text[:position] + added + text[position + removed:]
@@ -132,6 +132,10 @@ class CollectView(QWidget):
         """获取输入框对象"""
         return self.input_section.input_box
     
+    def get_input_document(self):
+        """获取输入框文档对象"""
+        return self.input_section.input_box.document()
+    
     def install_input_event_filter(self, event_filter_object):
         """安装输入框事件过滤器"""
         self.input_section.install_event_filter(event_filter_object)
@@ -1,25 +1,64 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QListWidget, QLabel, QPushButton
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton, QTableView, QAbstractItemView, QHeaderView
+from PyQt5.QtCore import Qt, pyqtSignal
 import os
-import json
 from .playback_view import PlaybackView
+from ...services.storage.session_store import load_session_record
+from ...services.storage.session_catalog import open_catalog
+from ...services.storage.data_watcher import DataDirectoryWatcher
+from ...models.session_table_model import SessionTableModel
+from ...widgets.button_delegate import ButtonDelegate
 
 class RecordSelectorWidget(QWidget):
-    def __init__(self, parent=None):
+    # 选中记录（记录文件路径）
+    record_activated = pyqtSignal(str)
+    # 表格列（见SessionTableModel.COLUMNS）
+    TABLE_COLUMNS = ['time', 'file', 'question', 'duration', 'action']
+
+    def __init__(self, parent=None, data_dir='data'):
         super().__init__(parent)
+        self.data_dir = data_dir
+        self.catalog = None
+        self.watcher = None
         layout = QVBoxLayout()
         layout.addWidget(QLabel('请选择要回放的记录：'))
-        self.list_widget = QListWidget()
-        layout.addWidget(self.list_widget)
+        # 按需分页加载的表格，排序由目录索引查询完成
+        self.model = SessionTableModel(columns=self.TABLE_COLUMNS, parent=self)
+        self.table_view = QTableView()
+        self.table_view.setModel(self.model)
+        self.table_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table_view.verticalHeader().hide()
+        self.table_view.verticalHeader().setDefaultSectionSize(30)
+        header = self.table_view.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(self.TABLE_COLUMNS.index('question'), QHeaderView.Stretch)
+        header.setSortIndicator(0, Qt.DescendingOrder)
+        self.table_view.setSortingEnabled(True)
+        self.play_delegate = ButtonDelegate(self.table_view)
+        self.play_delegate.clicked.connect(self._on_index_activated)
+        self.table_view.setItemDelegateForColumn(self.TABLE_COLUMNS.index('action'), self.play_delegate)
+        self.table_view.doubleClicked.connect(self._on_index_activated)
+        layout.addWidget(self.table_view)
         self.setLayout(layout)
         self.load_records()
     def load_records(self):
-        self.list_widget.clear()
-        data_dir = 'data'
-        if not os.path.exists(data_dir):
+        """先显示目录索引中已有的记录，再在后台同步目录索引，完成后重新查询"""
+        if not os.path.exists(self.data_dir):
             return
-        for fname in os.listdir(data_dir):
-            if fname.endswith('.json'):
-                self.list_widget.addItem(fname)
+        if self.catalog is None:
+            self.catalog = open_catalog(self.data_dir)
+            self.model.set_catalog(self.catalog)
+        if self.watcher is None:
+            # 新采集或删除的记录由目录监视逐行更新到列表
+            self.watcher = DataDirectoryWatcher(self.catalog, parent=self)
+            self.watcher.sessions_changed.connect(self.model.apply_changes)
+            self.watcher.scan_finished.connect(self._on_scan_finished)
+        self.watcher.scan()
+    def _on_scan_finished(self, updated, removed):
+        if updated or removed:
+            self.model.refresh()
+    def _on_index_activated(self, index):
+        self.record_activated.emit(self.model.record(index.row())['path'])
 
 class PlaybackPage(QWidget):
     def __init__(self, parent=None):
@@ -30,14 +69,13 @@ class PlaybackPage(QWidget):
         self.layout = QVBoxLayout()
         self.layout.addWidget(self.selector)
         self.setLayout(self.layout)
-        self.selector.list_widget.itemDoubleClicked.connect(self.on_record_selected)
-    def on_record_selected(self, item):
-        record_path = os.path.join('data', item.text())
-        with open(record_path, 'r', encoding='utf-8') as f:
-            record = json.load(f)
+        self.selector.record_activated.connect(self.on_record_selected)
+    def on_record_selected(self, record_path):
+        record = load_session_record(record_path)
         # 切换到PlaybackView
         if self.view:
             self.layout.removeWidget(self.view)
+            self.view.release_players()
             self.view.deleteLater()
         self.view = PlaybackView()
         self.layout.addWidget(self.view)
@@ -57,6 +95,7 @@ class PlaybackPage(QWidget):
     def show_selector(self):
         if self.view:
             self.layout.removeWidget(self.view)
+            self.view.release_players()
             self.view.deleteLater()
             self.view = None
         # 删除底部返回按钮相关代码
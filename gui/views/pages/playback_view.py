@@ -1,17 +1,24 @@
+import time
+
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSlider, QComboBox,  # 新增QSlider、QComboBox
     QSplitter, QGroupBox, QGridLayout, QScrollArea, QFrame, QSizePolicy
 )
 from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtGui import QPixmap, QFont
-import cv2
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtGui import QFont
 
 from ...utils.styles import STYLE_SHEET
 from ...widgets.timeline_widget import TimelineWidget
 from ...widgets.virtual_keyboard import VirtualKeyboardWindow
 from ...widgets.record_info_panel import RecordInfoPanel
-from ...services.playback.video_player_service import VideoPlayerService
+from ...widgets.video_surface import VideoSurface
+from ...widgets.text_replay_view import TextReplayView
+from ...services.playback.video_player_service import VideoPlayerService, frame_to_image
+from ...services.playback.playback_clock import PlaybackClock
+from ...services.playback.keystroke_timeline import KeystrokeTimeline
+from ...services.playback.typing_activity import TypingActivity
+from ...services.playback.text_replay import TextReplay
+from ...services.playback.scrub_store import ScrubStore, ScrubStoreWorker
 
 
 class PlaybackView(QWidget):
@@ -34,10 +41,34 @@ class PlaybackView(QWidget):
         self.webcam_player = None
         self.sync_mode = True  # 联动模式开关
         self.virtual_keyboard_window = None
+        # 当前记录的按键时间线，以及虚拟键盘上正在高亮的按键
+        self.keystroke_timeline = KeystrokeTimeline([])
+        self.highlighted_keys = frozenset()
+        # 由按键记录重建答题框文本；没有视频时由定时器按时钟驱动回放
+        self.text_replay = TextReplay([])
+        self.replay_timer = QTimer(self)
+        self.replay_timer.setInterval(40)
+        self.replay_timer.timeout.connect(self.on_replay_tick)
         self.screen_cap = None
         self.webcam_cap = None
         self.play_timer = None
         self.is_playing = False
+        # 两路视频共享的回放主时钟
+        self.clock = PlaybackClock()
+        # 拖动时间轴：待请求完整画质的目标帧 {视频类型: 帧号}，停止拖动一段时间后请求
+        self.scrub_targets = {}
+        self.scrub_settle_timer = QTimer(self)
+        self.scrub_settle_timer.setSingleShot(True)
+        self.scrub_settle_timer.setInterval(120)
+        self.scrub_settle_timer.timeout.connect(self.finish_scrub)
+        # 倒放：按墙上时间向回移动时钟，画面取自低分辨率帧
+        self.is_reversing = False
+        self.reverse_timer = QTimer(self)
+        self.reverse_timer.setInterval(40)
+        self.reverse_timer.timeout.connect(self.on_reverse_tick)
+        self._reverse_wall = 0.0
+        # 正在后台生成低分辨率帧的任务 {视频类型: ScrubStoreWorker}
+        self.scrub_store_workers = {}
         self.screen_video_path = None
         self.webcam_video_path = None
         
@@ -163,19 +194,22 @@ class PlaybackView(QWidget):
         video_splitter.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
         # 屏幕录制视频组
-        screen_group = self.create_video_group("屏幕录制", "screen_video_label")
+        screen_group = self.create_video_group("屏幕录制", "screen_video_surface")
         video_splitter.addWidget(screen_group)
         
         # 摄像头录制视频组
-        webcam_group = self.create_video_group("摄像头录制", "webcam_video_label")
+        webcam_group = self.create_video_group("摄像头录制", "webcam_video_surface")
         video_splitter.addWidget(webcam_group)
         
-        video_splitter.setSizes([800, 800])
+        # 答题框回放（由按键记录重建，不需要解码视频）
+        video_splitter.addWidget(self.create_text_replay_group())
+        
+        video_splitter.setSizes([800, 800, 500])
         main_content_layout.addWidget(video_splitter)
         main_content_layout.setSpacing(0)
         return video_splitter
     
-    def create_video_group(self, title, label_name):
+    def create_video_group(self, title, surface_name):
         """创建视频组"""
         group = QWidget()
         layout = QVBoxLayout(group)
@@ -204,28 +238,39 @@ class PlaybackView(QWidget):
         video_layout.setContentsMargins(0, 0, 0, 0)
         video_widget.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         
-        # 视频标签
-        video_label = QLabel()
-        video_label.setAlignment(Qt.AlignCenter)
-        video_label.setStyleSheet("""
-            QLabel {
-                background-color: #1e1e1e;
-                color: #666666;
-                border: 2px dashed #404040;
-                border-radius: 5px;
-                font-size: 14px;
-            }
-        """)
-        video_label.setText("暂无视频")
-        video_label.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        setattr(self, label_name, video_label)
-        video_layout.addWidget(video_label)
+        # 视频画面（直接绘制播放线程输出的帧）
+        video_surface = VideoSurface("暂无视频")
+        setattr(self, surface_name, video_surface)
+        video_layout.addWidget(video_surface)
         
         layout.addWidget(video_widget)
         layout.addStretch()
         
         return group
     
+    def create_text_replay_group(self):
+        """创建答题框回放组"""
+        group = QWidget()
+        layout = QVBoxLayout(group)
+        layout.setSpacing(0)
+        layout.setContentsMargins(0, 0, 0, 0)
+        group.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        
+        title_bar = QWidget()
+        title_bar.setFixedHeight(25)
+        title_bar.setStyleSheet("background-color: #2d2d2d; border-bottom: 1px solid #404040;")
+        title_layout = QHBoxLayout(title_bar)
+        title_layout.setContentsMargins(10, 0, 10, 0)
+        title_label = QLabel("答题回放")
+        title_label.setStyleSheet("color: #ffffff; font-weight: bold; font-size: 11px;")
+        title_layout.addWidget(title_label)
+        title_layout.addStretch()
+        layout.addWidget(title_bar)
+        
+        self.text_replay_view = TextReplayView()
+        layout.addWidget(self.text_replay_view)
+        return group
+    
     def create_control_area(self, main_content_layout):
         """创建控制区域"""
         control_widget = QWidget()
@@ -271,6 +316,31 @@ class PlaybackView(QWidget):
             }
         """)
 
+        secondary_button_style = """
+            QPushButton {
+                background-color: #3a3f47;
+                color: white;
+                border: none;
+                border-radius: 5px;
+                font-size: 12px;
+                padding: 0 6px;
+            }
+            QPushButton:hover {
+                background-color: #4a505a;
+            }
+            QPushButton:disabled {
+                color: #8a8a8a;
+            }
+        """
+        self.reverse_btn = QPushButton("倒放")
+        self.reverse_btn.setMinimumWidth(48)
+        self.reverse_btn.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Expanding)
+        self.reverse_btn.setStyleSheet(secondary_button_style)
+        self.scrub_store_btn = QPushButton("生成预览帧")
+        self.scrub_store_btn.setToolTip("后台把视频解码一遍，生成用于快速拖动和倒放的低分辨率帧")
+        self.scrub_store_btn.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Expanding)
+        self.scrub_store_btn.setStyleSheet(secondary_button_style)
+
         # 播放速度拖动条
         self.speed_slider = QSlider(Qt.Horizontal)
         self.speed_slider.setMinimum(5)   # 0.5x
@@ -309,11 +379,13 @@ class PlaybackView(QWidget):
         self.time_label.setFixedWidth(90)
         control_layout.addWidget(self.play_btn)
         control_layout.addWidget(self.stop_btn)
+        control_layout.addWidget(self.reverse_btn)
         control_layout.addWidget(self.time_label)
         control_layout.addWidget(QLabel("速度:"))
         control_layout.addWidget(self.speed_slider)
         control_layout.addWidget(self.speed_label)
         control_layout.addStretch()
+        control_layout.addWidget(self.scrub_store_btn)
         main_content_layout.addWidget(control_widget)
         return control_widget
     
@@ -346,8 +418,16 @@ class PlaybackView(QWidget):
             }
         """)
         
+        # 同步状态：两路视频的偏差和丢帧数
+        self.sync_stats_label = QLabel("")
+        self.sync_stats_label.setStyleSheet("color: #aaaaaa; font-size: 11px; padding: 0 6px;")
+        self.sync_stats_timer = QTimer(self)
+        self.sync_stats_timer.setInterval(500)
+        self.sync_stats_timer.timeout.connect(self.update_sync_stats)
+        
         sync_layout.addWidget(self.sync_btn)
         sync_layout.addStretch()
+        sync_layout.addWidget(self.sync_stats_label)
         
         main_content_layout.addWidget(sync_widget)
         return sync_widget
@@ -404,16 +484,20 @@ class PlaybackView(QWidget):
         # 播放控制
         self.play_btn.clicked.connect(self.toggle_play)
         self.stop_btn.clicked.connect(self.stop_video)
+        self.reverse_btn.clicked.connect(self.toggle_reverse)
+        self.scrub_store_btn.clicked.connect(self.build_scrub_stores)
         
         # 联动模式
         self.sync_btn.clicked.connect(self.toggle_sync_mode)
         
         # 时间轴信号
         self.screen_timeline.timeline_clicked.connect(lambda pos: self.timeline_clicked.emit('screen', pos))
+        self.screen_timeline.timeline_clicked.connect(lambda pos: self.handle_timeline_jump('screen', pos))
         self.screen_timeline.thumbnail_clicked.connect(lambda pos: self.handle_timeline_jump('screen', pos))
         self.screen_timeline.indicator_dragged.connect(lambda pos: self.handle_timeline_drag('screen', pos))
         
         self.webcam_timeline.timeline_clicked.connect(lambda pos: self.timeline_clicked.emit('webcam', pos))
+        self.webcam_timeline.timeline_clicked.connect(lambda pos: self.handle_timeline_jump('webcam', pos))
         self.webcam_timeline.thumbnail_clicked.connect(lambda pos: self.handle_timeline_jump('webcam', pos))
         self.webcam_timeline.indicator_dragged.connect(lambda pos: self.handle_timeline_drag('webcam', pos))
 
@@ -432,81 +516,95 @@ class PlaybackView(QWidget):
         """切换虚拟键盘"""
         if not self.virtual_keyboard_window:
             self.virtual_keyboard_window = VirtualKeyboardWindow(self)
+            self.virtual_keyboard_window.set_key_counts(self.keystroke_timeline.press_counts)
             self.virtual_keyboard_window.show()
         else:
             if self.virtual_keyboard_window.isVisible():
                 self.virtual_keyboard_window.hide()
             else:
                 self.virtual_keyboard_window.show()
+        # 显示时立即同步当前时刻的按键
+        self.highlighted_keys = None
+        self.refresh_keyboard_highlight(self.current_media_time())
     
     def toggle_play(self):
+        self.stop_reverse()
         if not self.is_playing:
+            self.clock.start()
             if self.screen_player:
                 self.screen_player.play()
             if self.webcam_player:
                 self.webcam_player.play()
+            if not self.screen_player and not self.webcam_player:
+                if self.clock.position() >= self.text_replay.duration:
+                    self.clock.seek(0)
+                self.replay_timer.start()
             self.is_playing = True
             self.play_btn.setText("暂停")
+            self.sync_stats_timer.start()
         else:
-            if self.screen_player:
-                self.screen_player.pause()
-            if self.webcam_player:
-                self.webcam_player.pause()
-            self.is_playing = False
-            self.play_btn.setText("播放")
+            self.pause_players()
+
+    def pause_players(self):
+        """暂停时钟和两路视频"""
+        self.clock.pause()
+        self.replay_timer.stop()
+        if self.screen_player:
+            self.screen_player.pause()
+        if self.webcam_player:
+            self.webcam_player.pause()
+        self.is_playing = False
+        self.play_btn.setText("播放")
+        self.sync_stats_timer.stop()
+        self.update_sync_stats()
 
     def stop_video(self):
+        self.stop_reverse()
         if self.screen_player:
             self.screen_player.stop()
         if self.webcam_player:
             self.webcam_player.stop()
         self.is_playing = False
         self.play_btn.setText("播放")
+        self.sync_stats_timer.stop()
+        self.replay_timer.stop()
         # 回到首帧
+        self.clock.pause()
+        self.clock.seek(0)
+        for player in (self.screen_player, self.webcam_player):
+            if player:
+                player.clock_offset = 0.0
+                player.seek_position = -1
         if self.screen_player:
-            self.screen_player.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.screen_player.cap.read()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                bytes_per_line = ch * w
-                qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimg)
-                self.screen_video_label.setPixmap(pixmap.scaled(self.screen_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            self.show_frame('screen', 0)
         if self.webcam_player:
-            self.webcam_player.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.webcam_player.cap.read()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                bytes_per_line = ch * w
-                qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimg)
-                self.webcam_video_label.setPixmap(pixmap.scaled(self.webcam_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            self.show_frame('webcam', 0)
+        if not self.screen_player and not self.webcam_player:
+            self.screen_timeline.update_position(0)
+        self.refresh_replay(0.0)
 
     def play_next_frame(self):
         # 屏幕视频
         if self.screen_cap:
             ret, frame = self.screen_cap.read()
             if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                bytes_per_line = ch * w
-                qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimg)
-                self.screen_video_label.setPixmap(pixmap.scaled(self.screen_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                surface = self.screen_video_surface
+                surface.set_frame(frame_to_image(frame, surface.display_size())[0])
             else:
                 self.stop_video()
         # 摄像头视频
         if self.webcam_cap:
             ret, frame = self.webcam_cap.read()
             if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                bytes_per_line = ch * w
-                qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimg)
-                self.webcam_video_label.setPixmap(pixmap.scaled(self.webcam_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+                surface = self.webcam_video_surface
+                surface.set_frame(frame_to_image(frame, surface.display_size())[0])
+
+    def show_frame(self, video_type, frame_pos):
+        """在界面线程读取并显示单帧（暂停、停止或拖动时）"""
+        player = self.screen_player if video_type == 'screen' else self.webcam_player
+        surface = self.screen_video_surface if video_type == 'screen' else self.webcam_video_surface
+        if player:
+            surface.set_frame(player.read_frame(frame_pos))
     
     def toggle_sync_mode(self):
         """切换联动模式"""
@@ -539,6 +637,16 @@ class PlaybackView(QWidget):
     def load_record(self, record):
         """加载记录数据"""
         self.current_record = record
+        self.keystroke_timeline = KeystrokeTimeline.from_record(record)
+        if self.virtual_keyboard_window:
+            self.virtual_keyboard_window.set_key_counts(self.keystroke_timeline.press_counts)
+        self.text_replay = TextReplay.from_record(record)
+        self.text_replay_view.set_replay(self.text_replay)
+        self.refresh_replay(0.0)
+        # 时间轴下方的按键活动条
+        activity = TypingActivity.for_record(record)
+        self.screen_timeline.set_typing_activity(activity)
+        self.webcam_timeline.set_typing_activity(activity)
         # 设置记录信息
         question = record.get('question', {})
         question_content = question.get('content', '') if isinstance(question, dict) else str(question)
@@ -554,53 +662,65 @@ class PlaybackView(QWidget):
         self.webcam_video_path = webcam_video_path
         # 关闭旧player
         if self.screen_player:
-            self.screen_player.stop()
-            self.screen_player.wait()
+            self.release_player(self.screen_player, self.screen_video_surface)
             self.screen_player = None
         if self.webcam_player:
-            self.webcam_player.stop()
-            self.webcam_player.wait()
+            self.release_player(self.webcam_player, self.webcam_video_surface)
             self.webcam_player = None
+        self.stop_reverse()
+        self.cancel_scrub_stores()
+        self.clock.pause()
+        self.clock.seek(0)
+        self.is_playing = False
+        self.play_btn.setText("播放")
         # 新建player
         if screen_video_path:
-            self.screen_player = VideoPlayerService(screen_video_path)
-            if self.screen_player.open_video():
-                self.screen_player.frame_ready.connect(self.update_screen_frame)
-                self.screen_player.video_finished.connect(self.stop_video)
+            self.screen_player = self.create_player(screen_video_path, self.screen_video_surface,
+                                                    self.update_screen_frame)
         if webcam_video_path:
-            self.webcam_player = VideoPlayerService(webcam_video_path)
-            if self.webcam_player.open_video():
-                self.webcam_player.frame_ready.connect(self.update_webcam_frame)
-                self.webcam_player.video_finished.connect(self.stop_video)
+            self.webcam_player = self.create_player(webcam_video_path, self.webcam_video_surface,
+                                                    self.update_webcam_frame)
         # 显示首帧
         if self.screen_player:
-            self.screen_player.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.screen_player.cap.read()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                bytes_per_line = ch * w
-                qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimg)
-                self.screen_video_label.setPixmap(pixmap.scaled(self.screen_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            self.show_frame('screen', 0)
         if self.webcam_player:
-            self.webcam_player.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            ret, frame = self.webcam_player.cap.read()
-            if ret:
-                frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = frame.shape
-                bytes_per_line = ch * w
-                qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qimg)
-                self.webcam_video_label.setPixmap(pixmap.scaled(self.webcam_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+            self.show_frame('webcam', 0)
         # 加载时间轴缩略图
         if hasattr(self, 'screen_timeline') and screen_video_path:
             self.screen_timeline.load_thumbnails(screen_video_path)
         if hasattr(self, 'webcam_timeline') and webcam_video_path:
             self.webcam_timeline.load_thumbnails(webcam_video_path)
+        if not self.screen_player and not self.webcam_player:
+            # 没有可用的视频：时间轴按按键记录的时长显示，仍可拖动回放答题过程
+            self.screen_timeline.set_duration(self.text_replay.duration)
+        self.update_scrub_store_button()
+
+    def create_player(self, video_path, surface, on_frame):
+        """创建播放服务：使用共享时钟，输出尺寸跟随显示控件的大小；视频无法打开时返回None"""
+        player = VideoPlayerService(video_path, clock=self.clock)
+        if not player.open_video():
+            player.close()
+            return None
+        player.set_display_size(*surface.display_size())
+        surface.display_size_changed.connect(player.set_display_size)
+        player.frame_ready.connect(on_frame)
+        player.scrub_frame_ready.connect(
+            lambda image, frame_pos, final: self.on_scrub_frame(surface, image))
+        player.video_finished.connect(self.stop_video)
+        # 已生成过低分辨率帧时直接映射使用
+        player.set_scrub_store(ScrubStore.open(video_path))
+        return player
 
-    def update_screen_frame(self, pixmap, timestamp_ms):
-        self.screen_video_label.setPixmap(pixmap.scaled(self.screen_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    def release_player(self, player, surface):
+        """关闭播放服务（含预取线程）并断开与显示控件的连接"""
+        player.close()
+        try:
+            surface.display_size_changed.disconnect(player.set_display_size)
+        except TypeError:
+            pass
+
+    def update_screen_frame(self, image, timestamp_ms):
+        self.screen_video_surface.set_frame(image)
         if self.screen_player and not getattr(self, 'slider_is_dragging', False):
             total = self.screen_player.get_total_frames()
             pos = self.screen_player.get_current_frame()
@@ -608,9 +728,10 @@ class PlaybackView(QWidget):
                 self.screen_timeline.update_position(pos)
         # 更新时间显示
         self.update_time_display(timestamp_ms)
+        self.refresh_replay(timestamp_ms / 1000)
 
-    def update_webcam_frame(self, pixmap, timestamp_ms):
-        self.webcam_video_label.setPixmap(pixmap.scaled(self.webcam_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+    def update_webcam_frame(self, image, timestamp_ms):
+        self.webcam_video_surface.set_frame(image)
         if self.webcam_player and not getattr(self, 'slider_is_dragging', False):
             total = self.webcam_player.get_total_frames()
             pos = self.webcam_player.get_current_frame()
@@ -618,6 +739,8 @@ class PlaybackView(QWidget):
                 self.webcam_timeline.update_position(pos)
         # 更新时间显示
         self.update_time_display(timestamp_ms)
+        if not self.screen_player:
+            self.refresh_replay(timestamp_ms / 1000)
     
     def update_time_display(self, timestamp_ms):
         """更新时间显示"""
@@ -625,6 +748,8 @@ class PlaybackView(QWidget):
         total_time = 0
         if self.screen_player:
             total_time = self.screen_player.get_total_frames() / self.screen_player.get_fps()
+        elif not self.webcam_player:
+            total_time = self.text_replay.duration
         current_minutes = int(current_time) // 60
         current_seconds = int(current_time) % 60
         total_minutes = int(total_time) // 60
@@ -636,8 +761,55 @@ class PlaybackView(QWidget):
         if self.virtual_keyboard_window and self.virtual_keyboard_window.isVisible():
             self.virtual_keyboard_window.highlight_keys(keys)
     
+    def refresh_keyboard_highlight(self, media_time):
+        """按回放时间（秒）从按键时间线查出按住的按键，有变化时更新虚拟键盘"""
+        keys = self.keystroke_timeline.held_keys(media_time)
+        if keys != self.highlighted_keys:
+            self.highlighted_keys = keys
+            self.update_keyboard_highlight(sorted(keys))
+    
+    def refresh_replay(self, media_time):
+        """按回放时间（秒）刷新由按键记录驱动的显示：虚拟键盘和答题回放"""
+        self.refresh_keyboard_highlight(media_time)
+        self.text_replay_view.seek(media_time)
+    
+    def on_replay_tick(self):
+        """没有视频时按时钟推进时间轴和答题回放"""
+        media_time = self.clock.position()
+        if media_time >= self.text_replay.duration:
+            media_time = self.text_replay.duration
+            self.pause_players()
+        if self.screen_timeline.fps:
+            self.screen_timeline.update_position(int(media_time * self.screen_timeline.fps))
+        self.update_time_display(media_time * 1000)
+        self.refresh_replay(media_time)
+    
+    def current_media_time(self):
+        """屏幕录制（没有时为摄像头）当前位置对应的回放时间（秒）"""
+        for video_type, player in (('screen', self.screen_player), ('webcam', self.webcam_player)):
+            if player:
+                position = player.seek_position if player.seek_position >= 0 else player.get_current_frame()
+                return self.frame_time(video_type, position)
+        return self.clock.position()
+    
+    def release_players(self):
+        """关闭两路播放服务、缩略图和低分辨率帧的生成（视图被销毁前调用）"""
+        self.sync_stats_timer.stop()
+        self.stop_reverse()
+        self.cancel_scrub_stores()
+        if hasattr(self, 'screen_timeline'):
+            self.screen_timeline.cancel_thumbnails()
+            self.webcam_timeline.cancel_thumbnails()
+        if self.screen_player:
+            self.release_player(self.screen_player, self.screen_video_surface)
+            self.screen_player = None
+        if self.webcam_player:
+            self.release_player(self.webcam_player, self.webcam_video_surface)
+            self.webcam_player = None
+
     def closeEvent(self, event):
         """关闭事件"""
+        self.release_players()
         if self.virtual_keyboard_window:
             self.virtual_keyboard_window.close()
         event.accept() 
@@ -645,74 +817,209 @@ class PlaybackView(QWidget):
     def on_speed_slider_changed(self, value):
         speed = round(value / 10, 1)
         self.speed_label.setText(f"{speed:.1f}x")
+        self.clock.set_speed(speed)
         if self.screen_player:
             self.screen_player.set_playback_speed(speed)
         if self.webcam_player:
             self.webcam_player.set_playback_speed(speed)
 
-    def handle_timeline_jump(self, video_type, frame_pos):
+    def update_sync_stats(self):
+        """刷新同步状态显示"""
+        stats = self.sync_stats()
+        parts = []
+        if 'av_drift_ms' in stats:
+            parts.append(f"音画偏差: {stats['av_drift_ms']:+.0f}ms")
+        dropped = sum(stats[key]['dropped'] for key in ('screen', 'webcam') if key in stats)
+        if stats:
+            parts.append(f"丢帧: {dropped}")
+        self.sync_stats_label.setText("  ".join(parts))
+
+    def sync_stats(self):
+        """两路视频的同步统计
+
+        Returns:
+            dict: screen/webcam为各自的统计（见VideoPlayerService.sync_stats），
+                  两路都有时av_drift_ms为屏幕相对摄像头的偏差（毫秒）
+        """
+        stats = {}
         if self.screen_player:
-            self.screen_player.seek(frame_pos)
+            stats['screen'] = self.screen_player.sync_stats()
         if self.webcam_player:
-            self.webcam_player.seek(frame_pos)
-        self.screen_timeline.update_position(frame_pos)
-        self.webcam_timeline.update_position(frame_pos) 
+            stats['webcam'] = self.webcam_player.sync_stats()
+        if 'screen' in stats and 'webcam' in stats:
+            stats['av_drift_ms'] = stats['screen']['drift_ms'] - stats['webcam']['drift_ms']
+        return stats
+
+    def frame_time(self, video_type, frame_pos):
+        """某路视频的帧号 -> 时间（秒）"""
+        player = self.screen_player if video_type == 'screen' else self.webcam_player
+        if player and player.frame_index:
+            return player.frame_time(frame_pos)
+        # 没有视频时时间轴按固定帧率表示按键记录的时长
+        timeline = getattr(self, f'{video_type}_timeline')
+        return frame_pos / timeline.fps if timeline.fps else 0.0
+
+    def seek_all(self, media_time):
+        """联动跳转：时钟和两路视频都跳到同一时间"""
+        self.clock.seek(media_time)
+        for video_type, player in (('screen', self.screen_player), ('webcam', self.webcam_player)):
+            if player and player.frame_index:
+                player.clock_offset = 0.0
+                frame_pos = player.frame_index.frame_at(media_time * 1000)
+                player.seek(frame_pos)
+                getattr(self, f'{video_type}_timeline').update_position(frame_pos)
+
+    def seek_one(self, video_type, frame_pos):
+        """非联动跳转：只移动一路视频，以相对时钟的偏移保持两路的时间差"""
+        player = self.screen_player if video_type == 'screen' else self.webcam_player
+        if not player:
+            return
+        player.clock_offset = self.frame_time(video_type, frame_pos) - self.clock.position()
+        player.seek(frame_pos)
+        getattr(self, f'{video_type}_timeline').update_position(frame_pos)
+
+    def handle_timeline_jump(self, video_type, frame_pos):
+        self.seek_all(self.frame_time(video_type, frame_pos))
+        if not self.is_playing:
+            # 暂停时直接显示跳转后的完整画面
+            for player in (self.screen_player, self.webcam_player):
+                if player and player.seek_position >= 0:
+                    player.scrub(player.seek_position, final=True)
+        self.refresh_replay(self.current_media_time())
 
     def handle_timeline_drag(self, video_type, frame_pos):
-        """拖动时间轴竖轴时的联动与画面刷新"""
+        """拖动时间轴竖轴时的联动与画面刷新
+
+        画面由各播放服务的拖动线程异步解码：拖动中只显示低分辨率预览，
+        中间位置被合并丢弃；停止拖动后再请求完整画质的目标帧。
+        """
+        self.stop_reverse()
+        if self.is_playing:
+            self.pause_players()
         if self.sync_mode:
             # 联动：两个视频都seek
-            if self.screen_player:
-                self.screen_player.pause()
-                self.screen_player.seek(frame_pos)
-                self.screen_player.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                ret, frame = self.screen_player.cap.read()
-                if ret:
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = frame.shape
-                    bytes_per_line = ch * w
-                    qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(qimg)
-                    self.screen_video_label.setPixmap(pixmap.scaled(self.screen_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            if self.webcam_player:
-                self.webcam_player.pause()
-                self.webcam_player.seek(frame_pos)
-                self.webcam_player.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                ret, frame = self.webcam_player.cap.read()
-                if ret:
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = frame.shape
-                    bytes_per_line = ch * w
-                    qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(qimg)
-                    self.webcam_video_label.setPixmap(pixmap.scaled(self.webcam_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-            self.screen_timeline.update_position(frame_pos)
-            self.webcam_timeline.update_position(frame_pos)
+            self.seek_all(self.frame_time(video_type, frame_pos))
+            for other_type, player in (('screen', self.screen_player), ('webcam', self.webcam_player)):
+                if player and player.seek_position >= 0:
+                    self.scrub_to(other_type, player.seek_position)
         else:
             # 非联动：只操作当前视频
-            if video_type == 'screen' and self.screen_player:
-                self.screen_player.pause()
-                self.screen_player.seek(frame_pos)
-                self.screen_player.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                ret, frame = self.screen_player.cap.read()
-                if ret:
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = frame.shape
-                    bytes_per_line = ch * w
-                    qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(qimg)
-                    self.screen_video_label.setPixmap(pixmap.scaled(self.screen_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                self.screen_timeline.update_position(frame_pos)
-            elif video_type == 'webcam' and self.webcam_player:
-                self.webcam_player.pause()
-                self.webcam_player.seek(frame_pos)
-                self.webcam_player.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-                ret, frame = self.webcam_player.cap.read()
-                if ret:
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                    h, w, ch = frame.shape
-                    bytes_per_line = ch * w
-                    qimg = QImage(frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-                    pixmap = QPixmap.fromImage(qimg)
-                    self.webcam_video_label.setPixmap(pixmap.scaled(self.webcam_video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-                self.webcam_timeline.update_position(frame_pos) 
\ No newline at end of file
+            self.seek_one(video_type, frame_pos)
+            self.scrub_to(video_type, frame_pos)
+        self.scrub_settle_timer.start()
+        self.refresh_replay(self.current_media_time())
+
+    def scrub_to(self, video_type, frame_pos):
+        """请求拖动预览，并记录停下后需要的完整画质目标"""
+        player = self.screen_player if video_type == 'screen' else self.webcam_player
+        if player:
+            player.scrub(frame_pos)
+            self.scrub_targets[video_type] = frame_pos
+
+    def finish_scrub(self):
+        """拖动停下：请求目标帧的完整画质"""
+        targets, self.scrub_targets = self.scrub_targets, {}
+        for video_type, frame_pos in targets.items():
+            player = self.screen_player if video_type == 'screen' else self.webcam_player
+            if player:
+                player.scrub(frame_pos, final=True)
+
+    def on_scrub_frame(self, surface, image):
+        """显示拖动线程解码的画面（播放中到达的结果已过时，忽略）"""
+        if not self.is_playing:
+            surface.set_frame(image)
+
+    def toggle_reverse(self):
+        """开始或停止倒放"""
+        if self.is_reversing:
+            self.stop_reverse()
+            return
+        if self.is_playing:
+            self.pause_players()
+        self.is_reversing = True
+        self.reverse_btn.setText("停止倒放")
+        self._reverse_wall = time.monotonic()
+        self.reverse_timer.start()
+
+    def on_reverse_tick(self):
+        """倒放一步：时钟按经过的墙上时间后退，画面优先取低分辨率帧，没有时请求关键帧预览"""
+        now = time.monotonic()
+        elapsed, self._reverse_wall = now - self._reverse_wall, now
+        media_time = max(self.clock.position() - elapsed * self.clock.speed, 0.0)
+        self.clock.seek(media_time)
+        players = (('screen', self.screen_player, self.screen_video_surface),
+                   ('webcam', self.webcam_player, self.webcam_video_surface))
+        for video_type, player, surface in players:
+            if not player or not player.frame_index:
+                continue
+            frame_pos = player.frame_index.frame_at((media_time + player.clock_offset) * 1000)
+            player.seek(frame_pos)
+            image = player.preview_frame(frame_pos)
+            if image is not None:
+                surface.set_frame(image)
+            else:
+                player.scrub(frame_pos)
+            getattr(self, f'{video_type}_timeline').update_position(frame_pos)
+        if not self.screen_player and not self.webcam_player and self.screen_timeline.fps:
+            self.screen_timeline.update_position(int(media_time * self.screen_timeline.fps))
+        self.update_time_display(media_time * 1000)
+        self.refresh_replay(media_time)
+        if media_time <= 0:
+            self.stop_reverse()
+
+    def stop_reverse(self):
+        """停止倒放，停下的位置解码完整画质"""
+        if not self.is_reversing:
+            return
+        self.is_reversing = False
+        self.reverse_timer.stop()
+        self.reverse_btn.setText("倒放")
+        for player in (self.screen_player, self.webcam_player):
+            if player and player.seek_position >= 0:
+                player.scrub(player.seek_position, final=True)
+
+    def build_scrub_stores(self):
+        """在后台为还没有低分辨率帧的视频生成低分辨率帧"""
+        for video_type, player in (('screen', self.screen_player), ('webcam', self.webcam_player)):
+            if not player or player.scrub_store is not None or video_type in self.scrub_store_workers:
+                continue
+            worker = ScrubStoreWorker(player.video_path, player.frame_index)
+            worker.progress.connect(self.on_scrub_store_progress)
+            worker.store_ready.connect(
+                lambda store, video_type=video_type, worker=worker: self.on_scrub_store_ready(video_type, worker, store))
+            self.scrub_store_workers[video_type] = worker
+            worker.start()
+        self.update_scrub_store_button()
+
+    def on_scrub_store_progress(self, done, total):
+        if total > 0:
+            self.scrub_store_btn.setText(f"生成预览帧 {done * 100 // total}%")
+
+    def on_scrub_store_ready(self, video_type, worker, store):
+        """低分辨率帧生成完成，交给对应的播放服务"""
+        if worker.is_cancelled or self.scrub_store_workers.get(video_type) is not worker:
+            return
+        worker.wait()
+        del self.scrub_store_workers[video_type]
+        player = self.screen_player if video_type == 'screen' else self.webcam_player
+        if player and store is not None:
+            player.set_scrub_store(store)
+        self.update_scrub_store_button()
+
+    def cancel_scrub_stores(self):
+        """取消尚未完成的低分辨率帧生成"""
+        workers, self.scrub_store_workers = self.scrub_store_workers, {}
+        for worker in workers.values():
+            worker.cancel()
+
+    def update_scrub_store_button(self):
+        players = [p for p in (self.screen_player, self.webcam_player) if p]
+        if self.scrub_store_workers:
+            self.scrub_store_btn.setEnabled(False)
+            self.scrub_store_btn.setText("生成预览帧…")
+        elif players and all(p.scrub_store is not None for p in players):
+            self.scrub_store_btn.setEnabled(False)
+            self.scrub_store_btn.setText("预览帧已就绪")
+        else:
+            self.scrub_store_btn.setEnabled(bool(players))
+            self.scrub_store_btn.setText("生成预览帧")
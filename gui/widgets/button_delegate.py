@@ -0,0 +1,50 @@
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QStyle, QApplication
+from PyQt5.QtCore import Qt, QEvent, QModelIndex, pyqtSignal
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """在单元格中绘制按钮的委托
+
+    不为每行创建按钮控件，只在绘制时画出按钮外观；单元格文本为空时不显示按钮。
+    """
+
+    clicked = pyqtSignal(QModelIndex)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._pressed = None  # 当前按下的 (行, 列)
+
+    def _button_rect(self, option):
+        return option.rect.adjusted(4, 3, -4, -3)
+
+    def paint(self, painter, option, index):
+        text = index.data(Qt.DisplayRole)
+        if not text:
+            super().paint(painter, option, index)
+            return
+        button = QStyleOptionButton()
+        button.rect = self._button_rect(option)
+        button.text = text
+        button.state = QStyle.State_Enabled
+        if self._pressed == (index.row(), index.column()):
+            button.state |= QStyle.State_Sunken
+        else:
+            button.state |= QStyle.State_Raised
+        if option.state & QStyle.State_MouseOver:
+            button.state |= QStyle.State_MouseOver
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawControl(QStyle.CE_PushButton, button, painter, option.widget)
+
+    def editorEvent(self, event, model, option, index):
+        if not index.data(Qt.DisplayRole):
+            return False
+        if event.type() == QEvent.MouseButtonPress and event.button() == Qt.LeftButton:
+            if self._button_rect(option).contains(event.pos()):
+                self._pressed = (index.row(), index.column())
+                return True
+        elif event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            pressed, self._pressed = self._pressed, None
+            if pressed == (index.row(), index.column()) and self._button_rect(option).contains(event.pos()):
+                self.clicked.emit(index)
+            return pressed is not None
+        return False
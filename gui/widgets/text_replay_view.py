@@ -0,0 +1,81 @@
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtGui import QPainter, QColor, QTextCursor, QFont
+
+
+def _utf16_position(text, index):
+    """Python字符下标 -> QTextDocument中的位置（UTF-16编码单元）"""
+    return len(text[:index].encode('utf-16-le')) // 2
+
+
+class TextReplayView(QPlainTextEdit):
+    """答题框回放控件 - 纯UI组件
+
+    只读显示TextReplay重建的文本，并自绘光标（不依赖焦点和闪烁）。向后移动不多的几个版本时
+    只把新增的增量应用到文档，不重新排版全文；跳转较远时整体替换文本。
+    """
+
+    # 向后超过这么多个版本时整体替换文本
+    MAX_INCREMENTAL = 32
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.replay = None
+        self.version = 0
+        self.caret = 0
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setStyleSheet("QPlainTextEdit { background-color: #1e1e1e; color: #ffffff; border: none; }")
+        font = QFont(self.font())
+        font.setPointSize(12)
+        self.setFont(font)
+
+    def set_replay(self, replay):
+        """设置当前记录的TextReplay，显示初始的空文本"""
+        self.replay = replay
+        self.version = 0
+        self.caret = 0
+        self.setPlainText('')
+        self.viewport().update()
+
+    def seek(self, t):
+        """显示t时刻（秒）的文本和光标"""
+        if self.replay is None:
+            return
+        version = self.replay.version_at(t)
+        if version == self.version:
+            return
+        if self.replay.bmp_only and 0 < version - self.version <= self.MAX_INCREMENTAL:
+            cursor = QTextCursor(self.document())
+            for v in range(self.version + 1, version + 1):
+                position, removed, added = self.replay.delta(v)
+                cursor.setPosition(position)
+                cursor.setPosition(position + removed, QTextCursor.KeepAnchor)
+                cursor.insertText(added)
+            caret = self.replay.carets[version]
+        else:
+            text = self.replay.text_at_version(version)
+            self.setPlainText(text)
+            caret = self.replay.carets[version]
+            if not self.replay.bmp_only:
+                caret = _utf16_position(text, caret)
+        self.version = version
+        self._move_caret(caret)
+
+    def _move_caret(self, caret):
+        old_rect = self.cursorRect()
+        cursor = self.textCursor()
+        cursor.setPosition(min(caret, self.document().characterCount() - 1))
+        self.setTextCursor(cursor)
+        self.caret = cursor.position()
+        self.ensureCursorVisible()
+        self.viewport().update(old_rect.adjusted(-2, 0, 2, 0))
+        self.viewport().update(self.cursorRect().adjusted(-2, 0, 2, 0))
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.replay is None:
+            return
+        rect = self.cursorRect()
+        painter = QPainter(self.viewport())
+        painter.fillRect(rect.x(), rect.y(), 2, rect.height(), QColor('#007AFF'))
+        painter.end()
@@ -0,0 +1,311 @@
+import math
+from bisect import bisect_right, insort
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QRect, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont
+
+
+def format_time(seconds, with_fraction=True):
+    """mm:ss.xx 或 mm:ss"""
+    m = int(seconds) // 60
+    s = int(seconds) % 60
+    if not with_fraction:
+        return f"{m:02d}:{s:02d}"
+    ms = int((seconds - int(seconds)) * 100)
+    return f"{m:02d}:{s:02d}.{ms:02d}"
+
+
+class TimelineStrip(QWidget):
+    """自绘的缩略图时间轴
+
+    整条时间轴由一个控件在paintEvent中绘制：顶部是随缩放变化的时间刻度，下面是按固定宽度
+    划分的缩略图格子，每格显示格子起点处最近的缩略图，只绘制可见的格子；播放头是一条竖线。
+    点击、拖动和命中判断都由坐标换算得到，不使用子控件。
+    滚轮平移，Ctrl+滚轮以鼠标位置为中心缩放。
+    """
+
+    clicked = pyqtSignal(int)  # 点击位置的帧号
+    tile_double_clicked = pyqtSignal(int)  # 双击的格子显示的缩略图帧号
+    playhead_dragged = pyqtSignal(int)  # 拖动播放头到的帧号
+    view_changed = pyqtSignal()  # 缩放、平移或视频长度改变了可见范围
+
+    RULER_HEIGHT = 16
+    TILE_WIDTH = 100
+    TILE_HEIGHT = 56
+    MARGIN = 4
+    # 最大放大倍数：每帧占的像素
+    MAX_PIXELS_PER_FRAME = 8
+    # 点击位置离播放头在该距离（像素）内时直接拖动播放头
+    PLAYHEAD_GRAB = 5
+    ZOOM_STEP = 1.25
+    # 时间刻度的候选间隔（秒）
+    TICK_STEPS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 15, 30, 60, 120, 300, 600, 900, 1800, 3600)
+    MIN_TICK_SPACING = 60
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.total_frames = 0
+        self.fps = 30.0
+        self.playhead = 0
+        self._thumb_frames = []
+        self._thumb_pixmaps = {}
+        # 视图：左边缘对应的帧（可为小数）和每像素的帧数；fit时随宽度自动适应
+        self._start = 0.0
+        self._frames_per_px = 1.0
+        self._fit = True
+        self._dragging = False
+        self.setFixedHeight(self.RULER_HEIGHT + self.TILE_HEIGHT + 2 * self.MARGIN)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setMouseTracking(True)
+
+    # ---- 数据 ----
+
+    def set_video(self, total_frames, fps):
+        """设置视频长度，视图恢复为显示全部"""
+        self.total_frames = max(int(total_frames), 0)
+        self.fps = fps or 30.0
+        self.playhead = 0
+        self._fit = True
+        self._update_fit()
+        self._view_updated()
+
+    def add_thumbnail(self, frame_pos, pixmap):
+        if frame_pos not in self._thumb_pixmaps:
+            insort(self._thumb_frames, frame_pos)
+        self._thumb_pixmaps[frame_pos] = pixmap
+        x = self.x_for_frame(frame_pos)
+        if x < self.width() + self.TILE_WIDTH:
+            self.update()
+
+    def clear(self):
+        self._thumb_frames = []
+        self._thumb_pixmaps = {}
+        self.total_frames = 0
+        self.playhead = 0
+        self._view_updated()
+
+    @property
+    def thumbnail_count(self):
+        return len(self._thumb_frames)
+
+    def thumbnail_for_frame(self, frame):
+        """不晚于frame的最近缩略图的帧号，没有时返回None"""
+        i = bisect_right(self._thumb_frames, frame) - 1
+        if i < 0:
+            return self._thumb_frames[0] if self._thumb_frames else None
+        return self._thumb_frames[i]
+
+    # ---- 坐标换算 ----
+
+    def frame_at(self, x):
+        """x坐标处的帧号"""
+        if self.total_frames <= 0:
+            return 0
+        frame = int(self._start + x * self._frames_per_px)
+        return min(max(frame, 0), self.total_frames - 1)
+
+    def x_for_frame(self, frame):
+        return (frame - self._start) / self._frames_per_px
+
+    def visible_range(self):
+        """可见的帧范围 [起点, 终点)"""
+        return self._start, min(self._start + self.width() * self._frames_per_px, self.total_frames)
+
+    @property
+    def frames_per_pixel(self):
+        return self._frames_per_px
+
+    def _fit_frames_per_px(self):
+        return max(self.total_frames, 1) / max(self.width(), 1)
+
+    def _min_frames_per_px(self):
+        return min(1.0 / self.MAX_PIXELS_PER_FRAME, self._fit_frames_per_px())
+
+    def _update_fit(self):
+        if self._fit:
+            self._start = 0.0
+            self._frames_per_px = self._fit_frames_per_px()
+
+    def _clamp_start(self):
+        max_start = max(self.total_frames - self.width() * self._frames_per_px, 0.0)
+        self._start = min(max(self._start, 0.0), max_start)
+
+    # ---- 缩放与平移 ----
+
+    def zoom(self, factor, anchor_x=None):
+        """以anchor_x（默认播放头或中心）为中心缩放，factor>1为放大"""
+        if self.total_frames <= 0:
+            return
+        if anchor_x is None:
+            anchor_x = self.x_for_frame(self.playhead)
+            if not 0 <= anchor_x <= self.width():
+                anchor_x = self.width() / 2
+        anchor_frame = self._start + anchor_x * self._frames_per_px
+        fit = self._fit_frames_per_px()
+        self._frames_per_px = min(max(self._frames_per_px / factor, self._min_frames_per_px()), fit)
+        self._fit = self._frames_per_px >= fit
+        self._start = anchor_frame - anchor_x * self._frames_per_px
+        self._clamp_start()
+        self._view_updated()
+
+    def zoom_in(self):
+        self.zoom(self.ZOOM_STEP)
+
+    def zoom_out(self):
+        self.zoom(1 / self.ZOOM_STEP)
+
+    def zoom_to_fit(self):
+        self._fit = True
+        self._update_fit()
+        self._view_updated()
+
+    def pan(self, dx):
+        """平移dx像素（正数向后）"""
+        self._start += dx * self._frames_per_px
+        self._clamp_start()
+        self._view_updated()
+
+    def _view_updated(self):
+        self.update()
+        self.view_changed.emit()
+
+    # ---- 播放头 ----
+
+    def set_playhead(self, frame):
+        """移动播放头，只重绘新旧位置；播放头离开可见范围时翻页"""
+        old_x = self.x_for_frame(self.playhead)
+        self.playhead = frame
+        start, end = self.visible_range()
+        if not self._fit and not self._dragging and not start <= frame < end:
+            # 让播放头出现在左侧10%处
+            self._start = frame - self.width() * self._frames_per_px * 0.1
+            self._clamp_start()
+            self._view_updated()
+            return
+        new_x = self.x_for_frame(frame)
+        if int(old_x) != int(new_x):
+            self.update(self._playhead_rect(old_x))
+            self.update(self._playhead_rect(new_x))
+
+    def _playhead_rect(self, x):
+        return QRect(int(x) - 6, 0, 13, self.height())
+
+    # ---- 事件 ----
+
+    def resizeEvent(self, event):
+        self._update_fit()
+        self._clamp_start()
+        super().resizeEvent(event)
+        self.view_changed.emit()
+
+    def mousePressEvent(self, event):
+        if event.button() != Qt.LeftButton or self.total_frames <= 0:
+            return
+        self._dragging = True
+        if abs(event.x() - self.x_for_frame(self.playhead)) > self.PLAYHEAD_GRAB:
+            frame = self.frame_at(event.x())
+            self.set_playhead(frame)
+            self.clicked.emit(frame)
+
+    def mouseMoveEvent(self, event):
+        if self._dragging:
+            x = min(max(event.x(), 0), self.width() - 1)
+            frame = self.frame_at(x)
+            if frame != self.playhead:
+                self.set_playhead(frame)
+                self.playhead_dragged.emit(frame)
+        else:
+            near = abs(event.x() - self.x_for_frame(self.playhead)) <= self.PLAYHEAD_GRAB
+            self.setCursor(Qt.SizeHorCursor if near else Qt.ArrowCursor)
+
+    def mouseReleaseEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self._dragging = False
+
+    def mouseDoubleClickEvent(self, event):
+        if event.button() != Qt.LeftButton or event.y() < self.RULER_HEIGHT:
+            return
+        thumb = self.thumbnail_for_frame(self._slot_frame(self._slot_index(event.x())))
+        if thumb is not None:
+            self.tile_double_clicked.emit(thumb)
+
+    def wheelEvent(self, event):
+        delta = event.angleDelta()
+        if event.modifiers() & Qt.ControlModifier:
+            steps = delta.y() / 120
+            self.zoom(self.ZOOM_STEP ** steps, event.pos().x())
+        else:
+            # 横向滚动或普通滚轮都用于平移
+            amount = delta.x() or delta.y()
+            self.pan(-amount / 120 * self.TILE_WIDTH)
+        event.accept()
+
+    # ---- 绘制 ----
+
+    def _slot_index(self, x):
+        """x所在的缩略图格子；格子对齐到时间而不是控件，平移时不会抖动"""
+        return math.floor((x + self._start / self._frames_per_px) / self.TILE_WIDTH)
+
+    def _slot_frame(self, slot):
+        return slot * self.TILE_WIDTH * self._frames_per_px
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.fillRect(rect, QColor('#1e1e1e'))
+        if self.total_frames > 0:
+            self._paint_ruler(painter, rect)
+            self._paint_tiles(painter, rect)
+            self._paint_playhead(painter)
+        painter.end()
+
+    def _paint_ruler(self, painter, rect):
+        painter.fillRect(QRect(rect.left(), 0, rect.width(), self.RULER_HEIGHT), QColor('#2a2a2a'))
+        px_per_second = self.fps / self._frames_per_px
+        step = next((s for s in self.TICK_STEPS if s * px_per_second >= self.MIN_TICK_SPACING),
+                    self.TICK_STEPS[-1])
+        font = QFont(painter.font())
+        font.setPixelSize(9)
+        painter.setFont(font)
+        painter.setPen(QPen(QColor('#8a8a8a')))
+        first_time = (self._start + rect.left() * self._frames_per_px) / self.fps
+        tick = math.floor(first_time / step)
+        while True:
+            seconds = tick * step
+            x = self.x_for_frame(seconds * self.fps)
+            if x > rect.right() + self.MIN_TICK_SPACING or seconds * self.fps > self.total_frames:
+                break
+            painter.drawLine(int(x), self.RULER_HEIGHT - 5, int(x), self.RULER_HEIGHT - 1)
+            painter.drawText(int(x) + 3, self.RULER_HEIGHT - 5, format_time(seconds, step < 1))
+            tick += 1
+
+    def _paint_tiles(self, painter, rect):
+        top = self.RULER_HEIGHT + self.MARGIN
+        end_x = self.x_for_frame(self.total_frames)
+        offset = self._start / self._frames_per_px
+        placeholder = QColor('#2a2a2a')
+        border = QPen(QColor('#404040'))
+        for slot in range(self._slot_index(rect.left()), self._slot_index(rect.right()) + 1):
+            x = int(slot * self.TILE_WIDTH - offset)
+            if x >= end_x:
+                break
+            width = int(min(self.TILE_WIDTH, end_x - x))
+            thumb = self.thumbnail_for_frame(self._slot_frame(slot))
+            tile_rect = QRect(x, top, width, self.TILE_HEIGHT)
+            if thumb is None:
+                painter.fillRect(tile_rect, placeholder)
+            else:
+                # 格子宽度不足（视频末尾）时只画左侧部分
+                painter.drawPixmap(x, top, self._thumb_pixmaps[thumb], 0, 0, width, self.TILE_HEIGHT)
+            painter.setPen(border)
+            painter.drawRect(tile_rect.adjusted(0, 0, -1, -1))
+
+    def _paint_playhead(self, painter):
+        x = int(self.x_for_frame(self.playhead))
+        painter.setPen(QPen(QColor('#007AFF'), 2))
+        painter.drawLine(x, 0, x, self.height())
+        painter.setBrush(QColor('#00c3ff'))
+        painter.setPen(Qt.NoPen)
+        painter.drawRect(x - 4, 0, 9, 6)
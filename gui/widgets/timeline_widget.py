@@ -1,13 +1,25 @@
 import cv2
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
 )
 from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtGui import QPixmap
+
+from ..services.playback.frame_index import FrameIndex
+from ..services.playback.thumbnail_cache import ThumbnailCache
+from ..services.playback.thumbnail_worker import (
+    ThumbnailWorker, THUMBNAIL_SIZE, thumbnail_interval, thumbnail_to_image
+)
+from .timeline_strip import TimelineStrip, format_time
+from .typing_activity_strip import TypingActivityStrip
 
 
 class TimelineWidget(QWidget):
-    """时间轴UI控件 - 纯UI组件"""
+    """时间轴UI控件 - 纯UI组件
+
+    标题栏显示时间和缩放按钮，缩略图、刻度和播放头由自绘的TimelineStrip绘制，
+    下方的TypingActivityStrip随时间轴缩放平移显示按键活动。
+    """
     
     # 信号定义
     timeline_clicked = pyqtSignal(int)  # 点击时间轴位置
@@ -17,6 +29,8 @@ class TimelineWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.thumbnails = []
+        self.thumbnail_worker = None
+        self.thumbnail_cache = ThumbnailCache()
         self.current_position = 0
         self.total_duration = 0
         self.current_frame = 0
@@ -42,6 +56,29 @@ class TimelineWidget(QWidget):
         title_layout.addWidget(title_label)
         title_layout.addStretch()
         
+        # 缩放按钮（也可Ctrl+滚轮缩放、滚轮平移）
+        zoom_button_style = """
+            QPushButton {
+                background-color: #1a1a1a;
+                color: #ffffff;
+                border: 1px solid #404040;
+                border-radius: 3px;
+                font-size: 10px;
+                padding: 1px 6px;
+            }
+            QPushButton:hover {
+                border: 1px solid #007AFF;
+            }
+        """
+        for text, tooltip, slot in (("－", "缩小", self.zoom_out), ("＋", "放大", self.zoom_in),
+                                    ("适应", "显示全部", self.zoom_to_fit)):
+            button = QPushButton(text)
+            button.setToolTip(tooltip)
+            button.setFixedHeight(18)
+            button.setStyleSheet(zoom_button_style)
+            button.clicked.connect(slot)
+            title_layout.addWidget(button)
+        
         # 时间显示
         time_label_style = """
             QLabel {
@@ -69,185 +106,118 @@ class TimelineWidget(QWidget):
         
         layout.addWidget(title_bar)
         
-        # 缩略图时间轴区域
-        self.timeline_widget = QWidget()
-        self.timeline_widget.setFixedHeight(80)
-        self.timeline_widget.setStyleSheet("background-color: #1e1e1e; border: none;")
+        # 缩略图时间轴区域（自绘，只绘制可见部分）
+        self.strip = TimelineStrip()
+        self.strip.clicked.connect(self.on_timeline_click)
+        self.strip.tile_double_clicked.connect(self.on_thumbnail_click)
+        self.strip.playhead_dragged.connect(self.on_indicator_drag)
+        layout.addWidget(self.strip)
         
-        # 添加时间轴点击事件
-        self.timeline_widget.mousePressEvent = self.on_timeline_click
-        
-        # 缩略图布局
-        self.thumbnail_layout = QHBoxLayout(self.timeline_widget)
-        self.thumbnail_layout.setSpacing(1)
-        self.thumbnail_layout.setContentsMargins(5, 5, 5, 5)
-        
-        layout.addWidget(self.timeline_widget)
+        # 按键活动条（按键速率、停顿和输入法上屏）
+        self.activity_strip = TypingActivityStrip(self.strip)
+        layout.addWidget(self.activity_strip)
         
         self.setLayout(layout)
-        # 添加时间轴指示器（初始化就显示在0）
-        if not hasattr(self, 'timeline_indicator'):
-            self.timeline_indicator = QLabel(self.timeline_widget)
-            self.timeline_indicator.setFixedSize(6, 70)
-            self.timeline_indicator.setStyleSheet("""
-                background-color: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #00c3ff, stop:1 #007AFF);
-                border: none;
-                border-radius: 3px;
-                box-shadow: 0px 0px 8px #007AFF;
-            """)
-            self.timeline_indicator.move(0, 0)
-            self.timeline_indicator.show()
-            self.timeline_indicator.raise_()
-            self.timeline_indicator.setAttribute(Qt.WA_TransparentForMouseEvents, False)
-            self.timeline_indicator.mousePressEvent = self.on_indicator_press
-            self.timeline_indicator.mouseMoveEvent = self.on_indicator_drag
-            self.timeline_indicator.mouseReleaseEvent = self.on_indicator_release
     
     def load_thumbnails(self, video_path):
-        """加载缩略图"""
+        """加载缩略图
+
+        优先使用磁盘缓存的缩略图拼图；没有缓存时在后台线程中顺序解码生成，生成一张显示一张，
+        界面不会因长视频卡住，完整生成后写入缓存。再次加载或清空时取消尚未完成的生成。
+        """
         if not video_path:
             return
             
-        # 清空之前的缩略图
+        # 清空之前的缩略图（并取消未完成的生成）
         self.clear_thumbnails()
             
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
             return
             
-        self.fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        # 按帧索引从关键帧向前解码定位
+        index = FrameIndex.for_video(video_path, allow_scan=False) or FrameIndex.uniform(
+            int(cap.get(cv2.CAP_PROP_FRAME_COUNT)), self.fps)
+        cap.release()
+        total_frames = index.frame_count
         self.total_duration = total_frames / self.fps
         
         # 更新总时间显示
-        total_minutes = int(self.total_duration) // 60
-        total_seconds = int(self.total_duration) % 60
-        total_ms = int((self.total_duration - int(self.total_duration)) * 100)
-        self.total_time_label.setText(f"{total_minutes:02d}:{total_seconds:02d}.{total_ms:02d}")
+        self.total_time_label.setText(format_time(self.total_duration))
+        self.strip.set_video(total_frames, self.fps)
         
         # 生成缩略图（每2秒一张，从0秒开始）
-        thumbnail_interval = int(self.fps * 2)
-        
-        for i in range(0, total_frames, thumbnail_interval):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = cap.read()
-            if ret:
-                # 缩放缩略图
-                frame = cv2.resize(frame, (100, 56))
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                h, w, ch = rgb_frame.shape
-                qt_image = QImage(rgb_frame.data, w, h, ch * w, QImage.Format_RGB888)
-                pixmap = QPixmap.fromImage(qt_image)
-                
-                # 创建缩略图容器
-                container = QWidget()
-                container.setFixedSize(80, 70)
-                container.setStyleSheet("""
-                    QWidget {
-                        border: 1px solid #404040;
-                        background-color: #2a2a2a;
-                    }
-                    QWidget:hover {
-                        border: 1px solid #007AFF;
-                        background-color: #333333;
-                    }
-                """)
-                
-                # 缩略图标签
-                thumbnail_label = QLabel(container)
-                thumbnail_label.setPixmap(pixmap)
-                thumbnail_label.setGeometry(2, 2, 76, 50)
-                thumbnail_label.setStyleSheet("border: none;")
-                
-                # 时间标签
-                time_sec = i / self.fps
-                m = int(time_sec) // 60
-                s = int(time_sec) % 60
-                ms = int((time_sec - int(time_sec)) * 100)
-                time_label = QLabel(f"{m:02d}:{s:02d}.{ms:02d}", container)
-                time_label.setAlignment(Qt.AlignCenter)
-                time_label.setGeometry(2, 52, 76, 16)
-                time_label.setStyleSheet("""
-                    background-color: #1a1a1a;
-                    color: #ffffff;
-                    font-size: 10px;
-                    font-weight: bold;
-                    border: none;
-                """)
-                
-                # 支持点击和双击
-                def mousePressEvent(event, frame_pos=i):
-                    if event.type() == event.MouseButtonDblClick:
-                        self.thumbnail_clicked.emit(frame_pos)
-                    elif event.type() == event.MouseButtonPress:
-                        self.on_thumbnail_click(frame_pos)
-                container.mousePressEvent = mousePressEvent
-                
-                self.thumbnail_layout.addWidget(container)
-                self.thumbnails.append((i, container))
-        
-        cap.release()
-        self.timeline_indicator.show()
-        self.update_timeline_indicator(0)
+        interval = thumbnail_interval(self.fps)
+        cached = self.thumbnail_cache.load(video_path, interval, THUMBNAIL_SIZE)
+        if cached is not None:
+            for frame_pos, thumbnail in cached:
+                self.add_thumbnail(frame_pos, thumbnail_to_image(thumbnail))
+        else:
+            self.thumbnail_worker = ThumbnailWorker(video_path, index, range(0, total_frames, interval),
+                                                    cache=self.thumbnail_cache, interval=interval)
+            self.thumbnail_worker.thumbnail_ready.connect(self.on_thumbnail_ready)
+            self.thumbnail_worker.start()
+    
+    def set_duration(self, seconds, fps=30.0):
+        """没有视频时只按时长显示时间轴（无缩略图），fps为换算帧号用的帧率"""
+        self.clear_thumbnails()
+        self.fps = fps
+        self.total_duration = seconds
+        self.total_time_label.setText(format_time(seconds))
+        self.strip.set_video(int(seconds * fps) + 1, fps)
+    
+    def on_thumbnail_ready(self, frame_pos, image):
+        """后台生成了一张缩略图"""
+        if self.thumbnail_worker is None or self.thumbnail_worker.is_cancelled:
+            # 已取消的生成中排队未处理的信号
+            return
+        self.add_thumbnail(frame_pos, image)
+    
+    def add_thumbnail(self, frame_pos, image):
+        """把一张缩略图加入时间轴"""
+        pixmap = QPixmap.fromImage(image)
+        self.thumbnails.append((frame_pos, pixmap))
+        self.strip.add_thumbnail(frame_pos, pixmap)
+    
+    def cancel_thumbnails(self):
+        """取消尚未完成的缩略图生成"""
+        if self.thumbnail_worker is not None:
+            self.thumbnail_worker.cancel()
+            self.thumbnail_worker = None
     
     def clear_thumbnails(self):
         """清空缩略图"""
+        self.cancel_thumbnails()
         # 清空缩略图列表
         self.thumbnails = []
-        
-        # 清空布局中的所有缩略图组件
-        while self.thumbnail_layout.count():
-            child = self.thumbnail_layout.takeAt(0)
-            if child.widget():
-                child.widget().deleteLater()
-        
-        # 隐藏时间轴指示器
-        if hasattr(self, 'timeline_indicator'):
-            self.timeline_indicator.hide()
+        self.strip.clear()
+    
+    def set_typing_activity(self, activity):
+        """设置当前记录的按键活动（TypingActivity，None为不显示）"""
+        self.activity_strip.set_activity(activity)
     
-    def on_indicator_press(self, event):
-        """指示器按下事件"""
-        if event.button() == Qt.LeftButton:
-            self.is_dragging = True
-            self.drag_start_x = event.globalX()
+    def zoom_in(self):
+        self.strip.zoom_in()
     
-    def on_indicator_drag(self, event):
-        """指示器拖动事件"""
-        if self.is_dragging and hasattr(self, 'fps') and self.total_duration > 0:
-            # 鼠标在timeline_widget中的绝对x
-            global_pos = self.timeline_widget.mapFromGlobal(event.globalPos())
-            current_x = global_pos.x()
-            timeline_width = self.timeline_widget.width()
-            current_x = max(0, min(current_x, timeline_width - self.timeline_indicator.width()))
-            # 计算对应的时间位置
-            progress = current_x / timeline_width
-            frame_position = int(progress * self.total_duration * self.fps)
-            # 更新指示器位置（始终在缩略图上方）
-            self.timeline_indicator.move(current_x, 2)
-            self.timeline_indicator.raise_()
-            # 发送拖动信号
-            self.indicator_dragged.emit(frame_position)
+    def zoom_out(self):
+        self.strip.zoom_out()
     
-    def on_indicator_release(self, event):
-        """指示器释放事件"""
-        if event.button() == Qt.LeftButton:
-            self.is_dragging = False
+    def zoom_to_fit(self):
+        self.strip.zoom_to_fit()
     
-    def on_timeline_click(self, event):
+    def on_indicator_drag(self, frame_position):
+        """拖动播放头"""
+        self.indicator_dragged.emit(frame_position)
+    
+    def on_timeline_click(self, frame_position):
         """时间轴点击事件"""
-        if hasattr(self, 'fps') and self.total_duration > 0:
-            # 计算点击位置对应的时间
-            timeline_width = self.timeline_widget.width()
-            click_x = event.x()
-            progress = click_x / timeline_width
-            frame_position = int(progress * self.total_duration * self.fps)
-            
-            # 发送点击信号
-            self.timeline_clicked.emit(frame_position)
+        self.timeline_clicked.emit(frame_position)
     
     def on_thumbnail_click(self, frame_position):
-        """缩略图点击事件"""
+        """缩略图双击事件：跳到该缩略图的位置"""
         self.current_position = frame_position
+        self.strip.set_playhead(frame_position)
         # 发送缩略图点击信号
         self.thumbnail_clicked.emit(frame_position)
     
@@ -257,27 +227,16 @@ class TimelineWidget(QWidget):
         
         # 更新当前时间显示
         if self.fps > 0:
-            current_time = frame_position / self.fps
-            minutes = int(current_time) // 60
-            seconds = int(current_time) % 60
-            ms = int((current_time - int(current_time)) * 100)
-            self.current_time_label.setText(f"{minutes:02d}:{seconds:02d}.{ms:02d}")
+            self.current_time_label.setText(format_time(frame_position / self.fps))
         
-        # 更新指示器位置
+        # 更新播放头位置
         self.update_timeline_indicator(frame_position)
     
     def update_timeline_indicator(self, frame_position):
-        """更新时间轴指示器位置"""
-        if hasattr(self, 'timeline_indicator') and self.total_duration > 0:
-            # 计算指示器位置
-            progress = frame_position / (self.total_duration * self.fps)
-            timeline_width = self.timeline_widget.width()
-            indicator_x = int(progress * timeline_width)
-            indicator_x = max(0, min(indicator_x, timeline_width - self.timeline_indicator.width()))
-            self.timeline_indicator.move(indicator_x, 2)
-            self.timeline_indicator.raise_()
-            self.timeline_indicator.show()
+        """更新时间轴播放头位置"""
+        if self.total_duration > 0:
+            self.strip.set_playhead(frame_position)
     
     def set_fps(self, fps):
         """设置帧率"""
-        self.fps = fps 
\ No newline at end of file
+        self.fps = fps
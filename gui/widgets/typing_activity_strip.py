@@ -0,0 +1,111 @@
+import math
+
+from PyQt5.QtWidgets import QWidget, QSizePolicy, QToolTip
+from PyQt5.QtCore import Qt, QRect
+from PyQt5.QtGui import QPainter, QColor
+
+from .timeline_strip import format_time
+
+
+class TypingActivityStrip(QWidget):
+    """时间轴下方的按键活动条
+
+    与TimelineStrip共用视图（起点和每像素帧数），每BIN_WIDTH像素一个箱子，柱高为该段时间的
+    按键速率（次/秒，以全程峰值为满高），停顿区间加暗底色，输入法上屏在顶部画短竖线。
+    分箱由TypingActivity完成并缓存，缩放、平移时只需按新视图取一次。
+    """
+
+    BIN_WIDTH = 2
+    HEIGHT = 18
+
+    def __init__(self, strip, parent=None):
+        super().__init__(parent)
+        self.strip = strip
+        self.activity = None
+        self.setFixedHeight(self.HEIGHT)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setMouseTracking(True)
+        strip.view_changed.connect(self.update)
+
+    def set_activity(self, activity):
+        self.activity = activity
+        self.update()
+
+    def seconds_per_pixel(self):
+        return self.strip.frames_per_pixel / (self.strip.fps or 30.0)
+
+    def visible_bins(self):
+        """当前视图下的分箱 (第一个箱子的起点x, 每箱秒数, 速率数组)
+
+        箱子对齐到时间而不是控件，平移整数个箱子时可直接复用缓存。
+        """
+        seconds_per_px = self.seconds_per_pixel()
+        bin_seconds = seconds_per_px * self.BIN_WIDTH
+        view_start = self.strip.visible_range()[0] / (self.strip.fps or 30.0)
+        first_bin = math.floor(view_start / bin_seconds)
+        n_bins = math.ceil(self.width() / self.BIN_WIDTH) + 1
+        start = first_bin * bin_seconds
+        x0 = (start - view_start) / seconds_per_px
+        return x0, bin_seconds, self.activity.rates(start, bin_seconds, n_bins)
+
+    def _time_at(self, x):
+        return (self.strip.visible_range()[0] + x * self.strip.frames_per_pixel) / (self.strip.fps or 30.0)
+
+    def _x_for_time(self, seconds):
+        return self.strip.x_for_frame(seconds * (self.strip.fps or 30.0))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.fillRect(rect, QColor('#1a1a1a'))
+        if self.activity is not None and len(self.activity) and self.strip.total_frames > 0:
+            start, end = self._time_at(rect.left()), self._time_at(rect.right() + 1)
+            self._paint_pauses(painter, start, end)
+            self._paint_rates(painter, rect)
+            self._paint_commits(painter, start, end)
+        painter.end()
+
+    def _paint_pauses(self, painter, start, end):
+        color = QColor('#3a2d1e')
+        for pause_start, pause_end in zip(*self.activity.pauses_between(start, end)):
+            x1 = int(self._x_for_time(pause_start))
+            x2 = int(math.ceil(self._x_for_time(pause_end)))
+            painter.fillRect(QRect(x1, 0, max(x2 - x1, 1), self.height()), color)
+
+    def _paint_rates(self, painter, rect):
+        x0, _, rates = self.visible_bins()
+        peak = self.activity.peak_rate or 1.0
+        usable = self.height() - 4
+        heights = (rates / peak).clip(0, 1) * usable
+        bars = []
+        for i in heights.nonzero()[0]:
+            x = int(x0 + i * self.BIN_WIDTH)
+            if x + self.BIN_WIDTH < rect.left() or x > rect.right():
+                continue
+            h = max(int(round(heights[i])), 1)
+            bars.append(QRect(x, self.height() - h, self.BIN_WIDTH, h))
+        if bars:
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(QColor('#34c759'))
+            painter.drawRects(bars)
+
+    def _paint_commits(self, painter, start, end):
+        painter.setPen(QColor('#ff9f0a'))
+        for t in self.activity.commits_between(start, end):
+            x = int(self._x_for_time(t))
+            painter.drawLine(x, 0, x, 4)
+
+    def mouseMoveEvent(self, event):
+        if self.activity is None or self.strip.total_frames <= 0:
+            return
+        x0, bin_seconds, rates = self.visible_bins()
+        i = int((event.x() - x0) // self.BIN_WIDTH)
+        if not 0 <= i < len(rates):
+            return
+        seconds = self._time_at(event.x())
+        text = f"{format_time(seconds, False)}  {rates[i]:.1f} 键/秒"
+        pause_starts, pause_ends = self.activity.pauses_between(seconds, seconds)
+        if len(pause_starts):
+            text += f"  停顿 {pause_ends[0] - pause_starts[0]:.1f} 秒"
+        QToolTip.showText(event.globalPos(), text, self)
@@ -0,0 +1,78 @@
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtCore import Qt, QRect, QSize, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QPen
+
+
+class VideoSurface(QWidget):
+    """视频显示控件
+
+    直接在paintEvent中绘制播放线程发来的QImage。帧已按显示区域缩放和转换格式，
+    绘制时只是一次拷贝；窗口大小刚改变、新尺寸的帧尚未到达时才临时缩放旧帧。
+    没有帧时显示提示文字。
+    """
+
+    # 显示区域大小变化（设备像素），播放服务据此调整输出尺寸
+    display_size_changed = pyqtSignal(int, int)
+
+    def __init__(self, text='暂无视频', parent=None):
+        super().__init__(parent)
+        self._image = None
+        self._text = text
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.setMinimumSize(160, 90)
+
+    def display_size(self):
+        """显示区域大小（设备像素）"""
+        ratio = self.devicePixelRatioF()
+        return int(self.width() * ratio), int(self.height() * ratio)
+
+    def set_frame(self, image):
+        """显示一帧（QImage）"""
+        if image is None or image.isNull():
+            return
+        image.setDevicePixelRatio(self.devicePixelRatioF())
+        self._image = image
+        self.update()
+
+    def set_text(self, text):
+        """清除画面并显示提示文字"""
+        self._image = None
+        self._text = text
+        self.update()
+
+    def clear(self):
+        self.set_text(self._text)
+
+    def sizeHint(self):
+        return QSize(640, 360)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.display_size_changed.emit(*self.display_size())
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), QColor('#1e1e1e'))
+        if self._image is None:
+            painter.setPen(QPen(QColor('#404040'), 2, Qt.DashLine))
+            painter.drawRoundedRect(self.rect().adjusted(1, 1, -1, -1), 5, 5)
+            painter.setPen(QColor('#666666'))
+            font = painter.font()
+            font.setPixelSize(14)
+            painter.setFont(font)
+            painter.drawText(self.rect(), Qt.AlignCenter, self._text)
+            return
+        image_size = self._image.size() / self._image.devicePixelRatio()
+        if image_size.width() <= self.width() and image_size.height() <= self.height() and (
+                image_size.width() == self.width() or image_size.height() == self.height()):
+            # 帧已是显示尺寸，居中绘制，不做缩放
+            x = (self.width() - image_size.width()) // 2
+            y = (self.height() - image_size.height()) // 2
+            painter.drawImage(x, y, self._image)
+        else:
+            # 尺寸变化后的过渡帧
+            target = QRect(0, 0, image_size.width(), image_size.height())
+            target.setSize(image_size.scaled(self.size(), Qt.KeepAspectRatio))
+            target.moveCenter(self.rect().center())
+            painter.drawImage(target, self._image)
@@ -1,87 +1,162 @@
 import logging
-from PyQt5.QtWidgets import QWidget, QGridLayout, QPushButton, QVBoxLayout
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont
+
+# 键盘布局表：每行为 (按键文字, 宽度单位)，文字大写即为按键名；每行总宽15个单位
+KEY_ROWS = [
+    [('Esc', 1)] + [(c, 1) for c in '1234567890-='] + [('Backspace', 2)],
+    [('Tab', 1.5)] + [(c, 1) for c in 'QWERTYUIOP[]'] + [('\\', 1.5)],
+    [('Caps', 1.75)] + [(c, 1) for c in 'ASDFGHJKL;\''] + [('Enter', 2.25)],
+    [('Shift', 2.25)] + [(c, 1) for c in 'ZXCVBNM,./'] + [('Shift', 2.75)],
+    [('Ctrl', 1.5), ('Win', 1.25), ('Alt', 1.25), ('Space', 5.75), ('Alt', 1.25), ('Fn', 1.25),
+     ('Menu', 1.25), ('Ctrl', 1.5)],
+]
+ROW_UNITS = 15
 
 
 class VirtualKeyboard(QWidget):
-    """虚拟键盘控件 - 纯UI组件"""
-    
+    """虚拟键盘控件 - 纯UI组件
+
+    整个键盘由一个控件按布局表自绘。记录上一次高亮的按键，高亮变化时只重绘状态改变的按键区域。
+    热力模式下按各键的按下次数着色并显示次数（双击键盘切换）。
+    """
+
+    SPACING = 4
+    MARGIN = 8
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.key_buttons = {}
+        self.highlighted = frozenset()
+        self.key_counts = {}
+        self.heat_mode = False
+        self._keys = []  # [(按键名, 文字, 区域)]
+        self._rects_by_name = {}
         self.init_ui()
-    
+
     def init_ui(self):
         """初始化UI"""
-        layout = QGridLayout(self)
-        layout.setSpacing(4)
-        layout.setContentsMargins(8, 8, 8, 8)
-        
-        # QWERTY布局
-        keys = [
-            ['Esc', '', '', '', '', '', '', '', '', '', '', '', 'Backspace'],
-            ['Tab', 'Q', 'W', 'E', 'R', 'T', 'Y', 'U', 'I', 'O', 'P', '[', ']', '\\'],
-            ['Caps', 'A', 'S', 'D', 'F', 'G', 'H', 'J', 'K', 'L', ';', '\'', 'Enter'],
-            ['Shift', 'Z', 'X', 'C', 'V', 'B', 'N', 'M', ',', '.', '/', 'Shift'],
-            ['Ctrl', 'Win', 'Alt', 'Space', 'Alt', 'Fn', 'Menu', 'Ctrl']
-        ]
-        
-        for row, row_keys in enumerate(keys):
-            col = 0
-            for key in row_keys:
-                if key:
-                    btn = QPushButton(key)
-                    btn.setEnabled(False)
-                    btn.setFixedHeight(32)
-                    if key == 'Space':
-                        btn.setFixedWidth(180)
-                    else:
-                        btn.setFixedWidth(36)
-                    btn.setStyleSheet(self.default_style())
-                    self.key_buttons[key.upper()] = btn
-                    layout.addWidget(btn, row, col, 1, 1)
-                col += 1
-        
-        self.setLayout(layout)
-        self.setStyleSheet("background: #23272e; border-radius: 8px;")
-    
-    def default_style(self):
-        """默认样式"""
-        return "QPushButton { background: #23272e; color: #fff; border: 1px solid #444; border-radius: 4px; }"
-    
-    def highlight_style(self):
-        """高亮样式"""
-        return "QPushButton { background: #007AFF; color: #fff; border: 2px solid #007AFF; border-radius: 4px; }"
-    
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+        self.setMinimumSize(400, 140)
+        self._layout_keys()
+
+    @property
+    def key_names(self):
+        return set(self._rects_by_name)
+
+    def key_rects(self, name):
+        """按键名对应的区域（同名的键如左右Shift有多个）"""
+        return self._rects_by_name.get(name.upper(), [])
+
+    def _layout_keys(self):
+        """按当前大小计算每个按键的区域"""
+        unit_w = (self.width() - 2 * self.MARGIN) / ROW_UNITS
+        row_h = (self.height() - 2 * self.MARGIN) / len(KEY_ROWS)
+        self._keys = []
+        self._rects_by_name = {}
+        for row, row_keys in enumerate(KEY_ROWS):
+            x = float(self.MARGIN)
+            y = self.MARGIN + row * row_h
+            for label, units in row_keys:
+                rect = QRectF(x, y, units * unit_w - self.SPACING, row_h - self.SPACING)
+                name = label.upper()
+                self._keys.append((name, label, rect))
+                self._rects_by_name.setdefault(name, []).append(rect)
+                x += units * unit_w
+
+    def resizeEvent(self, event):
+        self._layout_keys()
+        super().resizeEvent(event)
+
     def highlight_keys(self, keys):
-        """高亮指定按键
+        """高亮指定按键，只重绘状态变化的按键
         Args:
             keys: List[str]，如['A', 'S', 'D']
         """
-        keyset = set(k.upper() for k in keys)
-        logging.debug(f'VirtualKeyboard.highlight_keys: {keyset}')
-        for k, btn in self.key_buttons.items():
-            if k in keyset:
-                btn.setStyleSheet(self.highlight_style())
+        keyset = frozenset(k.upper() for k in keys)
+        changed = keyset ^ self.highlighted
+        if not changed:
+            return
+        logging.debug(f'VirtualKeyboard.highlight_keys: {set(keyset)}')
+        self.highlighted = keyset
+        for name in changed:
+            for rect in self._rects_by_name.get(name, []):
+                self.update(rect.toAlignedRect().adjusted(-2, -2, 2, 2))
+
+    def set_key_counts(self, counts):
+        """设置各键的按下次数（热力模式使用）"""
+        self.key_counts = {name.upper(): count for name, count in counts.items()}
+        if self.heat_mode:
+            self.update()
+
+    def set_heat_mode(self, enabled):
+        if enabled != self.heat_mode:
+            self.heat_mode = enabled
+            self.update()
+
+    def mouseDoubleClickEvent(self, event):
+        self.set_heat_mode(not self.heat_mode)
+
+    def _heat_color(self, count, max_count):
+        """按次数从深色过渡到橙色"""
+        ratio = count / max_count if max_count else 0.0
+        base, hot = (0x23, 0x27, 0x2e), (0xff, 0x8c, 0x1a)
+        return QColor(*(int(b + (h - b) * ratio) for b, h in zip(base, hot)))
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        dirty = QRectF(event.rect())
+        painter.fillRect(event.rect(), QColor('#23272e'))
+        font = QFont(painter.font())
+        font.setPixelSize(11)
+        small_font = QFont(font)
+        small_font.setPixelSize(8)
+        max_count = max(self.key_counts.values(), default=0)
+        for name, label, rect in self._keys:
+            if not rect.intersects(dirty):
+                continue
+            if name in self.highlighted:
+                painter.setPen(QPen(QColor('#007AFF'), 2))
+                painter.setBrush(QColor('#007AFF'))
             else:
-                btn.setStyleSheet(self.default_style())
+                painter.setPen(QPen(QColor('#444444'), 1))
+                if self.heat_mode:
+                    painter.setBrush(self._heat_color(self.key_counts.get(name, 0), max_count))
+                else:
+                    painter.setBrush(QColor('#23272e'))
+            painter.drawRoundedRect(rect, 4, 4)
+            painter.setPen(QColor('#ffffff'))
+            painter.setFont(font)
+            painter.drawText(rect, Qt.AlignCenter, label)
+            if self.heat_mode and self.key_counts.get(name):
+                painter.setFont(small_font)
+                painter.drawText(rect.adjusted(3, 1, -3, -1), Qt.AlignRight | Qt.AlignBottom,
+                                 str(self.key_counts[name]))
+        painter.end()
 
 
 class VirtualKeyboardWindow(QWidget):
     """虚拟键盘窗口"""
-    
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowFlags(Qt.Tool | Qt.FramelessWindowHint)
         self.setWindowOpacity(0.85)
         self.setAttribute(Qt.WA_TranslucentBackground)
-        
+
         self.keyboard = VirtualKeyboard()
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(self.keyboard)
         self.setFixedSize(700, 220)
-    
+
     def highlight_keys(self, keys):
         """高亮指定按键"""
-        self.keyboard.highlight_keys(keys) 
\ No newline at end of file
+        self.keyboard.highlight_keys(keys)
+
+    def set_key_counts(self, counts):
+        self.keyboard.set_key_counts(counts)
+
+    def set_heat_mode(self, enabled):
+        self.keyboard.set_heat_mode(enabled)
@@ -1,9 +1,7 @@
 import os
-import json
-import glob
 from datetime import datetime
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem, 
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QAbstractItemView,
     QPushButton, QLabel, QLineEdit, QDateEdit, QTimeEdit, QMessageBox,
     QHeaderView, QSplitter, QTextEdit, QGroupBox, QGridLayout
 )
@@ -11,6 +9,11 @@ from PyQt5.QtCore import Qt, QDate, QTime, QDateTime
 from PyQt5.QtGui import QFont
 from .styles import FONT_TITLE, FONT_CONTENT, STYLE_SHEET
 from .playback_window import PlaybackWindow
+from gui.services.storage.session_store import load_session_record
+from gui.services.storage.session_catalog import open_catalog, ORDER_BY_RELEVANCE
+from gui.models.session_table_model import SessionTableModel
+from gui.services.storage.data_watcher import DataDirectoryWatcher
+from gui.widgets.button_delegate import ButtonDelegate
 
 
 class DataManagerWindow(QWidget):
@@ -23,8 +26,8 @@ class DataManagerWindow(QWidget):
         self.setStyleSheet(STYLE_SHEET)
         
         self.data_dir = 'data'
-        self.records = []
-        self.filtered_records = []
+        self.catalog = None
+        self.watcher = None
         self.playback_window = None
         
         self.init_ui()
@@ -52,6 +55,7 @@ class DataManagerWindow(QWidget):
         # 按钮区域
         button_layout = self.create_button_layout()
         layout.addLayout(button_layout)
+        self.model.total_changed.connect(self.on_total_changed)
         
         self.setLayout(layout)
     
@@ -85,7 +89,7 @@ class DataManagerWindow(QWidget):
         # 关键词搜索
         layout.addWidget(QLabel("关键词:"), 1, 0)
         self.keyword_edit = QLineEdit()
-        self.keyword_edit.setPlaceholderText("输入题目内容关键词")
+        self.keyword_edit.setPlaceholderText("输入题目、作答或输入过程中的关键词")
         layout.addWidget(self.keyword_edit, 1, 1, 1, 3)
         
         # 搜索按钮
@@ -102,25 +106,40 @@ class DataManagerWindow(QWidget):
         
         return group
     
+    # 表格列（见SessionTableModel.COLUMNS）
+    TABLE_COLUMNS = ['time', 'question', 'answer', 'screen', 'webcam', 'action']
+    
     def create_data_table(self):
-        """创建数据表格"""
-        self.table = QTableWidget()
-        self.table.setColumnCount(6)
-        self.table.setHorizontalHeaderLabels([
-            '时间', '题目', '答案', '屏幕录制', '摄像头录制', '操作'
-        ])
+        """创建数据表格（按需分页加载的表格模型）"""
+        self.model = SessionTableModel(columns=self.TABLE_COLUMNS, parent=self)
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        
+        # 回放按钮由委托绘制，不为每行创建控件
+        self.play_delegate = ButtonDelegate(self.table)
+        self.play_delegate.clicked.connect(self.on_play_clicked)
+        self.table.setItemDelegateForColumn(self.TABLE_COLUMNS.index('action'), self.play_delegate)
         
         # 设置表格属性
         header = self.table.horizontalHeader()
         header.setSectionResizeMode(0, QHeaderView.ResizeToContents)  # 时间
         header.setSectionResizeMode(1, QHeaderView.Stretch)           # 题目
-        header.setSectionResizeMode(2, QHeaderView.ResizeToContents)  # 答案
+        header.setSectionResizeMode(2, QHeaderView.Interactive)       # 答案
         header.setSectionResizeMode(3, QHeaderView.ResizeToContents)  # 屏幕录制
         header.setSectionResizeMode(4, QHeaderView.ResizeToContents)  # 摄像头录制
-        header.setSectionResizeMode(5, QHeaderView.ResizeToContents)  # 操作
+        header.setSectionResizeMode(5, QHeaderView.Fixed)             # 操作
+        header.resizeSection(5, 80)
+        self.table.verticalHeader().setDefaultSectionSize(32)
         
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
         self.table.setAlternatingRowColors(True)
+        self.table.setMouseTracking(True)
+        
+        # 排序由目录索引查询完成
+        header.setSortIndicator(0, Qt.DescendingOrder)
+        header.sortIndicatorChanged.connect(lambda *_: header.setSortIndicatorShown(True))
+        self.table.setSortingEnabled(True)
     
     def create_button_layout(self):
         """创建按钮布局"""
@@ -142,115 +161,77 @@ class DataManagerWindow(QWidget):
         return layout
     
     def load_records(self):
-        """加载记录"""
-        self.records = []
-        
+        """加载记录：先显示目录索引中已有的记录，在后台增量同步目录索引后重新查询"""
         if not os.path.exists(self.data_dir):
             return
         
-        # 查找所有JSON文件
-        json_files = glob.glob(os.path.join(self.data_dir, '*.json'))
-        
-        for json_file in json_files:
-            try:
-                with open(json_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # 提取时间戳
-                timestamp = data.get('timestamp', 0)
-                record_time = datetime.fromtimestamp(timestamp)
-                
-                # 检查对应的视频文件是否存在
-                screen_video = data.get('screen_video_path', '')
-                webcam_video = data.get('webcam_video_path', '')
-                
-                screen_exists = os.path.exists(screen_video) if screen_video else False
-                webcam_exists = os.path.exists(webcam_video) if webcam_video else False
-                
-                record = {
-                    'json_file': json_file,
-                    'timestamp': timestamp,
-                    'record_time': record_time,
-                    'question': data.get('question', {}),
-                    'user_input': data.get('user_input', ''),
-                    'keystrokes': data.get('keystrokes', []),  # 原有的input_tool_keystrokes
-                    'raw_keystrokes': data.get('raw_keystrokes', []),  # 新增的底层keystrokes
-                    'recording_start_time': data.get('recording_start_time', timestamp),  # 添加录制开始时间
-                    'screen_video': screen_video,
-                    'webcam_video': webcam_video,
-                    'screen_exists': screen_exists,
-                    'webcam_exists': webcam_exists
-                }
-                
-                self.records.append(record)
-                
-            except Exception as e:
-                print(f"加载记录失败 {json_file}: {e}")
-        
-        # 按时间倒序排序
-        self.records.sort(key=lambda x: x['timestamp'], reverse=True)
-        self.filtered_records = self.records.copy()
-        
-        self.update_table()
+        if self.catalog is None:
+            self.catalog = open_catalog(self.data_dir)
+            self.model.set_catalog(self.catalog)
+            # 之后的变化由目录监视增量更新，无需重新扫描
+            self.watcher = DataDirectoryWatcher(self.catalog, parent=self)
+            self.watcher.sessions_changed.connect(self.model.apply_changes)
+            self.watcher.scan_finished.connect(self.on_scan_finished)
+        self.watcher.scan()
     
-    def update_table(self):
-        """更新表格"""
-        self.table.setRowCount(len(self.filtered_records))
-        
-        for row, record in enumerate(self.filtered_records):
-            # 时间
-            time_str = record['record_time'].strftime('%Y-%m-%d %H:%M:%S')
-            self.table.setItem(row, 0, QTableWidgetItem(time_str))
-            
-            # 题目
-            question_content = record['question'].get('content', '')[:50] + '...' if len(record['question'].get('content', '')) > 50 else record['question'].get('content', '')
-            self.table.setItem(row, 1, QTableWidgetItem(question_content))
-            
-            # 答案
-            answer = record['question'].get('answer', '无')
-            self.table.setItem(row, 2, QTableWidgetItem(answer))
-            
-            # 屏幕录制
-            screen_status = "✓" if record['screen_exists'] else "✗"
-            self.table.setItem(row, 3, QTableWidgetItem(screen_status))
-            
-            # 摄像头录制
-            webcam_status = "✓" if record['webcam_exists'] else "✗"
-            self.table.setItem(row, 4, QTableWidgetItem(webcam_status))
-            
-            # 操作按钮
-            if record['screen_exists'] or record['webcam_exists']:
-                play_btn = QPushButton("回放")
-                play_btn.setFont(FONT_CONTENT)
-                play_btn.clicked.connect(lambda checked, r=record: self.open_playback(r))
-                self.table.setCellWidget(row, 5, play_btn)
-        
-        self.stats_label.setText(f"共 {len(self.filtered_records)} 条记录")
+    def on_scan_finished(self, updated, removed):
+        """后台扫描完成后重新查询"""
+        if updated or removed:
+            self.model.refresh()
+    
+    def on_total_changed(self, total):
+        """更新统计信息"""
+        self.stats_label.setText(f"共 {total} 条记录")
+    
+    def on_play_clicked(self, index):
+        """回放按钮"""
+        self.open_playback(self._record_from_row(self.model.record(index.row())))
+    
+    def _record_from_row(self, row):
+        """目录索引行 -> 回放窗口使用的记录格式（不含按键明细）"""
+        timestamp = row.get('timestamp') or 0
+        return {
+            'json_file': row['path'],
+            'timestamp': timestamp,
+            'record_time': datetime.fromtimestamp(timestamp),
+            'question': row.get('question') or {},
+            'user_input': row.get('user_input') or '',
+            'recording_start_time': row.get('recording_start_time') or timestamp,  # 添加录制开始时间
+            'screen_video': row.get('screen_video_path') or '',
+            'webcam_video': row.get('webcam_video_path') or '',
+            'screen_exists': row['screen_exists'],
+            'webcam_exists': row['webcam_exists'],
+            'screen_duration': row.get('screen_duration'),
+            'webcam_duration': row.get('webcam_duration')
+        }
     
     def search_records(self):
-        """搜索记录"""
+        """搜索记录（时间范围交给目录索引查询，关键词走全文检索并按相关度排序）"""
         start_datetime = QDateTime(self.start_date.date(), self.start_time.time())
         end_datetime = QDateTime(self.end_date.date(), self.end_time.time())
         keyword = self.keyword_edit.text().strip().lower()
         
-        self.filtered_records = []
-        
-        for record in self.records:
-            # 时间过滤
-            record_datetime = QDateTime.fromSecsSinceEpoch(int(record['timestamp']))
-            if record_datetime < start_datetime or record_datetime > end_datetime:
-                continue
-            
-            # 关键词过滤
-            if keyword:
-                question_content = record['question'].get('content', '').lower()
-                user_input = record['user_input'].lower()
-                if keyword not in question_content and keyword not in user_input:
-                    continue
-            
-            self.filtered_records.append(record)
-        
-        self.update_table()
+        self.model.filters = {
+            'start_time': start_datetime.toSecsSinceEpoch(),
+            'end_time': end_datetime.toSecsSinceEpoch(),
+        }
+        if keyword:
+            self.model.filters['keyword'] = keyword
+            self.model.order_by = ORDER_BY_RELEVANCE
+            self.table.horizontalHeader().setSortIndicatorShown(False)
+        elif self.model.order_by == ORDER_BY_RELEVANCE:
+            self._reset_sort()
+        self.model.refresh()
+    
+    def _reset_sort(self):
+        """恢复默认排序（时间倒序）"""
+        self.model.order_by = 'timestamp'
+        self.model.descending = True
+        header = self.table.horizontalHeader()
+        header.blockSignals(True)
+        header.setSortIndicator(0, Qt.DescendingOrder)
+        header.blockSignals(False)
+        header.setSortIndicatorShown(True)
     
     def reset_search(self):
         """重置搜索"""
@@ -260,8 +241,10 @@ class DataManagerWindow(QWidget):
         self.end_time.setTime(QTime(23, 59))
         self.keyword_edit.clear()
         
-        self.filtered_records = self.records.copy()
-        self.update_table()
+        self.model.filters = {}
+        if self.model.order_by == ORDER_BY_RELEVANCE:
+            self._reset_sort()
+        self.model.refresh()
     
     def open_playback(self, record):
         """打开回放窗口"""
@@ -269,6 +252,15 @@ class DataManagerWindow(QWidget):
             QMessageBox.warning(self, "警告", "没有可播放的视频文件")
             return
         
+        if 'keystrokes' not in record:
+            try:
+                data = load_session_record(record['json_file'])
+            except Exception as e:
+                QMessageBox.warning(self, "警告", f"加载按键记录失败: {e}")
+                return
+            record['keystrokes'] = data.get('keystrokes', [])  # 原有的input_tool_keystrokes
+            record['raw_keystrokes'] = data.get('raw_keystrokes', [])  # 新增的底层keystrokes
+        
         if not self.playback_window:
             self.playback_window = PlaybackWindow()
         
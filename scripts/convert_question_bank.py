@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+把JSON数组题库转换为JSONL题库并生成旁路索引（或只为已有JSONL题库重建索引）
+
+用法: python scripts/convert_question_bank.py textlib/questions.json [-o textlib/questions.jsonl]
+      python scripts/convert_question_bank.py textlib/questions.jsonl --reindex
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textlib import convert_json_to_jsonl, build_jsonl_index, TextLib
+
+
+def main():
+    parser = argparse.ArgumentParser(description='转换题库为JSONL格式')
+    parser.add_argument('source', help='JSON数组题库（--reindex时为JSONL题库）')
+    parser.add_argument('-o', '--output', help='输出的JSONL路径，默认与源文件同名')
+    parser.add_argument('--reindex', action='store_true', help='只为JSONL题库重建旁路索引')
+    args = parser.parse_args()
+
+    if args.reindex:
+        index_path = build_jsonl_index(args.source)
+        print(f"✓ 已生成索引: {index_path}")
+        jsonl_path = args.source
+    else:
+        jsonl_path = convert_json_to_jsonl(args.source, args.output)
+        print(f"✓ {args.source} -> {jsonl_path}")
+
+    lib = TextLib(jsonl_path)
+    print(f"题目数: {len(lib.questions)}, 类型: {lib.get_all_types()}, 语言: {lib.get_all_languages()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+把data目录下的JSON会话记录转换为二进制会话容器（.ersc）
+
+用法: python scripts/convert_sessions.py [--data-dir data] [--no-compress] [--force]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.services.storage.session_container import CONTAINER_SUFFIX, convert_json_to_container
+
+
+def main():
+    parser = argparse.ArgumentParser(description='转换JSON会话记录为二进制会话容器')
+    parser.add_argument('--data-dir', default='data', help='数据目录')
+    parser.add_argument('--no-compress', action='store_true', help='不压缩文本段')
+    parser.add_argument('--force', action='store_true', help='覆盖已存在的容器文件')
+    args = parser.parse_args()
+
+    converted = skipped = failed = 0
+    for fname in sorted(os.listdir(args.data_dir)):
+        if not fname.endswith('.json'):
+            continue
+        json_path = os.path.join(args.data_dir, fname)
+        output_path = os.path.splitext(json_path)[0] + CONTAINER_SUFFIX
+        if os.path.exists(output_path) and not args.force:
+            skipped += 1
+            continue
+        try:
+            convert_json_to_container(json_path, output_path, compress=not args.no_compress)
+            converted += 1
+            print(f"✓ {json_path} -> {output_path}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {json_path}: {e}")
+
+    print(f"转换完成: 成功 {converted}, 跳过 {skipped}, 失败 {failed}")
+
+
+if __name__ == '__main__':
+    main()
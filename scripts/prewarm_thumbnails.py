@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+为data目录下的录制视频预先生成时间轴缩略图缓存（同时生成帧索引缓存），
+可选地生成拖动预览和倒放用的低分辨率帧
+
+用法: python scripts/prewarm_thumbnails.py [--data-dir data] [--max-mb 256] [--force] [--scrub-store]
+"""
+
+import os
+import sys
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+
+from gui.services.playback.frame_index import FrameIndex
+from gui.services.playback.scrub_store import ScrubStore, build_scrub_store
+from gui.services.playback.thumbnail_cache import ThumbnailCache, DEFAULT_THUMBNAIL_CACHE_BYTES
+from gui.services.playback.thumbnail_worker import THUMBNAIL_SIZE, iter_thumbnails, thumbnail_interval
+
+
+def prewarm_video(video_path, cache, force=False):
+    """生成一个视频的缩略图缓存，返回缩略图数；已有有效缓存时返回None"""
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise OSError('无法打开视频')
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    interval = thumbnail_interval(fps)
+    if not force and cache.load(video_path, interval, THUMBNAIL_SIZE) is not None:
+        return None
+    index = FrameIndex.for_video(video_path)
+    thumbnails = list(iter_thumbnails(video_path, index, range(0, index.frame_count, interval)))
+    cache.save(video_path, interval, THUMBNAIL_SIZE, thumbnails)
+    return len(thumbnails)
+
+
+def prewarm_scrub_store(video_path, force=False):
+    """生成一个视频的低分辨率帧，返回帧数；已有有效的低分辨率帧时返回None"""
+    if not force and ScrubStore.open(video_path) is not None:
+        return None
+    store = build_scrub_store(video_path, FrameIndex.for_video(video_path))
+    if store is None:
+        raise OSError('无法生成低分辨率帧')
+    return len(store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='预先生成时间轴缩略图缓存')
+    parser.add_argument('--data-dir', default='data', help='数据目录')
+    parser.add_argument('--max-mb', type=int, default=DEFAULT_THUMBNAIL_CACHE_BYTES // (1024 * 1024),
+                        help='缩略图缓存的总大小上限（MB）')
+    parser.add_argument('--force', action='store_true', help='重新生成已有的缓存')
+    parser.add_argument('--scrub-store', action='store_true',
+                        help='同时生成拖动预览和倒放用的低分辨率帧（占用较多磁盘空间）')
+    args = parser.parse_args()
+
+    cache = ThumbnailCache(max_bytes=args.max_mb * 1024 * 1024)
+    generated = skipped = failed = 0
+    for fname in sorted(os.listdir(args.data_dir)):
+        if not fname.endswith('.mp4'):
+            continue
+        video_path = os.path.join(args.data_dir, fname)
+        try:
+            count = prewarm_video(video_path, cache, force=args.force)
+            if args.scrub_store:
+                frames = prewarm_scrub_store(video_path, force=args.force)
+                if frames is not None:
+                    print(f"✓ {video_path}: {frames} 帧低分辨率帧")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {video_path}: {e}")
+            continue
+        if count is None:
+            skipped += 1
+        else:
+            generated += 1
+            print(f"✓ {video_path}: {count} 张缩略图")
+
+    print(f"预热完成: 生成 {generated}, 跳过 {skipped}, 失败 {failed}")
+
+
+if __name__ == '__main__':
+    main()
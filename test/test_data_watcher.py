@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+测试数据目录监视 - 验证目录索引的全量扫描和增量更新都在后台线程中进行、完成后在界面线程通知视图，且扫描可以中断
+"""
+
+import os
+import sys
+import time
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.storage.session_catalog import SessionCatalog
+from gui.services.storage.data_watcher import DataDirectoryWatcher
+from test_session_catalog import _write_record
+
+
+def _process_until(app, condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_scan_runs_in_background():
+    """scan立即返回，扫描在后台线程中进行，完成后在界面线程发出scan_finished"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(3):
+            _write_record(tmp, i, f'题目{i}', f'answer {i}')
+        catalog = SessionCatalog(tmp)
+        scan_threads = []
+        original_scan = catalog.scan
+
+        def scan(**kwargs):
+            scan_threads.append(threading.get_ident())
+            return original_scan(**kwargs)
+        catalog.scan = scan
+
+        watcher = DataDirectoryWatcher(catalog)
+        finished = []
+        watcher.scan_finished.connect(
+            lambda updated, removed: finished.append((sorted(updated), removed, threading.get_ident())))
+        watcher.scan()
+        assert _process_until(app, lambda: finished)
+        assert scan_threads and scan_threads[0] != threading.get_ident()
+        updated, removed, thread = finished[0]
+        assert updated == [os.path.join(tmp, f'sample_{i}.json') for i in range(3)] and removed == []
+        assert thread == threading.get_ident()
+        assert catalog.count() == 3
+
+        # 没有变化时再次扫描不更新任何记录
+        watcher.scan()
+        assert _process_until(app, lambda: len(finished) == 2)
+        assert finished[1][:2] == ([], [])
+        watcher.stop()
+        catalog.close()
+
+
+def test_changes_indexed_in_background():
+    """文件变化后的增量更新不在界面线程执行，sessions_changed在界面线程发出"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = SessionCatalog(tmp)
+        update_threads = []
+        original_update = catalog.update_files
+
+        def update_files(names, dir_stats):
+            update_threads.append(threading.get_ident())
+            return original_update(names, dir_stats)
+        catalog.update_files = update_files
+
+        watcher = DataDirectoryWatcher(catalog)
+        changes = []
+        watcher.sessions_changed.connect(
+            lambda updated, removed: changes.append((updated, removed, threading.get_ident())))
+        path = _write_record(tmp, 1, '题目', 'answer')
+        watcher._apply_changes()
+        assert _process_until(app, lambda: changes)
+        assert update_threads and update_threads[0] != threading.get_ident()
+        assert changes[0] == ([path], [], threading.get_ident())
+
+        os.remove(path)
+        watcher._apply_changes()
+        assert _process_until(app, lambda: len(changes) == 2)
+        assert changes[1][:2] == ([], [path])
+        watcher.stop()
+        catalog.close()
+
+
+def test_scan_can_be_cancelled():
+    """中断的扫描保留已索引的记录，不把未扫描到的记录当作删除"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(5):
+            _write_record(tmp, i, f'题目{i}', f'answer {i}')
+        catalog = SessionCatalog(tmp)
+        catalog.scan()
+        for i in range(5, 10):
+            _write_record(tmp, i, f'题目{i}', f'answer {i}')
+        # 索引到第一条新记录后中断
+        updated, removed = catalog.scan(cancelled=lambda: catalog.count() > 5)
+        assert len(updated) == 1 and removed == []
+        assert catalog.count() == 6
+        updated, _ = catalog.scan()
+        assert len(updated) == 4 and catalog.count() == 10
+        catalog.close()
+
+
+if __name__ == '__main__':
+    test_scan_runs_in_background()
+    test_changes_indexed_in_background()
+    test_scan_can_be_cancelled()
+    print("所有测试通过")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+测试输入框内容跟踪 - 验证各版本内容的重放（顺序、乱序、跨检查点、重置后）以及保存时把内容版本解析为文本
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtWidgets import QApplication, QTextEdit
+
+from gui.services.input.document_tracker import DocumentChangeTracker
+from gui.models.data_collection_model import DataCollectionModel
+
+
+def _track(edit, tracker):
+    """记录每个版本对应的toPlainText()"""
+    snapshots = {tracker.version: edit.toPlainText()}
+    tracker.version_changed.connect(lambda version: snapshots.__setitem__(version, edit.toPlainText()))
+    return snapshots
+
+
+def _random_edits(edit, rng, count):
+    """在随机位置插入、删除、换行，夹杂整体替换和清空"""
+    alphabet = ['a', 'b', ' ', '\n', '你', '好', '世界', 'xyz']
+    for i in range(count):
+        cursor = QTextCursor(edit.document())
+        length = len(edit.toPlainText())
+        action = rng.random()
+        if i % 97 == 50:
+            edit.setPlainText('重新开始\n第二行')
+        elif i % 151 == 100:
+            edit.clear()
+        elif action < 0.6 or length == 0:
+            cursor.setPosition(rng.randint(0, length))
+            cursor.insertText(rng.choice(alphabet))
+        elif action < 0.8:
+            position = rng.randint(0, length - 1)
+            cursor.setPosition(position)
+            cursor.setPosition(min(position + rng.randint(1, 3), length), QTextCursor.KeepAnchor)
+            cursor.removeSelectedText()
+        else:
+            position = rng.randint(0, length - 1)
+            cursor.setPosition(position)
+            cursor.setPosition(min(position + 2, length), QTextCursor.KeepAnchor)
+            cursor.insertText('替换')
+
+
+def test_content_at_every_version():
+    """每个版本的内容都与当时的toPlainText()一致，顺序和乱序查询都跨越检查点"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    edit = QTextEdit()
+    edit.setPlainText('初始内容')
+    tracker = DocumentChangeTracker(edit.document(), checkpoint_interval=8)
+    snapshots = _track(edit, tracker)
+    _random_edits(edit, random.Random(3), 400)
+    assert tracker.version == max(snapshots) and tracker.version > 300
+
+    for version in sorted(snapshots):
+        assert tracker.content_at(version) == snapshots[version]
+    versions = list(snapshots)
+    random.Random(4).shuffle(versions)
+    for version in versions:
+        assert tracker.content_at(version) == snapshots[version]
+    assert tracker.current_content() == edit.toPlainText()
+
+
+def test_reset_starts_from_current_content():
+    """reset后以当前内容为起点，早于起点的版本返回None"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    edit = QTextEdit()
+    tracker = DocumentChangeTracker(edit.document(), checkpoint_interval=4)
+    edit.insertPlainText('第一题的回答')
+    old_version = tracker.version
+    tracker.reset()
+    assert tracker.content_at(tracker.version) == '第一题的回答'
+
+    snapshots = _track(edit, tracker)
+    _random_edits(edit, random.Random(8), 60)
+    assert tracker.content_at(old_version - 1) is None
+    versions = list(snapshots)
+    random.Random(9).shuffle(versions)
+    for version in versions:
+        assert tracker.content_at(version) == snapshots[version]
+
+
+def test_model_resolves_content_version():
+    """按键记录只保存content_version，写日志前解析为当时的input_content"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        bank_path = os.path.join(tmp, 'questions.json')
+        with open(bank_path, 'w', encoding='utf-8') as f:
+            json.dump([{'id': 1, 'content': '题目'}], f, ensure_ascii=False)
+        model = DataCollectionModel(bank_path)
+        model.textlib.stop_watching()
+        edit = QTextEdit()
+        tracker = DocumentChangeTracker(edit.document())
+        model.set_content_tracker(tracker)
+        model.collecting = True
+
+        edit.insertPlainText('你')
+        model.add_keystroke('COMMIT_你', '你')
+        edit.insertPlainText('好\nab')
+        model.add_keystroke(66, 'b')
+        edit.clear()
+        model.add_keystroke(16777219, '')
+
+        records = list(model.keystroke_records)
+        assert all('content_version' in r and 'input_content' not in r for r in records)
+        resolved = [model._prepare_log_record(r) for r in records]
+        assert [r['input_content'] for r in resolved] == ['你', '你好\nab', '']
+        assert all('content_version' not in r for r in resolved)
+        # 调用方已给出内容时保持不变
+        assert model._prepare_log_record({'key': 65, 'input_content': 'x'})['input_content'] == 'x'
+
+
+if __name__ == '__main__':
+    test_content_at_every_version()
+    test_reset_starts_from_current_content()
+    test_model_resolves_content_version()
+    print("所有测试通过")
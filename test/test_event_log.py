@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+测试多来源按键事件日志 - 验证k路归并顺序、来源标签和全局序号
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.models.event_log import EventLog, iter_record_events, SOURCE_INPUT, SOURCE_RAW
+
+
+def test_merge_order_and_seq():
+    """两个来源交错到达，遍历结果按时间排序且序号连续"""
+    log = EventLog()
+    log.append(SOURCE_RAW, {'type': 'PRESS', 'absolute_timestamp': 1.0})
+    log.append(SOURCE_INPUT, {'key': 65, 'absolute_timestamp': 1.1})
+    log.append(SOURCE_RAW, {'type': 'RELEASE', 'absolute_timestamp': 1.3})
+    log.append(SOURCE_INPUT, {'key': 'COMMIT_你', 'absolute_timestamp': 1.2})
+
+    events = list(log.iter_events())
+    assert [e['absolute_timestamp'] for e in events] == [1.0, 1.1, 1.2, 1.3]
+    assert [e['seq'] for e in events] == [0, 1, 2, 3]
+    assert [e['source'] for e in events] == [SOURCE_RAW, SOURCE_INPUT, SOURCE_INPUT, SOURCE_RAW]
+
+
+def test_late_event_inserted_in_order():
+    """跨线程晚到的事件插入到正确位置"""
+    log = EventLog()
+    for ts in (1.0, 2.0, 3.0):
+        log.append(SOURCE_RAW, {'absolute_timestamp': ts})
+    log.append(SOURCE_RAW, {'absolute_timestamp': 1.5})
+    assert [e['absolute_timestamp'] for e in log.buffer(SOURCE_RAW)] == [1.0, 1.5, 2.0, 3.0]
+
+
+def test_clear_keeps_buffer_reference():
+    """清空后原有缓冲区引用仍然有效"""
+    log = EventLog()
+    buffer = log.buffer(SOURCE_INPUT)
+    log.append(SOURCE_INPUT, {'absolute_timestamp': 1.0})
+    log.clear()
+    log.append(SOURCE_INPUT, {'absolute_timestamp': 2.0})
+    assert len(buffer) == 1 and len(log) == 1
+
+
+def test_iter_record_events_legacy_unsorted():
+    """旧记录按到达顺序保存，也能得到有序事件流"""
+    record = {
+        'keystrokes': [{'absolute_timestamp': 2.0}, {'absolute_timestamp': 1.0}],
+        'raw_keystrokes': [{'absolute_timestamp': 1.5}],
+    }
+    events = list(iter_record_events(record))
+    assert [e['absolute_timestamp'] for e in events] == [1.0, 1.5, 2.0]
+    # 原记录不被修改
+    assert 'seq' not in record['keystrokes'][0]
+
+
+if __name__ == '__main__':
+    test_merge_order_and_seq()
+    test_late_event_inserted_in_order()
+    test_clear_keeps_buffer_reference()
+    test_iter_record_events_legacy_unsorted()
+    print("所有测试通过")
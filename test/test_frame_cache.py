@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+测试解码帧缓存 - 验证按字节数的LRU淘汰、沿方向预取、缓存命中时不经过解码器、拖动请求的合并以及打不开视频后重新启动拖动线程
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.playback.frame_cache import FrameCache, FramePrefetcher
+from gui.services.playback.frame_index import FrameIndex
+from gui.services.playback.scrub_worker import ScrubWorker
+from gui.services.playback.video_player_service import VideoPlayerService
+from test_frame_index import _write_numbered_video
+
+SIZE = (64, 16)
+
+
+def _image():
+    return QImage(SIZE[0], SIZE[1], QImage.Format_RGB32)
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_lru_eviction_by_bytes():
+    """超过字节上限时淘汰最久未用的帧，尺寸变化后清空"""
+    frame_bytes = _image().sizeInBytes()
+    cache = FrameCache(max_bytes=frame_bytes * 3)
+    cache.set_size(SIZE)
+    for frame in range(3):
+        cache.put(frame, _image(), SIZE)
+    assert cache.get(0) is not None  # 0变为最近使用
+    cache.put(3, _image(), SIZE)
+    assert 1 not in cache and 0 in cache and len(cache) == 3
+    assert cache.bytes_used == frame_bytes * 3
+
+    cache.put(4, _image(), (10, 10))  # 旧尺寸的帧被丢弃
+    assert 4 not in cache
+    cache.set_size((10, 10))
+    assert len(cache) == 0 and cache.bytes_used == 0
+
+
+def test_prefetch_directions():
+    """正向预取播放头之后的帧，反向逐个GOP预取之前的帧"""
+    QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        index = FrameIndex.for_video(path)
+        cache = FrameCache()
+        cache.set_size(SIZE)
+        prefetcher = FramePrefetcher(path, index, cache)
+        prefetcher.WINDOW = 20
+        prefetcher.request(30, 1)
+        assert _wait_for(lambda: all(frame in cache for frame in range(30, 50)))
+        assert 29 not in cache
+        prefetcher.request(100, -1)
+        assert _wait_for(lambda: all(frame in cache for frame in range(80, 100)))
+        prefetcher.stop()
+        assert 100 not in cache
+
+
+def test_player_serves_cached_frames():
+    """已缓存的帧直接返回，不再解码"""
+    QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        player = VideoPlayerService(path)
+        assert player.open_video()
+        player.set_display_size(*SIZE)
+        first = player.read_frame(40)
+        # 正向拖动后等待预取填充
+        player.read_frame(41)
+        assert _wait_for(lambda: 60 in player.frame_cache)
+        position = player.seeker.position
+        assert player.read_frame(40) is first
+        assert player.read_frame(55) is not None
+        assert player.seeker.position == position  # 没有动用播放器的解码器
+        player.close()
+
+
+def test_scrub_requests_are_coalesced():
+    """拖动中只处理最新的位置并输出低分辨率预览，停下后的目标帧为完整画质并进入缓存"""
+    QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        cache = FrameCache()
+        cache.set_size((256, 64))
+        worker = ScrubWorker(path, FrameIndex.for_video(path), cache)
+        results = []
+        worker.frame_ready.connect(lambda image, frame, full: results.append((image.width(), frame, full)),
+                                   Qt.DirectConnection)
+        for frame in range(100):
+            worker.request(frame)
+        assert _wait_for(lambda: results and results[-1][1] == 99)
+        assert worker.processed < worker.requested
+        assert all(width == 256 // ScrubWorker.PREVIEW_SCALE and not full for width, _, full in results)
+
+        worker.request(77, final=True)
+        assert _wait_for(lambda: results[-1][1] == 77)
+        assert results[-1] == (256, 77, True)
+        assert 77 in cache
+        worker.stop()
+
+
+def test_scrub_worker_restarts_after_open_failure():
+    """打不开视频时线程退出并复位，之后的请求会重新启动线程而不是被丢弃"""
+    QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        cache = FrameCache()
+        cache.set_size((256, 64))
+        worker = ScrubWorker(os.path.join(tmp, 'missing.mp4'), FrameIndex.for_video(path), cache)
+        results = []
+        worker.frame_ready.connect(lambda image, frame, full: results.append(frame), Qt.DirectConnection)
+        worker.request(10)
+        assert _wait_for(lambda: not worker._running and worker.isFinished())
+        assert results == []
+
+        worker.video_path = path
+        worker.request(20, final=True)
+        assert _wait_for(lambda: results == [20])
+        worker.stop()
+
+
+if __name__ == '__main__':
+    test_lru_eviction_by_bytes()
+    test_prefetch_directions()
+    test_player_serves_cached_frames()
+    test_scrub_requests_are_coalesced()
+    test_scrub_worker_restarts_after_open_failure()
+    print("所有测试通过")
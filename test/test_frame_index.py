@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+测试帧索引 - 验证MP4关键帧和帧时间的解析、磁盘缓存以及按索引精确定位
+"""
+
+import os
+import sys
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+
+from gui.services.playback.frame_index import (
+    FrameIndex, FrameSeeker, FRAME_INDEX_SUFFIX, cache_path, parse_mp4_frames, scan_frames
+)
+
+BITS = 8
+
+
+def _write_numbered_video(path, frames=120):
+    """每帧用黑白条纹编码帧号（条纹宽32像素，压缩后仍可区分）"""
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 30, (256, 64))
+    for i in range(frames):
+        frame = np.zeros((64, 256, 3), dtype=np.uint8)
+        for bit in range(BITS):
+            if i >> bit & 1:
+                frame[:, bit * 32:(bit + 1) * 32] = 255
+        writer.write(frame)
+    writer.release()
+
+
+def _frame_number(frame):
+    return sum(1 << bit for bit in range(BITS) if frame[32, bit * 32 + 16].mean() > 128)
+
+
+def test_parse_and_cache():
+    """解析结果与逐帧扫描一致，缓存按文件大小和修改时间失效"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        timestamps, keyframes = parse_mp4_frames(path)
+        scanned, _ = scan_frames(path)
+        assert len(timestamps) == 120
+        assert np.allclose(timestamps, scanned)
+        assert keyframes[0] == 0 and len(keyframes) > 1
+
+        index = FrameIndex.for_video(path)
+        assert os.path.exists(cache_path(path, FRAME_INDEX_SUFFIX))
+        assert index.keyframe_before(int(keyframes[1]) + 3) == keyframes[1]
+        assert index.frame_at(1000.0) == 30
+
+        # 视频被重写后缓存失效
+        _write_numbered_video(path, frames=60)
+        os.utime(path, ns=(1, 1))
+        assert FrameIndex.for_video(path).frame_count == 60
+
+
+def test_seeker_is_frame_accurate():
+    """随机跳转和顺序读取都得到目标帧，并通过索引校验"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        cap = cv2.VideoCapture(path)
+        seeker = FrameSeeker(cap, FrameIndex.for_video(path))
+        targets = random.Random(3).sample(range(120), 40) + list(range(60, 75))
+        for target in targets:
+            seeker.seek(target)
+            ret, frame = seeker.read()
+            assert ret and _frame_number(frame) == target
+        assert seeker.mismatches == 0
+        cap.release()
+
+
+if __name__ == '__main__':
+    test_parse_and_cache()
+    test_seeker_is_frame_accurate()
+    print("所有测试通过")
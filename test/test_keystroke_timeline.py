@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+测试按键时间线 - 验证PRESS/RELEASE配对、组合键、自动重复以及按时间查询按住的按键
+"""
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt
+
+from gui.services.playback.keystroke_timeline import KeystrokeTimeline, key_name, TAP_DURATION
+
+
+def _event(t, event_type, code, text='', modifiers=''):
+    return {'type': event_type, 'key_code': code, 'key_text': text, 'modifiers': modifiers, 'timestamp': t}
+
+
+def test_pairs_and_chords():
+    """按住区间由PRESS到对应的RELEASE；组合键同时高亮，自动重复不打断区间"""
+    events = [
+        _event(1.0, 'PRESS', Qt.Key_Shift, '', 'SHIFT'),
+        _event(1.1, 'PRESS', Qt.Key_A, 'A', 'SHIFT'),
+        _event(1.3, 'RELEASE', Qt.Key_A, 'A', 'SHIFT'),
+        _event(1.4, 'RELEASE', Qt.Key_Shift, ''),
+        # 按住B不放，自动重复
+        _event(2.0, 'PRESS', Qt.Key_B, 'b'),
+        _event(2.5, 'PRESS', Qt.Key_B, 'b'),
+        _event(2.55, 'PRESS', Qt.Key_B, 'b'),
+        _event(3.0, 'RELEASE', Qt.Key_B, 'b'),
+        # 没有RELEASE记录（Ctrl+C只记录了C）
+        _event(4.0, 'PRESS', Qt.Key_C, '\x03', 'CTRL'),
+        _event(5.0, 'PRESS', Qt.Key_Space, ' '),
+        _event(5.1, 'RELEASE', Qt.Key_Space, ' '),
+    ]
+    random.Random(1).shuffle(events)  # 记录顺序不影响结果
+    timeline = KeystrokeTimeline.from_keystrokes(events)
+    assert timeline.held_keys(0.5) == set()
+    assert timeline.held_keys(1.05) == {'SHIFT'}
+    assert timeline.held_keys(1.2) == {'SHIFT', 'A'}
+    assert timeline.held_keys(1.35) == {'SHIFT'}
+    assert timeline.held_keys(1.4) == set()
+    assert timeline.held_keys(2.7) == {'B'}
+    assert timeline.held_keys(3.0) == set()
+    assert timeline.held_keys(4.0 + TAP_DURATION / 2) == {'CTRL', 'C'}
+    assert timeline.held_keys(4.0 + TAP_DURATION * 2) == set()
+    assert timeline.held_keys(5.05) == {'SPACE'}
+    # 自动重复和组合键附带的修饰键不计入按下次数
+    assert timeline.press_counts['B'] == 1 and timeline.press_counts['SHIFT'] == 1
+    assert 'CTRL' not in timeline.press_counts
+
+
+def test_key_names_and_legacy_records():
+    """兼容pynput和旧字段名；没有原始按键时使用输入框按键记录"""
+    assert key_name({'key_code': None, 'key_text': 'Key.shift_r'}) == 'SHIFT'
+    assert key_name({'key_code': 65, 'key_text': 'a'}) == 'A'
+    assert key_name({'key_code': Qt.Key_Semicolon, 'key_text': ';'}) == ';'
+    assert key_name({'key': Qt.Key_Return, 'text': '\r'}) == 'ENTER'
+
+    record = {'raw_keystrokes': [], 'keystrokes': [{'timestamp': 2.0, 'text': 'x'}]}
+    timeline = KeystrokeTimeline.from_record(record)
+    assert timeline.held_keys(2.05) == {'X'}
+    assert KeystrokeTimeline.from_record({}).held_keys(1.0) == set()
+
+
+def test_lookup_cost_independent_of_length():
+    """5万个事件时按帧查询返回预先计算的分段，与线性扫描结果一致"""
+    rng = random.Random(7)
+    events = []
+    t = 0.0
+    codes = [Qt.Key_A + i for i in range(26)]
+    for _ in range(25_000):
+        t += rng.uniform(0.02, 0.2)
+        code = rng.choice(codes)
+        events.append(_event(t, 'PRESS', code, chr(code).lower()))
+        events.append(_event(t + rng.uniform(0.03, 0.3), 'RELEASE', code, chr(code).lower()))
+    timeline = KeystrokeTimeline.from_keystrokes(events)
+
+    queries = [i / 30 for i in range(int(t * 30))]
+    results = [timeline.held_keys(q) for q in queries]
+    # 查询只是二分查找，直接返回预先计算好的分段，不在查询时构造集合
+    segments = {id(segment) for segment in timeline.segments}
+    assert all(id(held) in segments or held == frozenset() for held in results)
+    assert len(timeline.boundaries) == len(timeline.segments)
+
+    for q, held in rng.sample(list(zip(queries, results)), 200):
+        expected = {name for start, end, name in timeline.intervals if start <= q < end}
+        assert held == expected
+
+
+if __name__ == '__main__':
+    test_pairs_and_chords()
+    test_key_names_and_legacy_records()
+    test_lookup_cost_independent_of_length()
+    print("所有测试通过")
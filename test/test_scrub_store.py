@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试低分辨率帧 - 验证按帧率取帧、内存映射读取、视频改写后失效、按大小淘汰以及拖动预览不经过解码
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.playback.frame_index import FrameIndex
+from gui.services.playback.scrub_store import (
+    ScrubStore, build_scrub_store, select_frames, scrub_store_paths, evict_scrub_stores
+)
+from gui.services.playback.video_player_service import VideoPlayerService
+from test_frame_index import _write_numbered_video, _frame_number
+
+
+def test_select_frames():
+    """每1/max_fps秒保留第一帧"""
+    timestamps = np.arange(30) * 1000 / 30
+    assert list(select_frames(timestamps, 10)) == list(range(0, 30, 3))
+    assert list(select_frames(timestamps, 60)) == list(range(30))
+    assert len(select_frames(np.zeros(0))) == 0
+
+
+def test_build_open_and_invalidate():
+    """生成后映射读取的帧与原视频一致，进度回调到达总帧数；视频被改写后失效"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        index = FrameIndex.for_video(path)
+        assert ScrubStore.open(path, width=256) is None
+
+        progress = []
+        store = build_scrub_store(path, index, width=256, max_fps=10,
+                                  progress=lambda done, total: progress.append((done, total)))
+        assert progress[-1] == (120, 120)
+        assert len(store) == 40 and store.frame_size == (256, 64)
+        assert isinstance(store.frames, np.memmap)
+        assert _frame_number(store.frame(0)) == 0
+        assert _frame_number(store.frame(7)) == 6
+        assert _frame_number(store.frame(119)) == 117
+        assert np.allclose(store.timestamps_ms, index.timestamps_ms[store.source_frames])
+
+        reopened = ScrubStore.open(path, width=256)
+        assert reopened is not None and len(reopened) == 40
+        image, _ = reopened.image(50, (512, 128))
+        assert (image.width(), image.height()) == (512, 128)
+
+        # 取消时不留下缓存
+        other = os.path.join(tmp, 'other.mp4')
+        _write_numbered_video(other, frames=30)
+        assert build_scrub_store(other, FrameIndex.for_video(other), width=256, cancelled=lambda: True) is None
+        assert not any(os.path.exists(p) for p in scrub_store_paths(other, 256))
+
+        _write_numbered_video(path, frames=60)
+        os.utime(path, ns=(1, 1))
+        assert ScrubStore.open(path, width=256) is None
+
+
+def test_evict_least_recently_used():
+    """目录中的低分辨率帧超过上限时淘汰最久未使用的，刚生成的不淘汰"""
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, name in enumerate(('a.mp4', 'b.mp4')):
+            path = os.path.join(tmp, name)
+            _write_numbered_video(path, frames=30)
+            build_scrub_store(path, FrameIndex.for_video(path), width=256)
+            meta_path = scrub_store_paths(path, 256)[2]
+            os.utime(meta_path, (1000 + i, 1000 + i))
+            paths.append(path)
+        cache_dir = os.path.dirname(scrub_store_paths(paths[0], 256)[2])
+        evict_scrub_stores(cache_dir, max_bytes=1, keep=scrub_store_paths(paths[0], 256)[2])
+        assert ScrubStore.open(paths[0], width=256) is not None
+        assert ScrubStore.open(paths[1], width=256) is None
+
+
+def test_player_scrub_preview_from_store():
+    """有低分辨率帧时拖动预览同步取自映射内存，不经过拖动线程；停下后仍解码完整画质"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        player = VideoPlayerService(path)
+        assert player.open_video()
+        player.set_display_size(256, 64)
+        assert player.preview_frame(10) is None
+        player.set_scrub_store(build_scrub_store(path, player.frame_index, width=128))
+
+        results = []
+        player.scrub_frame_ready.connect(lambda image, frame, full: results.append((image, frame, full)),
+                                         Qt.DirectConnection)
+        for frame in (10, 50, 90):
+            player.scrub(frame)
+        assert [(frame, full) for _, frame, full in results] == [(10, False), (50, False), (90, False)]
+        assert player.scrubber.requested == 0
+        image = results[-1][0]
+        assert (image.width(), image.height()) == (256, 64)
+        bgr = np.frombuffer(image.bits().asstring(image.sizeInBytes()), np.uint8).reshape(64, 256, 4)[:, :, :3]
+        assert _frame_number(bgr) == 90
+
+        player.scrub(90, final=True)
+        assert player.scrubber.requested == 1
+        player.close()
+
+
+if __name__ == '__main__':
+    test_select_frames()
+    test_build_open_and_invalidate()
+    test_evict_least_recently_used()
+    test_player_scrub_preview_from_store()
+    print("所有测试通过")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+测试会话目录索引 - 验证增量扫描、分页排序查询和视频状态更新
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.services.storage.session_catalog import SessionCatalog
+
+
+def _write_record(data_dir, index, content, user_input):
+    path = os.path.join(data_dir, f'sample_{index}.json')
+    record = {
+        'question': {'id': index, 'content': content, 'answer': None},
+        'user_input': user_input,
+        'timestamp': 1000.0 + index,
+        'recording_start_time': 999.0 + index,
+        'screen_video_path': os.path.join(data_dir, f'sample_{index}.mp4'),
+        'webcam_video_path': None,
+        'keystrokes': [],
+        'raw_keystrokes': [],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(record, f, ensure_ascii=False)
+    return path
+
+
+def test_incremental_scan():
+    """只有新增、修改和删除的记录会被处理"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(5):
+            _write_record(tmp, i, f'题目{i}', f'answer {i}')
+        catalog = SessionCatalog(tmp)
+        updated, removed = catalog.scan()
+        assert len(updated) == 5 and removed == []
+        assert catalog.scan() == ([], [])
+
+        time.sleep(0.01)
+        changed = _write_record(tmp, 2, '修改后的题目', 'new')
+        os.remove(os.path.join(tmp, 'sample_4.json'))
+        updated, removed = catalog.scan()
+        assert updated == [changed]
+        assert removed == [os.path.join(tmp, 'sample_4.json')]
+        assert catalog.get(changed)['question_content'] == '修改后的题目'
+        catalog.close()
+
+
+def test_query_paging_and_video_state():
+    """分页、排序、筛选和视频存在状态"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(10):
+            _write_record(tmp, i, f'题目{i}', 'hello world' if i % 2 else '你好')
+        catalog = SessionCatalog(tmp)
+        catalog.scan()
+
+        assert catalog.count() == 10
+        first = catalog.query(offset=0, limit=4)
+        second = catalog.query(offset=4, limit=4)
+        assert [r['question_id'] for r in first + second] == [9, 8, 7, 6, 5, 4, 3, 2]
+        assert [r['question_id'] for r in catalog.query(limit=3, descending=False)] == [0, 1, 2]
+        assert catalog.question_exposure_counts() == {i: 1 for i in range(10)}
+        assert catalog.count(keyword='HELLO') == 5
+        assert catalog.count(start_time=1003, end_time=1005) == 3
+        assert not any(r['screen_exists'] for r in first)
+
+        # 视频出现后，重新扫描会更新对应记录的视频状态
+        open(os.path.join(tmp, 'sample_3.mp4'), 'wb').close()
+        updated, _ = catalog.scan()
+        assert updated == [os.path.join(tmp, 'sample_3.json')]
+        assert catalog.count(has_video=True) == 1
+        catalog.close()
+
+
+if __name__ == '__main__':
+    test_incremental_scan()
+    test_query_paging_and_video_state()
+    print("所有测试通过")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+测试二进制会话容器 - 验证JSON转换后的还原结果和按段读取
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from gui.services.storage.session_container import (
+    SessionContainer, convert_json_to_container, SECTION_KEYSTROKES, SECTION_IME_EVENTS
+)
+from gui.services.storage.session_store import load_session_record, load_session_summary
+
+RECORD = {
+    'question': {'id': 3, 'content': '请输入你好', 'answer': '你好'},
+    'user_input': '你好',
+    'recording_start_time': 100.0,
+    'timestamp': 110.0,
+    'screen_video_path': 'data/sample_100.mp4',
+    'webcam_video_path': None,
+    'keystrokes': [
+        {'key': 78, 'text': 'n', 'timestamp': 0.5, 'absolute_timestamp': 100.5, 'input_content': ''},
+        {'key': 'COMPOSITION_n', 'text': 'n', 'timestamp': 0.6, 'absolute_timestamp': 100.6, 'input_content': ''},
+        {'key': 'COMMIT_你好', 'text': '你好', 'timestamp': 1.2, 'absolute_timestamp': 101.2, 'input_content': '你好'},
+        {'key': 'RELEASE_78', 'text': '', 'timestamp': 1.3, 'absolute_timestamp': 101.3, 'input_content': '你好'},
+    ],
+    'raw_keystrokes': [
+        {'type': 'PRESS', 'key_code': 78, 'key_text': 'n', 'modifiers': '',
+         'timestamp': 0.5, 'absolute_timestamp': 100.5, 'input_content': ''},
+        {'type': 'RELEASE', 'key_code': None, 'key_text': '', 'modifiers': 'SHIFT',
+         'timestamp': 0.7, 'absolute_timestamp': 100.7, 'input_content': None},
+    ],
+}
+
+
+def _convert(tmp):
+    json_path = os.path.join(tmp, 'sample_100.json')
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(RECORD, f, ensure_ascii=False)
+    return convert_json_to_container(json_path)
+
+
+def test_roundtrip():
+    """转换后的容器可以完整还原为原记录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _convert(tmp)
+        record = load_session_record(path)
+        for field in ('question', 'user_input', 'recording_start_time', 'timestamp',
+                      'screen_video_path', 'webcam_video_path', 'keystrokes', 'raw_keystrokes'):
+            assert record[field] == RECORD[field], field
+
+
+def test_lazy_sections():
+    """摘要不读取按键段，数值段为内存映射数组"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = _convert(tmp)
+        with SessionContainer(path) as container:
+            assert container.header['keystroke_count'] == 2
+            assert container.header['ime_event_count'] == 2
+            summary = container.summary()
+            assert summary['user_input'] == '你好'
+            assert summary['keystroke_count'] == 4
+            assert SECTION_KEYSTROKES not in container._cache
+
+            keys = container.array(SECTION_KEYSTROKES)
+            assert isinstance(keys, np.memmap)
+            assert list(keys['key_code']) == [78, -1]
+            assert len(container.array(SECTION_IME_EVENTS)) == 2
+
+        assert load_session_summary(path)['question']['answer'] == '你好'
+
+
+if __name__ == '__main__':
+    test_roundtrip()
+    test_lazy_sections()
+    print("所有测试通过")
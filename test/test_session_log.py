@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+测试会话预写日志 - 验证成组写入、提交footer、崩溃后的恢复以及放弃的会话不被恢复
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.services.storage.session_log import (
+    SessionLogWriter, recover_session, recover_incomplete_sessions,
+    ENTRY_META, ENTRY_KEYSTROKE, ENTRY_RAW_KEYSTROKE
+)
+from gui.services.storage.session_store import load_session_record
+
+
+def _write_session(path, footer=None, abort=False):
+    writer = SessionLogWriter(path, flush_interval=0.05, sync=False)
+    writer.open({'question': {'id': 1, 'content': '测试题目'}, 'screen_video_path': 'data/sample_1.mp4'})
+    writer.append(ENTRY_META, {'recording_start_time': 100.0})
+    writer.append(ENTRY_RAW_KEYSTROKE, {'type': 'PRESS', 'absolute_timestamp': 100.2, 'input_content': ''})
+    writer.append(ENTRY_KEYSTROKE, {'key': 65, 'absolute_timestamp': 100.1, 'input_content': ''})
+    writer.append(ENTRY_KEYSTROKE, {'key': 66, 'absolute_timestamp': 100.3, 'input_content': 'a'})
+    if abort:
+        writer.abort('reset')
+    else:
+        writer.close(footer)
+
+
+def test_committed_session():
+    """提交后的日志可以还原为完整记录"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sample_1.session.jsonl')
+        _write_session(path, footer={'user_input': 'ab', 'timestamp': 101.0})
+        record = recover_session(path)
+        assert record['recovered'] is False
+        assert record['user_input'] == 'ab'
+        assert record['recording_start_time'] == 100.0
+        assert [k['key'] for k in record['keystrokes']] == [65, 66]
+        assert len(record['raw_keystrokes']) == 1
+
+
+def test_recover_partial_log():
+    """未提交且末行损坏的日志仍能恢复，并补写可回放的清单"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'sample_2.session.jsonl')
+        _write_session(path)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"entry": "keystroke", "data": {"key"')  # 崩溃时写了一半
+
+        manifests = recover_incomplete_sessions(tmp)
+        assert manifests == [os.path.join(tmp, 'sample_2.json')]
+        record = load_session_record(manifests[0])
+        assert record['recovered'] is True
+        assert record['user_input'] == 'a'
+        assert len(record['keystrokes']) == 2
+
+        # 已有清单的日志不会重复恢复
+        assert recover_incomplete_sessions(tmp) == []
+
+
+def test_aborted_session_not_recovered():
+    """换题放弃的会话带aborted条目，启动恢复时只补写真正崩溃的日志"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_session(os.path.join(tmp, 'sample_3.session.jsonl'), abort=True)
+        _write_session(os.path.join(tmp, 'sample_4.session.jsonl'))
+        assert recover_session(os.path.join(tmp, 'sample_3.session.jsonl'))['aborted'] is True
+        assert recover_incomplete_sessions(tmp) == [os.path.join(tmp, 'sample_4.json')]
+        assert not os.path.exists(os.path.join(tmp, 'sample_3.json'))
+
+
+if __name__ == '__main__':
+    test_committed_session()
+    test_recover_partial_log()
+    test_aborted_session_not_recovered()
+    print("所有测试通过")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+测试会话全文检索 - 验证中英文切词、按修改片段切词（切分量与按键数成正比）、中间输入检索和相关度排序
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.services.storage.session_search import tokenize, build_match_query, changed_fragments
+from gui.services.storage.session_catalog import SessionCatalog
+
+
+def test_tokenize():
+    """中文切为二元组（末字单独成词），英文按单词小写"""
+    assert tokenize('数据采集 Hello World2') == ['数据', '据采', '采集', '集', 'hello', 'world2']
+    assert tokenize('好') == ['好']
+    assert build_match_query('数据 Hel') == '"数据" "hel"*'
+    assert build_match_query('据') == '"据"*'
+    assert build_match_query('...') is None
+
+
+def test_changed_fragments_cover_all_tokens():
+    """只切分修改附近的片段，得到的词元与逐个切分完整快照相同；长答案也很快"""
+    rng = random.Random(7)
+    alphabet = 'ab 数据采集，.\n'
+    text = ''
+    snapshots = []
+    for _ in range(3000):
+        position = rng.randint(0, len(text))
+        if rng.random() < 0.7 or not text:
+            text = text[:position] + ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) + text[position:]
+        else:
+            text = text[:position] + text[position + rng.randint(1, 4):]
+        snapshots.append(text)
+    fragments = changed_fragments(snapshots)
+    expected = {token for snapshot in snapshots for token in tokenize(snapshot)}
+    actual = {token for fragment in fragments for token in tokenize(fragment)}
+    assert actual == expected
+    assert changed_fragments(['ab', 'ab cd', 'abcd', 'abcd']) == ['ab', ' cd', 'abcd']
+
+    # 逐字输入长答案：每次只切分所在的一小段，总字数与按键数成正比而不是与全文长度的平方成正比
+    long_answer = [('数据采集，' * 400)[:i] for i in range(1, 2001)]
+    fragments = changed_fragments(long_answer)
+    assert len(fragments) == len(long_answer)
+    assert sum(len(fragment) for fragment in fragments) <= 5 * len(long_answer)
+
+
+def _write_record(data_dir, index, content, user_input, typed=()):
+    path = os.path.join(data_dir, f'sample_{index}.json')
+    keystrokes = [{'key': 65, 'text': 'a', 'timestamp': i, 'absolute_timestamp': i, 'input_content': text}
+                  for i, text in enumerate(typed)]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'question': {'id': index, 'content': content}, 'user_input': user_input,
+                   'timestamp': 1000.0 + index, 'keystrokes': keystrokes, 'raw_keystrokes': []},
+                  f, ensure_ascii=False)
+    return path
+
+
+def test_search_ranking():
+    """检索覆盖题目、最终输入和被删除的中间输入，且按相关度排序"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _write_record(tmp, 0, '请抄写：数据采集非常重要', '数据采集非常重要')
+        _write_record(tmp, 1, '请翻译：我喜欢编程', 'I like programming', typed=['I like 数据', 'I like'])
+        _write_record(tmp, 2, '请写出快速排序', 'def quick_sort(arr): pass')
+        catalog = SessionCatalog(tmp)
+        catalog.scan()
+
+        results = catalog.search('数据')
+        assert [r['question_id'] for r in results] == [0, 1]
+        assert [r['question_id'] for r in catalog.search('采')] == [0]
+        assert [r['question_id'] for r in catalog.search('program')] == [1]
+        assert [r['question_id'] for r in catalog.search('QUICK_SORT')] == [2]
+        assert catalog.count(keyword='编程 like') == 1
+        assert catalog.count(keyword='不存在') == 0
+
+        os.remove(os.path.join(tmp, 'sample_0.json'))
+        catalog.scan()
+        assert [r['question_id'] for r in catalog.search('数据')] == [1]
+        catalog.close()
+
+
+if __name__ == '__main__':
+    test_tokenize()
+    test_changed_fragments_cover_all_tokens()
+    test_search_ranking()
+    print("所有测试通过")
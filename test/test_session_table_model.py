@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+测试会话记录表格模型 - 验证按需分页加载、查询排序和增量更新
+"""
+
+import os
+import sys
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtCore import Qt
+
+from gui.services.storage.session_catalog import SessionCatalog
+from gui.models.session_table_model import SessionTableModel
+
+
+def test_fetch_more_and_sort():
+    """重新查询时加载第一页，之后每次fetchMore加载一页；排序转为目录索引查询"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(25):
+            with open(os.path.join(tmp, f'sample_{i}.json'), 'w', encoding='utf-8') as f:
+                json.dump({'question': {'id': i, 'content': f'题目{i:02d}'}, 'user_input': '',
+                           'timestamp': 1000.0 + i, 'keystroke_count': 25 - i}, f, ensure_ascii=False)
+        catalog = SessionCatalog(tmp)
+        catalog.scan()
+
+        model = SessionTableModel(catalog, columns=['file', 'question', 'keystrokes', 'action'], page_size=10)
+        model.refresh()
+        assert model.total_count == 25 and model.rowCount() == 10
+        while model.canFetchMore():
+            model.fetchMore()
+        assert model.rowCount() == 25
+        assert model.data(model.index(0, 0)) == 'sample_24.json'
+        assert model.data(model.index(0, 3)) == ''  # 没有视频时不显示回放按钮
+
+        model.sort(2, Qt.DescendingOrder)
+        assert model.rowCount() == 10
+        assert model.data(model.index(0, 2)) == '25'
+
+        model.set_filters(keyword='题目0')
+        assert model.total_count == 10
+        catalog.close()
+
+
+def _write(data_dir, name, timestamp, video=None):
+    with open(os.path.join(data_dir, name), 'w', encoding='utf-8') as f:
+        json.dump({'question': {'id': 0, 'content': name}, 'user_input': '', 'timestamp': timestamp,
+                   'screen_video_path': video}, f)
+
+
+def test_incremental_changes():
+    """目录变化逐行应用到已加载的行"""
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(5):
+            _write(tmp, f'sample_{i}.json', 1000.0 + i)
+        catalog = SessionCatalog(tmp)
+        catalog.scan()
+        model = SessionTableModel(catalog, columns=['file', 'screen'])
+        model.refresh()
+
+        inserted, removed = [], []
+        model.rowsInserted.connect(lambda parent, first, last: inserted.append(first))
+        model.rowsRemoved.connect(lambda parent, first, last: removed.append(first))
+
+        video = os.path.join(tmp, 'sample_9.mp4')
+        _write(tmp, 'sample_9.json', 1002.5, video=video)
+        os.remove(os.path.join(tmp, 'sample_0.json'))
+        changes = catalog.update_files(['sample_9.json', 'sample_0.json'], catalog.list_directory())
+        model.apply_changes(*changes)
+        assert inserted == [2] and removed == [4]
+        assert [model.data(model.index(r, 0)) for r in range(model.rowCount())] == \
+            ['sample_4.json', 'sample_3.json', 'sample_9.json', 'sample_2.json', 'sample_1.json']
+        assert model.total_count == 5
+
+        # 视频文件出现后，引用它的记录被更新
+        open(video, 'wb').close()
+        model.apply_changes(*catalog.update_files(['sample_9.mp4'], catalog.list_directory()))
+        assert model.data(model.index(2, 1)) == '✓'
+        catalog.close()
+
+
+if __name__ == '__main__':
+    test_fetch_more_and_sort()
+    test_incremental_changes()
+    print("所有测试通过")
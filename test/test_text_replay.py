@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+测试答题回放 - 验证由内容快照得到的增量、按时间查询文本和光标、检查点重放以及回放控件的增量更新
+"""
+
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.playback import text_replay
+from gui.services.playback.text_replay import TextReplay
+from gui.services.text_diff import text_delta, apply_delta
+from gui.widgets.text_replay_view import TextReplayView
+
+
+def _random_snapshots(count, seed=5):
+    """模拟编辑：在随机位置插入、删除或替换，返回 [(时间, 文本)]"""
+    rng = random.Random(seed)
+    alphabet = 'abc 你好世界\n'
+    text = ''
+    snapshots = []
+    t = 0.0
+    for _ in range(count):
+        t += rng.uniform(0.05, 0.5)
+        position = rng.randint(0, len(text))
+        action = rng.random()
+        if action < 0.6 or not text:
+            text = text[:position] + ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) + text[position:]
+        elif action < 0.9:
+            text = text[:position] + text[position + rng.randint(1, 4):]
+        else:
+            text = text[:position] + 'XY' + text[position + 2:]
+        snapshots.append((t, text))
+    return snapshots
+
+
+def test_text_delta():
+    """增量把旧文本变为新文本，重复字符时位置取公共前缀之后"""
+    for old, new in [('', 'abc'), ('abc', ''), ('abc', 'abXc'), ('aaaa', 'aaa'), ('hello', 'help'),
+                     ('你好', '你们好'), ('same', 'same')]:
+        delta = text_delta(old, new)
+        assert apply_delta(old, delta) == new
+    assert text_delta('aaaa', 'aaa') == (3, 1, '')
+    assert text_delta('abc', 'abXc') == (2, 0, 'X')
+
+
+def test_text_and_caret_at_time():
+    """按时间查询：首个快照之前为空，之后为不晚于该时刻的最近快照；光标在插入末尾"""
+    record = {'keystrokes': [
+        {'key': 72, 'timestamp': 1.0, 'input_content': 'H'},
+        {'key': 73, 'timestamp': 1.5, 'input_content': 'Hi'},
+        {'key': 'COMMIT_你好', 'timestamp': 2.0, 'input_content': 'Hi你好'},
+        {'key': 16777219, 'timestamp': 3.0, 'input_content': 'Hi你'},
+        {'key': 16777234, 'timestamp': 3.5, 'input_content': 'Hi你'},  # 方向键不改变内容
+        {'key': 33, 'timestamp': 4.0, 'input_content': 'H!i你'},
+        {'key': 65, 'timestamp': None, 'input_content': 'ignored'},
+    ]}
+    replay = TextReplay.from_record(record)
+    assert len(replay) == 5 and replay.duration == 4.0
+    assert replay.text_at(0.5) == ('', 0)
+    assert replay.text_at(1.0) == ('H', 1)
+    assert replay.text_at(2.5) == ('Hi你好', 4)
+    assert replay.text_at(3.7) == ('Hi你', 3)
+    assert replay.text_at(10) == ('H!i你', 2)
+    assert replay.text_at(1.7) == ('Hi', 2)
+
+    # 没有输入框内容时使用原始按键中的快照
+    raw_only = TextReplay.from_record({'keystrokes': [{'key': 65, 'timestamp': 1.0}],
+                                       'raw_keystrokes': [{'type': 'PRESS', 'timestamp': 1.0, 'input_content': 'a'}]})
+    assert raw_only.text_at(2) == ('a', 1)
+    assert len(TextReplay.from_record({})) == 0
+
+
+def test_random_seeks_match_snapshots():
+    """任意顺序的跳转都与原始快照一致，每次跳转重放的增量不超过检查点间隔，与会话长度无关"""
+    snapshots = _random_snapshots(5000)
+    replay = TextReplay(snapshots, checkpoint_interval=64)
+    applied = []
+    original_apply = text_replay.apply_delta
+    text_replay.apply_delta = lambda text, delta: applied.append(1) or original_apply(text, delta)
+    try:
+        rng = random.Random(11)
+        for _ in range(500):
+            i = rng.randrange(len(snapshots))
+            t, expected = snapshots[i]
+            applied.clear()
+            text, caret = replay.text_at(t)
+            assert text == expected
+            assert 0 <= caret <= len(text)
+            assert len(applied) < replay.checkpoint_interval
+    finally:
+        text_replay.apply_delta = original_apply
+
+
+def test_view_incremental_matches_full():
+    """回放控件顺序播放时只应用增量，结果与整体替换的文本一致，光标位置与回放一致"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    snapshots = _random_snapshots(300, seed=9)
+    replay = TextReplay(snapshots)
+    view = TextReplayView()
+    view.resize(400, 300)
+    view.set_replay(replay)
+    for t, expected in snapshots[::3]:
+        view.seek(t)
+        assert view.toPlainText() == expected
+        assert view.caret == replay.carets[replay.version_at(t)]
+    # 向回跳转时整体替换
+    t, expected = snapshots[10]
+    view.seek(t)
+    assert view.toPlainText() == expected
+    view.grab()
+
+
+if __name__ == '__main__':
+    test_text_delta()
+    test_text_and_caret_at_time()
+    test_random_seeks_match_snapshots()
+    test_view_incremental_matches_full()
+    print("所有测试通过")
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+测试题库 - 验证多条件索引抽题、JSONL旁路索引、JSON题库缓存与热加载、加权分层调度和按参与者不重复抽题
+"""
+
+import os
+import sys
+import json
+import random
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import textlib
+from textlib import TextLib, convert_json_to_jsonl, JsonlQuestionBank, CachedJsonQuestionBank
+
+QUESTIONS = [
+    {'id': i, 'content': f'题目{i}', 'type': t, 'language': l, 'difficulty': d}
+    for i, (t, l, d) in enumerate([
+        ('code', 'zh', 'easy'), ('code', 'en', 'hard'), ('translation', 'en', 'easy'),
+        ('copy', 'zh', 'easy'), ('copy', 'zh', 'hard'), ('code', 'zh', 'hard'),
+    ])
+]
+
+
+def _make_lib(tmp, jsonl=False):
+    path = os.path.join(tmp, 'questions.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(QUESTIONS, f, ensure_ascii=False)
+    if jsonl:
+        path = convert_json_to_jsonl(path)
+    return TextLib(path)
+
+
+def _check_indexed_draws(lib):
+    assert len(lib.questions) == len(QUESTIONS)
+    for qtype in (None, 'code', 'copy', 'missing'):
+        for language in (None, 'zh', 'en'):
+            for difficulty in (None, 'easy', 'hard'):
+                expected = {q['id'] for q in QUESTIONS
+                            if (not qtype or q['type'] == qtype)
+                            and (not language or q['language'] == language)
+                            and (not difficulty or q['difficulty'] == difficulty)}
+                assert set(lib.get_question_ids(qtype, language, difficulty)) == expected
+                q = lib.get_random_question(qtype, language, difficulty)
+                assert (q['id'] in expected) if expected else q is None
+    assert lib.get_all_types() == ['code', 'copy', 'translation']
+    assert lib.get_all_languages() == ['en', 'zh']
+    assert lib.get_question(4) == QUESTIONS[4]
+    assert lib.get_question(99) is None
+
+
+def test_indexed_draws():
+    """索引抽题结果与逐条筛选一致（JSON和JSONL题库）"""
+    for jsonl in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            _check_indexed_draws(_make_lib(tmp, jsonl))
+
+
+def test_jsonl_index_rebuilt_when_stale():
+    """题库文件变化后旁路索引自动重建"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = _make_lib(tmp, jsonl=True)
+        assert isinstance(lib.bank, JsonlQuestionBank)
+        with open(lib.json_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'id': 100, 'content': '新题', 'type': 'essay'}, ensure_ascii=False) + '\n')
+        lib = TextLib(lib.json_path)
+        assert lib.count(qtype='essay') == 1
+        assert lib.get_random_question(qtype='essay')['content'] == '新题'
+        assert lib.get_question(100)['id'] == 100
+
+
+def test_jsonl_index_many_facet_values():
+    """某个字段的取值超过65535种时仍能建立索引"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'questions.jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            for i in range(70_000):
+                f.write(json.dumps({'id': i, 'content': f'题目{i}', 'type': 'copy', 'difficulty': f'{i / 7:.4f}'}) + '\n')
+        lib = TextLib(path)
+        assert lib.get_question_ids(difficulty=f'{69_999 / 7:.4f}') == [69_999]
+        assert lib.count(qtype='copy') == 70_000
+        assert len(lib.bank.facet_values('difficulty')) == 70_000
+
+
+def test_sampler_no_repeat_and_resume():
+    """题目池抽完前不重复，重启后继续之前的进度"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = _make_lib(tmp)
+        state_dir = os.path.join(tmp, 'samplers')
+        sampler = lib.sampler('p1', state_dir, language='zh')
+        sampler.rng = random.Random(0)
+        first = [sampler.draw()['id'] for _ in range(2)]
+
+        resumed = lib.sampler('p1', state_dir, language='zh')
+        rest = [resumed.draw()['id'] for _ in range(2)]
+        assert sorted(first + rest) == [0, 3, 4, 5]
+        assert resumed.remaining() == 0
+
+        # 抽完后开始新一轮
+        assert resumed.draw()['id'] in (0, 3, 4, 5)
+        assert resumed.round == 1
+        # 其他参与者互不影响
+        assert lib.sampler('p2', state_dir, language='zh').remaining() == 4
+
+
+def test_json_cache_and_hot_reload():
+    """源文件未变化时映射JSONL缓存而不解析JSON，缓存对不上时重建；文件修改后后台重新加载并替换题库"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = _make_lib(tmp)
+        cache_path = lib.json_path + textlib.JSON_CACHE_SUFFIX
+        assert os.path.exists(cache_path + textlib.JSONL_INDEX_SUFFIX)
+
+        original_init = textlib.JsonQuestionBank.__init__
+        textlib.JsonQuestionBank.__init__ = None  # 命中缓存时不会解析JSON题库
+        try:
+            cached = TextLib(lib.json_path)
+        finally:
+            textlib.JsonQuestionBank.__init__ = original_init
+        assert isinstance(cached.bank, CachedJsonQuestionBank)
+        _check_indexed_draws(cached)
+
+        # 缓存文件被改动或是旧格式（如pickle）时丢弃并重建
+        with open(cache_path, 'ab') as f:
+            f.write(b'{"id": 99}\n')
+        assert not isinstance(TextLib(lib.json_path).bank, CachedJsonQuestionBank)
+        with open(cache_path + textlib.JSONL_INDEX_SUFFIX, 'wb') as f:
+            f.write(b'\x80\x05\x95')
+        assert not isinstance(TextLib(lib.json_path).bank, CachedJsonQuestionBank)
+        assert isinstance(TextLib(lib.json_path).bank, CachedJsonQuestionBank)
+
+        sampler = cached.sampler('p1')
+        sampler.draw()
+        reloaded = []
+        cached.start_watching(interval=0.05, on_reload=reloaded.append)
+        with open(lib.json_path, 'w', encoding='utf-8') as f:
+            json.dump(QUESTIONS + [{'id': 6, 'content': '新题', 'language': 'en'}], f, ensure_ascii=False)
+        deadline = time.time() + 5
+        while not reloaded and time.time() < deadline:
+            time.sleep(0.05)
+        cached.stop_watching()
+        assert reloaded and cached.bank is reloaded[0]
+        assert cached.get_question_ids(language='en') == [1, 2, 6]
+        # 抽题器按新题库继续本轮，已抽过的题目不会再出现
+        assert sampler.remaining() == 6
+
+
+def test_json_cache_keeps_question_ids():
+    """缓存沿用JSON题库的题目标识：字符串id原样保留，没有id的题目用位置"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'questions.json')
+        questions = [{'id': 'q-a', 'content': 'A', 'type': 'code'}, {'content': 'B', 'type': 'copy'}]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(questions, f, ensure_ascii=False)
+        for _ in range(2):
+            lib = TextLib(path)
+            assert lib.get_question_ids() == ['q-a', 1]
+            assert lib.get_question('q-a') == questions[0]
+            assert lib.get_question(1) == questions[1]
+        assert isinstance(lib.bank, CachedJsonQuestionBank)
+
+
+def test_scheduler_balances_and_decays():
+    """分层之间均衡，曝光多的题目被抽到的概率按权重衰减"""
+    with tempfile.TemporaryDirectory() as tmp:
+        lib = _make_lib(tmp)
+        state_path = os.path.join(tmp, 'exposure.json')
+        scheduler = lib.scheduler(state_path, stratify_by=('difficulty',), language='zh',
+                                  rng=random.Random(1))
+        # zh: easy -> [0, 3]，hard -> [4, 5]
+        scheduler.record_exposure(0, 3)
+        hits = {}
+        for _ in range(4000):
+            qid = scheduler.draw()['id']
+            hits[qid] = hits.get(qid, 0) + 1
+        assert set(hits) == {0, 3, 4, 5}
+        # 两个难度各占一半
+        assert abs((hits[0] + hits[3]) - 2000) < 200
+        # easy分层内权重比为 0.5**3 : 1
+        assert abs(hits[0] / hits[3] - 0.125) < 0.05
+
+        # 曝光次数持久化，重新创建后继续生效
+        resumed = lib.scheduler(state_path, stratify_by=('difficulty',), language='zh')
+        assert resumed.counts == {0: 3}
+        resumed.draw(record=True)
+        assert sum(resumed.counts.values()) == 4
+
+        # 没有id的题目不记录曝光，保存的状态中不会出现"None"键
+        resumed.record_exposure(None)
+        assert None not in resumed.counts and sum(resumed.counts.values()) == 4
+        with open(state_path, 'r', encoding='utf-8') as f:
+            assert 'None' not in json.load(f)['counts']
+
+
+if __name__ == '__main__':
+    test_indexed_draws()
+    test_jsonl_index_rebuilt_when_stale()
+    test_jsonl_index_many_facet_values()
+    test_sampler_no_repeat_and_resume()
+    test_json_cache_and_hot_reload()
+    test_json_cache_keeps_question_ids()
+    test_scheduler_balances_and_decays()
+    print("所有测试通过")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+测试自绘时间轴 - 验证坐标与帧号的换算、缩放平移、播放头拖动以及只绘制可见的缩略图格子
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt, QEvent, QPointF
+from PyQt5.QtGui import QPixmap, QColor, QMouseEvent
+from PyQt5.QtWidgets import QApplication
+
+from gui.widgets.timeline_strip import TimelineStrip, format_time
+
+
+def _strip(total_frames=30 * 60 * 30, width=1000):
+    strip = TimelineStrip()
+    strip.resize(width, strip.height())
+    strip.set_video(total_frames, 30.0)
+    return strip
+
+
+def _mouse(strip, event_type, x):
+    # 直接发送事件：QTest.mouseMove不带按键状态，连续按下又会被合成为双击
+    button = Qt.NoButton if event_type == QEvent.MouseMove else Qt.LeftButton
+    buttons = Qt.NoButton if event_type == QEvent.MouseButtonRelease else Qt.LeftButton
+    QApplication.sendEvent(strip, QMouseEvent(event_type, QPointF(x, 40), button, buttons, Qt.NoModifier))
+
+
+def test_fit_zoom_and_pan():
+    """默认显示全部；以锚点缩放时锚点下的帧不变，平移不超出视频范围"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    strip = _strip()
+    assert strip.frame_at(0) == 0 and strip.frame_at(999) == 53946
+    assert strip.visible_range() == (0.0, 54000)
+
+    anchor = strip.frame_at(250)
+    strip.zoom(4, 250)
+    assert abs(strip.frame_at(250) - anchor) <= 1
+    assert strip.frames_per_pixel == 54000 / 1000 / 4
+
+    strip.pan(-10_000)
+    assert strip.visible_range()[0] == 0
+    strip.pan(10_000_000)
+    assert strip.visible_range()[1] == 54000
+
+    # 最大放大倍数有限制，缩小不超过显示全部
+    strip.zoom(10_000)
+    assert strip.frames_per_pixel == 1 / TimelineStrip.MAX_PIXELS_PER_FRAME
+    strip.zoom(1 / 10_000)
+    assert strip.visible_range() == (0.0, 54000)
+    assert format_time(61.5) == "01:01.50" and format_time(61.5, False) == "01:01"
+
+
+def test_playhead_click_and_drag():
+    """点击跳转到点击位置，按住播放头拖动时连续发出帧号；放大后播放头离开视图时翻页"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    strip = _strip(total_frames=1000)
+    clicked, dragged = [], []
+    strip.clicked.connect(clicked.append)
+    strip.playhead_dragged.connect(dragged.append)
+
+    _mouse(strip, QEvent.MouseButtonPress, 500)
+    _mouse(strip, QEvent.MouseButtonRelease, 500)
+    assert clicked == [500] and strip.playhead == 500
+
+    _mouse(strip, QEvent.MouseButtonPress, 501)  # 在播放头上按下不跳转
+    for x in (520, 540, 560):
+        _mouse(strip, QEvent.MouseMove, x)
+    _mouse(strip, QEvent.MouseButtonRelease, 560)
+    assert clicked == [500]
+    assert dragged == [520, 540, 560]
+
+    strip.zoom(4, 500)
+    strip.set_playhead(990)
+    start, end = strip.visible_range()
+    assert start <= 990 < end
+
+
+def test_paints_only_visible_tiles():
+    """每个可见格子显示格子起点处最近的缩略图，不可见的缩略图不参与绘制"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    strip = _strip(total_frames=30 * 60 * 30)
+    colors = {}
+    for i, frame in enumerate(range(0, 54000, 60)):
+        pixmap = QPixmap(TimelineStrip.TILE_WIDTH, TimelineStrip.TILE_HEIGHT)
+        color = QColor((i * 37) % 256, (i * 11) % 256, 200)
+        pixmap.fill(color)
+        strip.add_thumbnail(frame, pixmap)
+        colors[frame] = color.rgb()
+    assert strip.thumbnail_count == 900
+
+    strip.zoom(50, 0)
+    first_slot, last_slot = strip._slot_index(0), strip._slot_index(strip.width() - 1)
+    assert last_slot - first_slot + 1 <= strip.width() // TimelineStrip.TILE_WIDTH + 1
+
+    image = strip.grab().toImage()
+    y = TimelineStrip.RULER_HEIGHT + TimelineStrip.MARGIN + TimelineStrip.TILE_HEIGHT // 2
+    for slot in range(first_slot, last_slot + 1):
+        x = int(strip.x_for_frame(strip._slot_frame(slot))) + TimelineStrip.TILE_WIDTH // 2
+        if not 0 <= x < strip.width():
+            continue
+        expected = colors[strip.thumbnail_for_frame(strip._slot_frame(slot))]
+        assert image.pixel(x, y) == expected
+
+
+if __name__ == '__main__':
+    test_fit_zoom_and_pan()
+    test_playhead_click_and_drag()
+    test_paints_only_visible_tiles()
+    print("所有测试通过")
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+测试时间轴缩略图 - 验证缩略图在后台按顺序生成、逐张加入时间轴、可在切换记录时取消，以及缩略图拼图的磁盘缓存
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.playback.frame_index import FrameIndex
+from gui.services.playback.thumbnail_cache import ThumbnailCache, sprite_paths
+from gui.services.playback.thumbnail_worker import ThumbnailWorker, THUMBNAIL_SIZE, iter_thumbnails
+from gui.widgets.timeline_widget import TimelineWidget
+from test_frame_index import _write_numbered_video, BITS
+
+
+def _thumbnail_number(image):
+    # 缩略图宽100，原视频每条纹32像素（共256），取每条纹中心
+    scale = image.width() / 256
+    return sum(1 << bit for bit in range(BITS)
+               if image.pixelColor(int((bit * 32 + 16) * scale), image.height() // 2).red() > 128)
+
+
+def _process_until(app, condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_worker_generates_in_order():
+    """按顺序生成目标帧的缩略图，取消后不再发出"""
+    QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        index = FrameIndex.for_video(path)
+        worker = ThumbnailWorker(path, index, range(0, 120, 7))
+        received = []
+        worker.thumbnail_ready.connect(lambda frame, image: received.append((frame, _thumbnail_number(image))),
+                                       Qt.DirectConnection)
+        worker.start()
+        worker.wait()
+        assert [frame for frame, _ in received] == list(range(0, 120, 7))
+        assert all(frame == number for frame, number in received)
+
+        worker = ThumbnailWorker(path, index, range(120))
+        worker.start()
+        worker.cancel()
+        assert worker.isFinished() and worker.generated < 120
+
+
+def test_timeline_streams_thumbnails():
+    """加载后立即返回，缩略图陆续出现；重新加载时旧的生成被取消"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_numbered_video(path)
+        timeline = TimelineWidget()
+        timeline.load_thumbnails(path)
+        first_worker = timeline.thumbnail_worker
+        timeline.load_thumbnails(path)
+        assert first_worker.is_cancelled and first_worker.isFinished()
+        # 120帧、30fps、每2秒一张
+        assert _process_until(app, lambda: len(timeline.thumbnails) == 2)
+        assert [frame for frame, _ in timeline.thumbnails] == [0, 60]
+        timeline.clear_thumbnails()
+        assert timeline.thumbnail_worker is None and timeline.thumbnails == []
+
+
+def test_sprite_cache():
+    """缩略图拼图可读回，视频改写后失效，超过上限时淘汰最久未用的拼图"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'video{i}.mp4') for i in range(2)]
+        for path in paths:
+            _write_numbered_video(path)
+        index = FrameIndex.for_video(paths[0])
+        thumbnails = list(iter_thumbnails(paths[0], index, range(0, 120, 3)))
+        cache = ThumbnailCache()
+        cache.save(paths[0], 3, THUMBNAIL_SIZE, thumbnails)
+        loaded = cache.load(paths[0], 3, THUMBNAIL_SIZE)
+        assert [frame for frame, _ in loaded] == list(range(0, 120, 3))
+        assert all(abs(int(a[28, 50].mean()) - int(b[28, 50].mean())) < 16
+                   for (_, a), (_, b) in zip(thumbnails, loaded))
+        assert cache.load(paths[0], 6, THUMBNAIL_SIZE) is None
+
+        # 缓存命中时时间轴直接显示，不启动后台生成
+        timeline = TimelineWidget()
+        timeline.thumbnail_cache.save(paths[0], 60, THUMBNAIL_SIZE, thumbnails[:2])
+        timeline.load_thumbnails(paths[0])
+        assert timeline.thumbnail_worker is None and len(timeline.thumbnails) == 2
+
+        # 第二个视频生成后写入缓存
+        timeline.load_thumbnails(paths[1])
+        assert _process_until(app, lambda: os.path.exists(sprite_paths(paths[1], 60, THUMBNAIL_SIZE)[1]))
+        timeline.thumbnail_worker.wait()
+
+        # 上限只够一个拼图时淘汰较早使用的
+        sprite, meta = sprite_paths(paths[0], 3, THUMBNAIL_SIZE)
+        os.utime(meta, (1, 1))
+        small = ThumbnailCache(max_bytes=os.path.getsize(sprite) + os.path.getsize(meta) - 1)
+        small.evict(os.path.dirname(meta))
+        assert not os.path.exists(meta) and not os.path.exists(sprite)
+        assert small.load(paths[1], 60, THUMBNAIL_SIZE) is not None
+
+        # 视频被改写后缓存失效
+        _write_numbered_video(paths[1], frames=60)
+        os.utime(paths[1], ns=(1, 1))
+        assert small.load(paths[1], 60, THUMBNAIL_SIZE) is None
+
+
+if __name__ == '__main__':
+    test_worker_generates_in_order()
+    test_timeline_streams_thumbnails()
+    test_sprite_cache()
+    print("所有测试通过")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+测试按键活动 - 验证分箱速率、停顿与输入法上屏的提取、按会话缓存以及活动条随时间轴视图绘制
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtGui import QColor
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.playback.typing_activity import TypingActivity, PAUSE_THRESHOLD, BIN_CACHE_SIZE
+from gui.widgets.timeline_strip import TimelineStrip
+from gui.widgets.typing_activity_strip import TypingActivityStrip
+
+
+def _record():
+    raw = []
+    # 0-2秒每0.1秒一次按键，然后停顿5秒，7-8秒每0.25秒一次
+    for t in list(np.arange(0, 2, 0.1)) + list(np.arange(7, 8, 0.25)):
+        raw.append({'type': 'PRESS', 'key_code': 65, 'key_text': 'a', 'timestamp': float(t)})
+        raw.append({'type': 'RELEASE', 'key_code': 65, 'key_text': 'a', 'timestamp': float(t) + 0.05})
+    keystrokes = [
+        {'key': 'COMPOSITION_ni', 'text': 'ni', 'timestamp': 7.2},
+        {'key': 'COMMIT_你', 'text': '你', 'timestamp': 7.5},
+        {'key': 65, 'text': 'a', 'timestamp': 7.6},
+    ]
+    return {'id': 'activity-test', 'timestamp': '2024-01-01', 'keystrokes': keystrokes, 'raw_keystrokes': raw}
+
+
+def test_rates_pauses_and_commits():
+    """每秒按键数、停顿区间和上屏时间"""
+    activity = TypingActivity.from_record(_record())
+    assert len(activity) == 24
+    rates = activity.rates(0.0, 1.0, 8)
+    assert list(rates) == [10, 10, 0, 0, 0, 0, 0, 4]
+    assert activity.peak_rate == 10
+    starts, ends = activity.pauses_between(0, 100)
+    assert len(starts) == 1 and abs(starts[0] - 1.9) < 1e-9 and ends[0] == 7.0
+    assert len(activity.pauses_between(3, 4)[0]) == 1
+    assert len(activity.pauses_between(7.5, 9)[0]) == 0
+    assert list(activity.commits_between(0, 100)) == [7.5]
+
+    # 没有原始按键时使用输入框按键记录，输入法事件不算按键
+    legacy = TypingActivity.from_record({'keystrokes': _record()['keystrokes']})
+    assert list(legacy.press_times) == [7.6]
+    assert len(TypingActivity.from_record({})) == 0
+    assert TypingActivity(np.arange(0, 10, PAUSE_THRESHOLD)).pause_starts.size == 0
+
+
+def test_cached_per_session_and_view():
+    """同一记录复用同一对象，同一视图的分箱结果直接复用；长会话各缩放级别的分箱正确且缓存有上限"""
+    record = _record()
+    assert TypingActivity.for_record(record) is TypingActivity.for_record(dict(record))
+    activity = TypingActivity.for_record(record)
+    assert activity.rates(0.0, 0.5, 100) is activity.rates(0.0, 0.5, 100)
+
+    rng = np.random.default_rng(3)
+    long_activity = TypingActivity(np.cumsum(rng.uniform(0.01, 0.5, 500_000)))
+    duration = long_activity.press_times[-1]
+    for zoom in (1, 7, 50):
+        bin_seconds = duration / 500 / zoom
+        rates = long_activity.rates(duration / 3, bin_seconds, 500)
+        edges = duration / 3 + np.arange(501) * bin_seconds
+        expected = np.histogram(long_activity.press_times, bins=edges)[0]
+        # histogram的最后一个箱子包含右端点
+        assert np.array_equal(np.rint(rates[:-1] * bin_seconds), expected[:-1])
+    # 分箱结果只缓存有限个视图
+    for zoom in range(1, 200):
+        long_activity.rates(0.0, duration / 500 / zoom, 500)
+    assert len(long_activity._bins) <= BIN_CACHE_SIZE
+
+def test_strip_follows_timeline_view():
+    """活动条与时间轴共用视图：有按键的位置画柱，缩放后随之重新分箱"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    strip = TimelineStrip()
+    strip.resize(800, strip.height())
+    strip.set_video(30 * 60, 30.0)
+    activity_strip = TypingActivityStrip(strip)
+    activity_strip.resize(800, activity_strip.height())
+    activity_strip.set_activity(TypingActivity.from_record(_record()))
+
+    bar_color = QColor('#34c759').rgb()
+    bottom = activity_strip.height() - 1
+    image = activity_strip.grab().toImage()
+    assert image.pixel(int(strip.x_for_frame(30)), bottom) == bar_color
+    assert image.pixel(int(strip.x_for_frame(30 * 5)), bottom) != bar_color
+
+    strip.zoom(4, 0)
+    x0, bin_seconds, rates = activity_strip.visible_bins()
+    assert abs(bin_seconds - 60 / 800 / 4 * TypingActivityStrip.BIN_WIDTH) < 1e-9
+    assert x0 <= 0 and len(rates) * TypingActivityStrip.BIN_WIDTH >= activity_strip.width()
+    image = activity_strip.grab().toImage()
+    assert image.pixel(int(strip.x_for_frame(45)), bottom) == bar_color
+    assert image.pixel(int(strip.x_for_frame(30 * 5)), bottom) != bar_color
+
+
+if __name__ == '__main__':
+    test_rates_pauses_and_commits()
+    test_cached_per_session_and_view()
+    test_strip_follows_timeline_view()
+    print("所有测试通过")
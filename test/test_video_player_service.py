@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+测试视频播放服务 - 验证帧在播放线程中按显示区域缩放并以QImage输出，以及共享时钟下的同步播放
+"""
+
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QImage
+from PyQt5.QtWidgets import QApplication
+
+from gui.services.playback.video_player_service import VideoPlayerService, fit_size, frame_to_image
+from gui.services.playback.playback_clock import PlaybackClock
+
+
+def _write_video(path, frames=6, size=(320, 240)):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 30, size)
+    for i in range(frames):
+        frame = np.zeros((size[1], size[0], 3), dtype=np.uint8)
+        frame[:, :, 2] = 8 * i  # 红色通道随帧号变化
+        writer.write(frame)
+    writer.release()
+
+
+def test_frame_to_image_scaling():
+    """按比例缩放到显示区域，复用缓冲区，像素为RGB32"""
+    assert fit_size(1920, 1080, 800, 600) == (800, 450)
+    assert fit_size(640, 480, 0, 0) == (640, 480)
+
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    frame[:, :] = (10, 20, 30)  # BGR
+    image, buffer = frame_to_image(frame, (800, 600))
+    assert (image.width(), image.height()) == (800, 450)
+    assert image.format() == QImage.Format_RGB32
+    assert image.pixel(400, 200) & 0xFFFFFF == 0x1E140A
+
+    image, reused = frame_to_image(frame, (800, 600), buffer)
+    assert reused is buffer
+    image, _ = frame_to_image(frame)
+    assert (image.width(), image.height()) == (1920, 1080)
+
+
+def test_player_emits_scaled_images():
+    """播放线程发出的帧已是显示尺寸"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_video(path)
+        player = VideoPlayerService(path)
+        assert player.open_video()
+        player.set_display_size(160, 160)
+        assert player.read_frame(0).size().width() == 160
+
+        received = []
+        player.frame_ready.connect(lambda image, ts: received.append((image.width(), image.height(), ts)))
+        player.finished.connect(app.quit)
+        player.set_playback_speed(2.0)
+        player.play()
+        app.exec_()
+        player.close()
+        assert len(received) == 6
+        assert all(size[:2] == (160, 120) for size in received)
+        assert [ts for _, _, ts in received] == [int(i / 30 * 1000) for i in range(6)]
+
+
+def test_playback_clock():
+    """时钟的暂停、跳转和变速"""
+    clock = PlaybackClock()
+    assert clock.position() == 0.0
+    clock.seek(5.0)
+    time.sleep(0.02)
+    assert clock.position() == 5.0  # 未开始时不走时
+    clock.start()
+    clock.set_speed(4.0)
+    time.sleep(0.05)
+    clock.pause()
+    position = clock.position()
+    assert 5.15 < position < 5.6
+    time.sleep(0.02)
+    assert clock.position() == position
+
+
+def test_players_follow_shared_clock():
+    """两个播放服务共享时钟：落后时丢帧追赶，显示的帧与时钟保持一致"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_video(path, frames=30)
+        clock = PlaybackClock()
+        players = [VideoPlayerService(path, clock=clock) for _ in range(2)]
+        received = {0: [], 1: []}
+        for i, player in enumerate(players):
+            assert player.open_video()
+            player.frame_ready.connect(lambda image, ts, i=i: received[i].append(ts))
+        players[1].finished.connect(app.quit)
+
+        clock.start()
+        players[0].play()
+        # 第二路晚启动，开始时已落后于时钟
+        time.sleep(0.3)
+        players[1].play()
+        # 时钟突然前进（相当于解码卡顿），两路都应丢帧追上
+        QTimer.singleShot(100, lambda: clock.seek(clock.position() + 0.2))
+        app.exec_()
+        players[0].wait()
+        for player in players:
+            player.close()
+
+        # 晚启动的一路直接从时钟位置开始
+        assert received[1][0] >= 200
+        for i, player in enumerate(players):
+            stats = player.sync_stats()
+            assert stats['presented'] == len(received[i])
+            assert stats['dropped'] >= 4
+            assert received[i] == sorted(received[i])
+            assert abs(stats['drift_ms']) < 50
+
+
+if __name__ == '__main__':
+    test_frame_to_image_scaling()
+    test_player_emits_scaled_images()
+    test_playback_clock()
+    test_players_follow_shared_clock()
+    print("所有测试通过")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+测试虚拟键盘 - 验证按布局表自绘、高亮变化时只重绘变化的按键以及热力模式
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtWidgets import QApplication
+
+from gui.widgets.virtual_keyboard import VirtualKeyboard
+
+
+def _center_color(keyboard, name):
+    image = keyboard.grab().toImage()
+    rect = keyboard.key_rects(name)[0]
+    return image.pixelColor(int(rect.center().x()), int(rect.top()) + 3)
+
+
+def test_highlight_repaints_only_changed_keys():
+    """只有状态改变的按键区域被重绘，同名的左右键一起高亮"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    keyboard = VirtualKeyboard()
+    keyboard.resize(700, 220)
+    assert {'A', 'SPACE', 'ENTER', 'SHIFT', '\\'} <= keyboard.key_names
+    assert len(keyboard.key_rects('Shift')) == 2
+
+    updates = []
+    keyboard.update = lambda *args: updates.append(args)
+    keyboard.highlight_keys(['a', 'Shift'])
+    assert len(updates) == 3  # A和两个Shift
+    updates.clear()
+    keyboard.highlight_keys(['A', 'SHIFT'])
+    assert updates == []
+    keyboard.highlight_keys(['A', 'S'])
+    assert len(updates) == 3  # 两个Shift取消、S高亮
+    del keyboard.update
+
+    assert _center_color(keyboard, 'S').name() == '#007aff'
+    assert _center_color(keyboard, 'D').name() != '#007aff'
+
+
+def test_heat_mode():
+    """热力模式下按下次数越多颜色越接近橙色"""
+    app = QApplication.instance() or QApplication(sys.argv)
+    keyboard = VirtualKeyboard()
+    keyboard.resize(700, 220)
+    keyboard.set_key_counts({'e': 50, 'q': 5})
+    cold = _center_color(keyboard, 'E')
+    keyboard.set_heat_mode(True)
+    hot, warm, none = (_center_color(keyboard, k) for k in ('E', 'Q', 'Z'))
+    assert hot.red() > warm.red() > none.red()
+    assert none == cold
+
+
+if __name__ == '__main__':
+    test_highlight_repaints_only_changed_keys()
+    test_heat_mode()
+    print("所有测试通过")
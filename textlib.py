@@ -1,35 +1,854 @@
+import os
 import json
+import mmap
 import random
-from typing import List, Optional, Dict, Any
+import struct
+import hashlib
+import logging
+import threading
+from array import array
+from itertools import product
+from typing import List, Optional, Dict, Any, Tuple, Sequence
+
+import numpy as np
+
+# 索引键：(type, language, difficulty)，None表示不限
+IndexKey = Tuple[Optional[str], Optional[str], Optional[str]]
+
+FACETS = ('type', 'language', 'difficulty')
+
+# JSONL题库的旁路索引文件后缀：questions.jsonl.idx
+JSONL_INDEX_SUFFIX = '.idx'
+_INDEX_MAGIC = b'QBIX'
+_INDEX_VERSION = 1
+_INDEX_PREFIX = struct.Struct('<4sIQ')
+
+# JSON题库缓存（JSONL格式）文件后缀：questions.json.cache，旁路索引为 questions.json.cache.idx
+JSON_CACHE_SUFFIX = '.cache'
+_CACHE_VERSION = 3
+
+
+def file_digest(path: str) -> str:
+    """文件内容摘要（流式计算）"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_matches(meta: Dict[str, Any], path: str) -> bool:
+    """缓存/索引是否仍对应源文件：大小和修改时间一致即可；
+    只有修改时间变化时（如复制、touch）再比较内容摘要"""
+    stat_result = os.stat(path)
+    if meta.get('bank_size') != stat_result.st_size:
+        return False
+    if meta.get('bank_mtime_ns') == stat_result.st_mtime_ns:
+        return True
+    return meta.get('bank_hash') is not None and meta.get('bank_hash') == file_digest(path)
+
+
+class JsonQuestionBank:
+    """JSON数组题库：整体读入内存，加载时建立 类型×语言×难度 索引
+
+    加载后把题目逐行写成JSONL缓存（<题库>.cache）并生成旁路索引，源文件未变化时
+    open_question_bank直接映射缓存（见CachedJsonQuestionBank），启动时不再解析JSON。
+    """
+
+    def __init__(self, path: str, use_cache: bool = True):
+        self.path = path
+        self.cache_path = path + JSON_CACHE_SUFFIX
+        stat_result = os.stat(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+        self.questions: List[Dict[str, Any]] = json.loads(data.decode('utf-8'))
+        self._build_index()
+        if use_cache:
+            # 直接对已读入的内容求摘要，不再读一遍文件
+            self._save_cache({
+                'version': _CACHE_VERSION,
+                'bank_size': stat_result.st_size,
+                'bank_mtime_ns': stat_result.st_mtime_ns,
+                'bank_hash': hashlib.blake2b(data, digest_size=16).hexdigest(),
+            })
+
+    def _build_index(self):
+        # 每道题登记到 类型×语言×难度 的全部8种组合（含不限），筛选抽题时直接取对应列表
+        self._index: Dict[IndexKey, List[int]] = {}
+        self._positions: Dict[Any, int] = {}
+        values = {facet: set() for facet in FACETS}
+        for i, q in enumerate(self.questions):
+            self._positions[q.get('id', i)] = i
+            facets = tuple(q.get(facet) or None for facet in FACETS)
+            for key in product(*((value, None) if value is not None else (None,) for value in facets)):
+                self._index.setdefault(key, []).append(i)
+            for facet in FACETS:
+                values[facet].add(q.get(facet, ''))
+        self._facet_values = {facet: sorted(values[facet], key=str) for facet in FACETS}
+
+    def _save_cache(self, source: Dict[str, Any]):
+        """把题目写成JSONL缓存并生成旁路索引，源文件信息记录在索引头部"""
+        extra = {'source': source}
+        if not all(_is_int_id(q.get('id')) for q in self.questions):
+            # 旁路索引只保存整数id，其他情况按JSON题库的规则（没有id时用位置）记录全部id
+            extra['question_ids'] = [q.get('id', i) for i, q in enumerate(self.questions)]
+        digest = hashlib.blake2b(digest_size=16)
+        rows = []
+        tmp_path = self.cache_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                offset = 0
+                for q in self.questions:
+                    line = json.dumps(q, ensure_ascii=False).encode('utf-8') + b'\n'
+                    f.write(line)
+                    digest.update(line)
+                    rows.append((offset, len(line) - 1, q))
+                    offset += len(line)
+            os.replace(tmp_path, self.cache_path)
+            # 旁路索引最后写入，存在且与缓存文件一致即表示缓存完整
+            _write_jsonl_index(self.cache_path + JSONL_INDEX_SUFFIX, rows, os.stat(self.cache_path), digest, extra)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f'写入题库缓存失败: {e}')
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        return self.questions[position]
+
+    def positions(self, key: IndexKey) -> Sequence[int]:
+        return self._index.get(key, [])
+
+    def question_id(self, position: int) -> Any:
+        return self.questions[position].get('id', position)
+
+    def position_of(self, question_id: Any) -> Optional[int]:
+        return self._positions.get(question_id)
+
+    def facet_values(self, facet: str) -> List[str]:
+        return self._facet_values[facet]
+
+
+class JsonlQuestionBank:
+    """JSONL题库：每行一道题，按需读取
+
+    旁路索引（<题库>.idx）保存每道题的字节偏移和长度、题目id，以及按 类型×语言×难度
+    每种组合排好序的题目位置数组；这些数组和题库文件本身都通过mmap访问，
+    启动时只读取索引头部，内存占用与题库大小无关。索引缺失或与题库不一致时自动重建。
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        self.path = path
+        self.index_path = index_path or path + JSONL_INDEX_SUFFIX
+        header = _read_index_header(self.index_path)
+        if header is None or not _source_matches(header, path):
+            build_jsonl_index(path, self.index_path)
+            header = _read_index_header(self.index_path)
+        self._header = header
+        self._count = header['count']
+        self._vocab = header['vocab']
+        self._codes = {facet: {value: code for code, value in enumerate(values)}
+                       for facet, values in self._vocab.items()}
+        self._ranges = header['ranges']
+        self._arrays = {name: self._map_array(name) for name in header['arrays']}
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) else b''
+
+    def _map_array(self, name):
+        offset, dtype, length = self._header['arrays'][name]
+        if length == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.index_path, dtype=dtype, mode='r', offset=offset, shape=(length,))
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> Dict[str, Any]:
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        start = int(self._arrays['starts'][position])
+        length = int(self._arrays['lengths'][position])
+        return json.loads(self._mm[start:start + length].decode('utf-8'))
+
+    def positions(self, key: IndexKey) -> Sequence[int]:
+        mask = ''.join('1' if value is not None else '0' for value in key)
+        code = 0
+        for facet, value in zip(FACETS, key):
+            facet_code = self._codes[facet].get(value, -1) if value is not None else 0
+            if facet_code < 0:
+                return []
+            code = code * len(self._vocab[facet]) + facet_code
+        found = self._ranges[mask].get(str(code))
+        if found is None:
+            return []
+        start, count = found
+        return self._arrays[f'order_{mask}'][start:start + count]
+
+    def question_id(self, position: int) -> Any:
+        ids = self._arrays.get('ids')
+        return int(ids[position]) if ids is not None else position
+
+    def position_of(self, question_id: Any) -> Optional[int]:
+        ids = self._arrays.get('ids')
+        if ids is None:
+            return question_id if isinstance(question_id, int) and 0 <= question_id < self._count else None
+        if not isinstance(question_id, (int, np.integer)):
+            return None
+        id_order = self._arrays['id_order']
+        i = _searchsorted_indirect(ids, id_order, question_id)
+        if i < len(id_order) and ids[id_order[i]] == question_id:
+            return int(id_order[i])
+        return None
+
+    def facet_values(self, facet: str) -> List[str]:
+        # 编码0保留给缺失值，与JSON题库一致显示为空字符串
+        values = self._vocab[facet]
+        present = self._header['present'][facet]
+        return sorted(([''] if present[0] else []) + [v for v, p in zip(values[1:], present[1:]) if p], key=str)
+
+
+class CachedJsonQuestionBank(JsonlQuestionBank):
+    """JSON题库的JSONL缓存（<题库>.cache及其旁路索引）
+
+    与JSONL题库一样通过mmap按需读取题目，启动时只读取索引头部；题目id沿用JSON题库的规则。
+    """
+
+    def __init__(self, path: str, index_path: Optional[str] = None):
+        super().__init__(path, index_path)
+        self._question_ids = self._header.get('question_ids')
+        self._id_positions = None
+
+    @classmethod
+    def open(cls, json_path: str) -> Optional['CachedJsonQuestionBank']:
+        """源文件和缓存都未变化时打开缓存，否则返回None"""
+        cache_path = json_path + JSON_CACHE_SUFFIX
+        index_path = cache_path + JSONL_INDEX_SUFFIX
+        try:
+            header = _read_index_header(index_path)
+            source = header.get('source') if header is not None else None
+            if not source or source.get('version') != _CACHE_VERSION \
+                    or not _source_matches(header, cache_path) or not _source_matches(source, json_path):
+                return None
+            return cls(cache_path, index_path)
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning(f'题库缓存不可用，将重新解析: {e}')
+            return None
+
+    def question_id(self, position: int) -> Any:
+        if self._question_ids is None:
+            return super().question_id(position)
+        return self._question_ids[position]
+
+    def position_of(self, question_id: Any) -> Optional[int]:
+        if self._question_ids is None:
+            return super().position_of(question_id)
+        if self._id_positions is None:
+            self._id_positions = {qid: i for i, qid in enumerate(self._question_ids)}
+        return self._id_positions.get(question_id)
+
+
+def _searchsorted_indirect(ids, id_order, question_id):
+    """在按id_order排好序的ids中二分查找（不物化排序后的数组）"""
+    lo, hi = 0, len(id_order)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if ids[id_order[mid]] < question_id:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def _read_index_header(index_path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'rb') as f:
+        prefix = f.read(_INDEX_PREFIX.size)
+        if len(prefix) < _INDEX_PREFIX.size:
+            return None
+        magic, version, header_length = _INDEX_PREFIX.unpack(prefix)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION:
+            return None
+        return json.loads(f.read(header_length).decode('utf-8'))
+
+
+def build_jsonl_index(path: str, index_path: Optional[str] = None) -> str:
+    """流式扫描JSONL题库，生成旁路索引"""
+    index_path = index_path or path + JSONL_INDEX_SUFFIX
+    stat_result = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+
+    def rows():
+        with open(path, 'rb') as f:
+            offset = 0
+            for line in f:
+                digest.update(line)
+                stripped = line.rstrip(b'\r\n')
+                if stripped.strip():
+                    yield offset, len(stripped), json.loads(stripped.decode('utf-8'))
+                offset += len(line)
+
+    return _write_jsonl_index(index_path, rows(), stat_result, digest)
+
+
+def _is_int_id(value: Any) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _write_jsonl_index(index_path: str, rows, stat_result, digest, extra: Optional[Dict[str, Any]] = None) -> str:
+    """按 (字节偏移, 行长度, 题目) 序列生成旁路索引
+
+    Args:
+        stat_result: 题库文件的stat结果
+        digest: 题库内容摘要对象，rows读完后即为完整内容的摘要
+        extra: 额外写入索引头部的字段
+    """
+    starts, lengths = array('Q'), array('I')
+    ids, all_int_ids = array('q'), True
+    vocab = {facet: [None] for facet in FACETS}
+    codes = {facet: {None: 0} for facet in FACETS}
+    # 编码按取值个数增长，用32位保存（自由文本或小数难度在大题库中可能超过65535种取值）
+    facet_codes = {facet: array('I') for facet in FACETS}
+
+    for start, length, q in rows:
+        starts.append(start)
+        lengths.append(length)
+        qid = q.get('id')
+        if _is_int_id(qid) and all_int_ids:
+            ids.append(qid)
+        else:
+            all_int_ids = False
+        for facet in FACETS:
+            value = q.get(facet) or None
+            code = codes[facet].get(value)
+            if code is None:
+                code = codes[facet][value] = len(vocab[facet])
+                vocab[facet].append(value)
+            facet_codes[facet].append(code)
+
+    count = len(starts)
+    # 组合键为各维编码的混合进制数，必须能用int64表示
+    key_space = 1
+    for facet in FACETS:
+        key_space *= len(vocab[facet])
+    if key_space >= 2 ** 63:
+        raise ValueError('题库的类型/语言/难度取值过多，无法建立组合索引: '
+                         + ', '.join(f'{facet}={len(vocab[facet])}' for facet in FACETS))
+    columns = {facet: np.frombuffer(facet_codes[facet], dtype=np.uint32).astype(np.int64) if count else
+               np.zeros(0, dtype=np.int64) for facet in FACETS}
+    arrays = {
+        'starts': np.frombuffer(starts, dtype=np.uint64) if count else np.zeros(0, np.uint64),
+        'lengths': np.frombuffer(lengths, dtype=np.uint32) if count else np.zeros(0, np.uint32),
+    }
+    if all_int_ids and count:
+        id_array = np.frombuffer(ids, dtype=np.int64)
+        arrays['ids'] = id_array
+        arrays['id_order'] = np.argsort(id_array, kind='stable').astype(np.uint32)
+
+    # 每种组合：按组合键稳定排序的位置数组 + 每个键在数组中的区间
+    ranges = {}
+    for mask in product((True, False), repeat=3):
+        mask_name = ''.join('1' if m else '0' for m in mask)
+        key = np.zeros(count, dtype=np.int64)
+        for facet, included in zip(FACETS, mask):
+            key = key * len(vocab[facet]) + (columns[facet] if included else 0)
+        order = np.argsort(key, kind='stable').astype(np.uint32)
+        unique, first, counts = np.unique(key[order], return_index=True, return_counts=True)
+        ranges[mask_name] = {str(int(k)): [int(s), int(c)] for k, s, c in zip(unique, first, counts)}
+        arrays[f'order_{mask_name}'] = order
+
+    header = {
+        'count': count,
+        'bank_size': stat_result.st_size,
+        'bank_mtime_ns': stat_result.st_mtime_ns,
+        'bank_hash': digest.hexdigest(),
+        'vocab': vocab,
+        'present': {facet: [bool(c) for c in np.bincount(columns[facet], minlength=len(vocab[facet]))]
+                    for facet in FACETS},
+        'ranges': ranges,
+        'arrays': {},
+    }
+    header.update(extra or {})
+    # 先用占位偏移计算头部长度，再按8字节对齐排布各数组
+    for name, values in arrays.items():
+        header['arrays'][name] = [0, values.dtype.str, len(values)]
+    for _ in range(2):
+        header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+        offset = _align(_INDEX_PREFIX.size + len(header_bytes))
+        for name, values in arrays.items():
+            header['arrays'][name][0] = offset
+            offset = _align(offset + values.nbytes)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+
+    tmp_path = index_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_INDEX_PREFIX.pack(_INDEX_MAGIC, _INDEX_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, values in arrays.items():
+            f.seek(header['arrays'][name][0])
+            f.write(values.tobytes())
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def _align(offset: int, alignment: int = 8) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def convert_json_to_jsonl(json_path: str, jsonl_path: Optional[str] = None) -> str:
+    """把JSON数组题库转换为JSONL题库并生成旁路索引"""
+    jsonl_path = jsonl_path or os.path.splitext(json_path)[0] + '.jsonl'
+    with open(json_path, 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+    tmp_path = jsonl_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for q in questions:
+            f.write(json.dumps(q, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, jsonl_path)
+    build_jsonl_index(jsonl_path)
+    return jsonl_path
+
+
+def open_question_bank(path: str):
+    """按文件后缀打开题库；JSON题库的缓存未失效时直接映射缓存"""
+    if path.endswith('.jsonl'):
+        return JsonlQuestionBank(path)
+    cached = CachedJsonQuestionBank.open(path)
+    if cached is not None:
+        return cached
+    return JsonQuestionBank(path)
+
 
 class TextLib:
     def __init__(self, json_path: str):
         self.json_path = json_path
-        self.questions = self._load_questions()
+        self._loaded_signature = self._signature()
+        self.bank = open_question_bank(json_path)
+        self._watch_thread = None
+        self._watch_stop = threading.Event()
+
+    def reload(self) -> bool:
+        """重新加载题库，成功后整体替换（正在使用的题目不受影响）"""
+        signature = self._signature()
+        try:
+            bank = open_question_bank(self.json_path)
+        except Exception as e:
+            # 文件可能正在被编辑，保留当前题库
+            logging.error(f'重新加载题库失败，继续使用当前题库: {e}')
+            return False
+        self.bank = bank
+        self._loaded_signature = signature
+        logging.info(f'题库已重新加载: {self.json_path}, 共 {len(bank)} 题')
+        return True
+
+    def start_watching(self, interval: float = 2.0, on_reload=None):
+        """在后台线程中监视题库文件，变化且稳定后重新加载并替换题库
+        Args:
+            interval: 检查间隔（秒）
+            on_reload: 替换成功后的回调，参数为新题库（在后台线程中调用）
+        """
+        if self._watch_thread is not None:
+            return
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=self._watch, args=(interval, on_reload), daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        """停止监视题库文件"""
+        self._watch_stop.set()
+        if self._watch_thread is not None:
+            self._watch_thread.join()
+            self._watch_thread = None
 
-    def _load_questions(self) -> List[Dict[str, Any]]:
-        with open(self.json_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+    def _signature(self):
+        try:
+            stat_result = os.stat(self.json_path)
+        except OSError:
+            return None
+        return stat_result.st_size, stat_result.st_mtime_ns
+
+    def _watch(self, interval, on_reload):
+        loaded = self._loaded_signature
+        pending = None
+        while not self._watch_stop.wait(interval):
+            signature = self._signature()
+            if signature is None or signature == loaded:
+                pending = None
+                continue
+            if signature != pending:
+                # 等文件在一个检查周期内不再变化（写入完成）后再加载
+                pending = signature
+                continue
+            # 加载失败时也不再重试，等待下一次修改
+            loaded = signature
+            pending = None
+            if self.reload() and on_reload is not None:
+                on_reload(self.bank)
+
+    @property
+    def questions(self):
+        # JSON题库为题目列表；JSONL题库为按位置读取的序列
+        return self.bank.questions if isinstance(self.bank, JsonQuestionBank) else self.bank
+
+    @staticmethod
+    def question_id(question: Dict[str, Any], position: int) -> Any:
+        """题目标识：优先使用id字段，没有时使用题目在题库中的位置"""
+        return question.get('id', position)
+
+    def _positions_for(self, qtype: Optional[str] = None, language: Optional[str] = None,
+                       difficulty: Optional[str] = None) -> Sequence[int]:
+        return self.bank.positions((qtype or None, language or None, difficulty or None))
 
     def get_random_question(self, qtype: Optional[str] = None, language: Optional[str] = None, difficulty: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        filtered = self.questions
-        if qtype:
-            filtered = [q for q in filtered if q.get('type') == qtype]
-        if language:
-            filtered = [q for q in filtered if q.get('language') == language]
-        if difficulty:
-            filtered = [q for q in filtered if q.get('difficulty') == difficulty]
-        if not filtered:
+        positions = self._positions_for(qtype, language, difficulty)
+        if not len(positions):
             return None
-        return random.choice(filtered)
+        return self.bank[int(positions[random.randrange(len(positions))])]
+
+    def get_question_ids(self, qtype: Optional[str] = None, language: Optional[str] = None,
+                         difficulty: Optional[str] = None) -> List[Any]:
+        """符合筛选条件的题目标识"""
+        bank = self.bank
+        return [bank.question_id(int(i)) for i in self._positions_for(qtype, language, difficulty)]
+
+    def get_question(self, question_id: Any) -> Optional[Dict[str, Any]]:
+        """按标识取题目"""
+        bank = self.bank
+        position = bank.position_of(question_id)
+        return bank[position] if position is not None else None
+
+    def count(self, qtype: Optional[str] = None, language: Optional[str] = None, difficulty: Optional[str] = None) -> int:
+        """符合筛选条件的题目数"""
+        return len(self._positions_for(qtype, language, difficulty))
 
     def get_all_types(self) -> List[str]:
-        return list(set(q.get('type', '') for q in self.questions))
+        return list(self.bank.facet_values('type'))
 
     def get_all_languages(self) -> List[str]:
-        return list(set(q.get('language', '') for q in self.questions))
+        return list(self.bank.facet_values('language'))
+
+    def get_all_difficulties(self) -> List[str]:
+        return list(self.bank.facet_values('difficulty'))
+
+    def scheduler(self, state_path: Optional[str] = None, **options) -> 'QuestionScheduler':
+        """创建按曝光次数加权、按分层均衡的出题调度器（参数见QuestionScheduler）"""
+        return QuestionScheduler(self, state_path, **options)
+
+    def sampler(self, participant_id: str, state_dir: Optional[str] = None, **filters) -> 'QuestionSampler':
+        """创建某个参与者的不重复抽题器，state_dir不为空时抽题状态保存在该目录下"""
+        state_path = os.path.join(state_dir, f'{participant_id}.json') if state_dir else None
+        return QuestionSampler(self, participant_id, state_path, **filters)
+
+
+class QuestionSampler:
+    """按参与者不重复抽题
+
+    同一参与者在题目池抽完之前不会抽到重复的题目，抽完后开始新一轮。
+    已抽过的题目标识保存在state_path（JSON），重启程序后继续之前的进度。
+    """
+
+    def __init__(self, textlib: TextLib, participant_id: str, state_path: Optional[str] = None,
+                 qtype: Optional[str] = None, language: Optional[str] = None, difficulty: Optional[str] = None,
+                 rng: Optional[random.Random] = None):
+        self.textlib = textlib
+        self.participant_id = participant_id
+        self.state_path = state_path
+        self.filters = {'qtype': qtype, 'language': language, 'difficulty': difficulty}
+        self.rng = rng or random.Random()
+        self.seen = set()
+        self.round = 0
+        self._deck: List[Any] = []
+        self._deck_source = None
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        with open(self.state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('filters', self.filters) != self.filters:
+            # 筛选条件变化后，之前的进度不再适用
+            return
+        self.seen = set(state.get('seen', []))
+        self.round = state.get('round', 0)
+
+    def save(self):
+        """保存抽题状态"""
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        state = {
+            'participant_id': self.participant_id,
+            'filters': self.filters,
+            'round': self.round,
+            'seen': sorted(self.seen, key=str),
+        }
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    def _refill(self):
+        # 洗牌出本轮尚未抽过的题目，之后每次抽题只需从末尾弹出
+        self._deck = [qid for qid in self.textlib.get_question_ids(**self.filters) if qid not in self.seen]
+        self.rng.shuffle(self._deck)
+        self._deck_source = self.textlib.bank
+
+    def remaining(self) -> int:
+        """本轮剩余可抽的题目数"""
+        if self._deck_source is not self.textlib.bank:
+            self._refill()
+        return len(self._deck)
+
+    def draw(self) -> Optional[Dict[str, Any]]:
+        """抽取一道本轮未抽过的题目；题目池为空时返回None"""
+        if self._deck_source is not self.textlib.bank:
+            # 题库重新加载后按新的题目池重建
+            self._refill()
+        if not self._deck:
+            if not self.textlib.count(**self.filters):
+                return None
+            self.seen.clear()
+            self.round += 1
+            self._refill()
+        question_id = self._deck.pop()
+        self.seen.add(question_id)
+        self.save()
+        return self.textlib.get_question(question_id)
+
+    def reset(self):
+        """清空进度"""
+        self.seen.clear()
+        self.round = 0
+        self._deck_source = None
+        self.save()
+
+class _AliasTable:
+    """Walker/Vose别名表：按权重O(1)抽样"""
+
+    def __init__(self, weights: Sequence[float]):
+        n = len(weights)
+        total = float(sum(weights))
+        self.size = n
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+        if n == 0 or total <= 0:
+            return
+        scaled = [w * n / total for w in weights]
+        small = [i for i, w in enumerate(scaled) if w < 1.0]
+        large = [i for i, w in enumerate(scaled) if w >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng: random.Random) -> int:
+        i = rng.randrange(self.size)
+        return i if rng.random() < self.prob[i] else self.alias[i]
+
+
+class _Bucket:
+    """同一曝光次数的题目位置集合，支持O(1)加入、删除和均匀抽取
+
+    初始成员直接引用题库索引中的位置数组（不复制）；删除采用延迟标记，
+    抽到已删除的位置时重抽，已删除过半时压缩。
+    """
+
+    def __init__(self, base: Sequence[int] = ()):
+        self.base = base
+        self.extra: List[int] = []
+        self.removed = set()
+
+    def __len__(self) -> int:
+        return len(self.base) + len(self.extra) - len(self.removed)
+
+    def add(self, position: int):
+        if position in self.removed:
+            self.removed.discard(position)
+        else:
+            self.extra.append(position)
+
+    def remove(self, position: int):
+        self.removed.add(position)
+        if len(self.removed) * 2 > len(self.base) + len(self.extra):
+            self._compact()
+
+    def _compact(self):
+        self.extra = [int(p) for p in self.base if int(p) not in self.removed] + \
+                     [p for p in self.extra if p not in self.removed]
+        self.base = ()
+        self.removed = set()
+
+    def sample(self, rng: random.Random) -> int:
+        n_base = len(self.base)
+        while True:
+            i = rng.randrange(n_base + len(self.extra))
+            position = int(self.base[i]) if i < n_base else self.extra[i - n_base]
+            if position not in self.removed:
+                return position
+
+
+class _Stratum:
+    """一个分层（如 难度×类型 的一种组合）：按曝光次数分桶，别名表在桶之间按权重抽样"""
+
+    def __init__(self, positions: Sequence[int]):
+        self.buckets: Dict[int, _Bucket] = {0: _Bucket(positions)}
+        self.size = len(positions)
+        self._table = None
+        self._table_counts: List[int] = []
+
+    def move(self, position: int, old_count: int, new_count: int):
+        self.buckets[old_count].remove(position)
+        if not len(self.buckets[old_count]):
+            del self.buckets[old_count]
+        self.buckets.setdefault(new_count, _Bucket()).add(position)
+        self._table = None
+
+    def sample(self, rng: random.Random, weight) -> int:
+        if self._table is None:
+            # 只在桶之间建表，曝光变化时的重建代价与桶数（不同曝光次数的个数）成正比
+            self._table_counts = sorted(self.buckets)
+            self._table = _AliasTable([len(self.buckets[c]) * weight(c) for c in self._table_counts])
+        count = self._table_counts[self._table.sample(rng)]
+        return self.buckets[count].sample(rng)
+
+
+class QuestionScheduler:
+    """按曝光次数加权、按分层均衡的出题调度
+
+    先在分层（默认 难度×类型 的各组合）之间均匀选择，使各难度和类型得到均衡覆盖；
+    再在分层内按权重 decay ** 曝光次数 抽题，做过的次数越多越少被抽到。
+    分层内相同曝光次数的题目放在同一个桶中，别名表只建在桶上，
+    因此抽题为O(1)，记录一次曝光只需移动一道题并重建所在分层的小别名表。
+
+    曝光次数可由外部传入（如会话目录索引中各题的采集次数），也可保存在state_path（JSON）。
+    只统计具有全部分层字段的题目。
+    """
+
+    def __init__(self, textlib: TextLib, state_path: Optional[str] = None,
+                 stratify_by: Sequence[str] = ('difficulty', 'type'), decay: float = 0.5,
+                 counts: Optional[Dict[Any, int]] = None, rng: Optional[random.Random] = None,
+                 qtype: Optional[str] = None, language: Optional[str] = None, difficulty: Optional[str] = None):
+        self.textlib = textlib
+        self.state_path = state_path
+        self.stratify_by = tuple(stratify_by)
+        self.decay = decay
+        self.filters = {'type': qtype or None, 'language': language or None, 'difficulty': difficulty or None}
+        self.rng = rng or random.Random()
+        self.counts: Dict[Any, int] = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, 'r', encoding='utf-8') as f:
+                self.counts = {self._parse_id(k): v for k, v in json.load(f).get('counts', {}).items()}
+        if counts is not None:
+            self.counts = dict(counts)
+        self._bank = None
+        self._strata: List[_Stratum] = []
+        self._strata_by_key: Dict[IndexKey, _Stratum] = {}
+        self._stratum_of: Dict[int, _Stratum] = {}
+
+    @staticmethod
+    def _parse_id(key: str) -> Any:
+        # JSON对象的键只能是字符串，整数id在保存时被转换过
+        return int(key) if key.lstrip('-').isdigit() else key
+
+    def weight(self, count: int) -> float:
+        """曝光count次的题目的权重"""
+        return self.decay ** count
+
+    def _build(self):
+        bank = self.textlib.bank
+        self._bank = bank
+        self._strata = []
+        self._strata_by_key = {}
+        self._stratum_of = {}
+        facet_values = [[v for v in bank.facet_values(facet) if v] if facet in self.stratify_by and
+                        self.filters[facet] is None else [self.filters[facet]] for facet in FACETS]
+        for key in product(*facet_values):
+            positions = bank.positions(tuple(key))
+            if len(positions):
+                stratum = _Stratum(positions)
+                self._strata.append(stratum)
+                self._strata_by_key[tuple(key)] = stratum
+        # 把已有曝光次数的题目移到对应的桶
+        for question_id, count in self.counts.items():
+            position = bank.position_of(question_id)
+            if position is None or count <= 0:
+                continue
+            stratum = self._find_stratum(position)
+            if stratum is not None:
+                stratum.move(position, 0, count)
+                self._stratum_of[position] = stratum
+
+    def _find_stratum(self, position: int) -> Optional['_Stratum']:
+        # 按题目自身的字段定位分层，不在分层中查找
+        question = self._bank[position]
+        key = tuple(self.filters[facet] if self.filters[facet] is not None else
+                    (question.get(facet) or None) if facet in self.stratify_by else None for facet in FACETS)
+        if any(self.filters[facet] is not None and (question.get(facet) or None) != self.filters[facet]
+               for facet in FACETS):
+            return None
+        return self._strata_by_key.get(key)
+
+    def _ensure_current(self):
+        if self._bank is not self.textlib.bank:
+            # 题库重新加载后按新题库重建
+            self._build()
+
+    def draw(self, record: bool = False) -> Optional[Dict[str, Any]]:
+        """抽一道题；record为True时同时记录一次曝光"""
+        self._ensure_current()
+        if not self._strata:
+            return None
+        stratum = self._strata[self.rng.randrange(len(self._strata))]
+        position = stratum.sample(self.rng, self.weight)
+        question = self._bank[position]
+        if record:
+            self.record_exposure(self._bank.question_id(position))
+        return question
+
+    def record_exposure(self, question_id: Any, times: int = 1):
+        """记录题目被采集（曝光）times次
+
+        没有id的题目（question_id为None）不记录：会话目录索引不统计它们，
+        保存后的状态也无法与题目对应。
+        """
+        if question_id is None:
+            return
+        self._ensure_current()
+        old_count = self.counts.get(question_id, 0)
+        new_count = old_count + times
+        self.counts[question_id] = new_count
+        position = self._bank.position_of(question_id)
+        if position is not None:
+            stratum = self._stratum_of.get(position)
+            if stratum is None and old_count == 0:
+                stratum = self._find_stratum(position)
+            if stratum is not None:
+                stratum.move(position, old_count, new_count)
+                self._stratum_of[position] = stratum
+        self.save()
+
+    def save(self):
+        """保存曝光次数"""
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or '.', exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'counts': {str(k): v for k, v in self.counts.items()}}, f)
+        os.replace(tmp_path, self.state_path)
+
 
 # 用法示例：
 # lib = TextLib('textlib/questions.json')
 # q = lib.get_random_question(qtype='code', language='zh')
-# print(q) 
\ No newline at end of file
+# print(q)
+# sampler = lib.sampler('participant_01', state_dir='data/samplers')
+# q = sampler.draw()
+# scheduler = lib.scheduler('data/question_exposure.json')
+# q = scheduler.draw(); scheduler.record_exposure(q['id'])
+# 大题库先转换为JSONL：convert_json_to_jsonl('textlib/questions.json')，再 TextLib('textlib/questions.jsonl')